@@ -2,11 +2,20 @@
 
 import sys
 import platform
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from ui.agent_window import VentanaAgente
 from ui.tray_icon import crear_icono_tray
+from core.browser_pool import pool_navegadores
+from core.capture_pipeline import pipeline_capturas
+from core.smtp_pool import pool_smtp
+from core.mail_spool import cola_correo
+from core.mail_digest import agrupador_resumen
+from core.execution_store import historial_ejecuciones
+from core.log_search import indice_logs
 
 def main():
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
 
     if platform.system() == "Darwin":
@@ -17,12 +26,30 @@ def main():
         except Exception as e:
             print(f"Error al ocultar ícono del Dock: {e}")
 
+    historial_ejecuciones.iniciar()
+    indice_logs.iniciar()
+    cola_correo.iniciar()
+    agrupador_resumen.iniciar()
     ventana = VentanaAgente()
     ventana.show()
 
     crear_icono_tray(ventana)
 
-    sys.exit(app.exec_())
+    codigo = app.exec_()
+    # Primero deja de disparar el scheduler, luego terminan las ejecuciones y
+    # sólo entonces se cierran los navegadores que usan.
+    ventana.rpa_manager.scheduler.detener()
+    ventana.rpa_manager.pool.detener()
+    pool_navegadores.cerrar()
+    pipeline_capturas.cerrar()
+    agrupador_resumen.detener()
+    cola_correo.detener()
+    pool_smtp.cerrar()
+    ventana.trabajadores.esperar()
+    ventana.rpa_manager.metadatos.detener()
+    historial_ejecuciones.detener()
+    indice_logs.detener()
+    sys.exit(codigo)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# Igual que en tests/: los módulos de core/ crean sus carpetas en el directorio
+# de trabajo al importarse, así que cada benchmark corre en uno temporal.
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def preparar() -> str:
+    if RAIZ_REPO not in sys.path:
+        sys.path.insert(0, RAIZ_REPO)
+    directorio = tempfile.mkdtemp(prefix="esender_bench_")
+    os.chdir(directorio)
+    return directorio
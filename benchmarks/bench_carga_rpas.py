@@ -0,0 +1,45 @@
+# Arranque con muchos RPAs: cuánto bloquea el constructor de RPAManager (vista
+# desde indice.json) y cuánto tarda la carga completa en segundo plano.
+#
+#   python -m benchmarks.bench_carga_rpas [--rpas 500]
+
+import os
+import json
+import time
+import argparse
+
+from benchmarks._entorno import preparar
+
+def _crear_rpas(directorio: str, n: int):
+    from tests.paquetes import crear_paquete_rpa
+    config = {"programacion": {"frecuencia": "daily", "intervalo": 1, "hora_inicio": "03:00"}}
+    for i in range(n):
+        carpeta = crear_paquete_rpa(os.path.join(directorio, f"rpa_{i:04d}"), config)
+        with open(os.path.join(carpeta, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"activo": i % 2 == 0, "descripcion": "", "ejecuciones": 0}, f)
+
+def _arrancar(etiqueta: str):
+    from core.rpa_manager import RPAManager
+    inicio = time.perf_counter()
+    manager = RPAManager()
+    constructor = time.perf_counter() - inicio
+    visibles = len(manager.rpas)
+    manager.carga_completa.wait()
+    total = time.perf_counter() - inicio
+    print(f"{etiqueta}: constructor {constructor:.3f} s con {visibles} RPAs visibles, "
+          f"carga completa {total:.3f} s ({len(manager.rpas)} RPAs)")
+    manager.scheduler.detener()
+    manager.metadatos.detener()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la carga de RPAs al arrancar")
+    parser.add_argument("--rpas", type=int, default=500)
+    args = parser.parse_args(argv)
+    preparar()
+    from core.rpa_manager import DIRECTORIO_RPAS
+    _crear_rpas(DIRECTORIO_RPAS, args.rpas)
+    _arrancar("Primer arranque (sin índice)")
+    _arrancar("Arranque con índice")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Latencia del hilo de la interfaz con 50 RPAs ejecutándose a la vez: la
+# ventana real (offscreen) con su MonitorLatencia, primero en reposo y luego
+# mientras corren las ejecuciones y se cambia de RPA seleccionado y de pestaña.
+# Las ejecuciones pasan por RPAManager y rpa_executor (descifrado, logs,
+# historial, spool de correo); sólo la navegación se sustituye por esperas,
+# porque Playwright no se controla desde aquí. El spool no se arranca: los
+# correos quedan encolados sin conectarse a ningún servidor.
+#
+#   python -m benchmarks.bench_interfaz [--rpas 50] [--reposo 2]
+
+import os
+import time
+import random
+import argparse
+
+from benchmarks._entorno import preparar
+
+def _crear_rpas(directorio: str, n: int):
+    from tests.paquetes import crear_paquete_rpa
+    for i in range(n):
+        nombre = f"rpa_{i:02d}"
+        crear_paquete_rpa(os.path.join(directorio, nombre), {
+            "rpa": {"nombre": nombre, "url_ruta": [{"url": f"https://ejemplo.com/{nombre}/{j}"} for j in range(3)]},
+            "correo": {
+                "remitente": "envios@ejemplo.com",
+                "destinatarios": ["a@ejemplo.com"],
+                "smtp_local": {"servidor": "localhost", "puerto": 25}
+            }
+        })
+
+def _navegacion_simulada(config, **kwargs):
+    detalles = []
+    for ruta in config["rpa"]["url_ruta"]:
+        espera = random.uniform(0.5, 1.5)
+        time.sleep(espera)
+        detalles.append({"url": ruta["url"], "tiempo_carga": round(espera, 2), "nombre_captura": "No capturada"})
+    return [], detalles
+
+def _correr(hasta, limite_s: float):
+    # Bucle de eventos de Qt hasta que se cumpla `hasta()` o pase `limite_s`.
+    from PyQt5.QtCore import QEventLoop, QTimer
+    bucle = QEventLoop()
+    fin = time.monotonic() + limite_s
+    comprobar = QTimer()
+    comprobar.timeout.connect(lambda: (hasta() or time.monotonic() >= fin) and bucle.quit())
+    comprobar.start(50)
+    bucle.exec_()
+    comprobar.stop()
+
+def _medir(monitor, etiqueta: str, hasta, limite_s: float):
+    monitor.metricas.update(fotogramas=0, bloqueos=0, retraso_max_ms=0.0)
+    inicio = time.perf_counter()
+    _correr(hasta, limite_s)
+    m = monitor.metricas
+    print(f"{etiqueta}: {time.perf_counter() - inicio:.1f} s, {m['fotogramas']} fotogramas, "
+          f"retraso máximo {m['retraso_max_ms']:.0f} ms, bloqueos {m['bloqueos']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la latencia de la interfaz con ejecuciones simultáneas")
+    parser.add_argument("--rpas", type=int, default=50)
+    parser.add_argument("--reposo", type=float, default=2.0, help="segundos medidos antes de ejecutar")
+    args = parser.parse_args(argv)
+    preparar()
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ["ESENDER_MAX_EJECUCIONES"] = str(args.rpas)
+
+    from PyQt5.QtWidgets import QApplication
+    from core import rpa_executor
+    from core.rpa_manager import DIRECTORIO_RPAS
+    from core.execution_store import historial_ejecuciones
+    from core.log_search import indice_logs
+    from ui.agent_window import VentanaAgente
+
+    _crear_rpas(DIRECTORIO_RPAS, args.rpas)
+    rpa_executor.ejecutar_navegacion = _navegacion_simulada
+
+    app = QApplication([])
+    historial_ejecuciones.iniciar()
+    indice_logs.iniciar()
+    ventana = VentanaAgente()
+    ventana.show()
+    manager = ventana.rpa_manager
+    _correr(manager.carga_completa.is_set, 60)
+    monitor = ventana.monitor_latencia
+
+    _medir(monitor, "Reposo", lambda: False, args.reposo)
+
+    # Mientras ejecutan: otro RPA seleccionado cada 200 ms y otra pestaña cada segundo.
+    from PyQt5.QtCore import QTimer
+    filas = ventana.proxy_rpas.rowCount()
+    seleccionar = QTimer()
+    seleccionar.timeout.connect(lambda: ventana.tabla_rpas.selectRow(random.randrange(filas)))
+    seleccionar.start(200)
+    pestana = QTimer()
+    pestana.timeout.connect(lambda: ventana.tab_widget.setCurrentIndex((ventana.tab_widget.currentIndex() + 1) % ventana.tab_widget.count()))
+    pestana.start(1000)
+
+    for nombre in manager.obtener_lista_rpas():
+        manager.ejecutar_rpa(nombre)
+    completadas = lambda: manager.pool.obtener_metricas()["completadas"] >= args.rpas
+    _medir(monitor, f"{args.rpas} ejecuciones simultáneas", completadas, 120)
+    seleccionar.stop()
+    pestana.stop()
+    historial_ejecuciones.vaciar()
+    ejecuciones, _ = historial_ejecuciones.consultar_ejecuciones(limite=args.rpas)
+    correo = sum(1 for e in ejecuciones if e["correo"])
+    print(f"Historial: {len(ejecuciones)} ejecuciones ({sum(1 for e in ejecuciones if e['estado'] == 'exito')} con éxito), "
+          f"{correo} correos encolados")
+
+    manager.scheduler.detener()
+    manager.pool.detener()
+    ventana.trabajadores.esperar()
+    manager.metadatos.detener()
+    historial_ejecuciones.detener()
+    indice_logs.detener()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Rendimiento de registrar_log con varios hilos escribiendo a la vez: escritor
+# en segundo plano frente a abrir y cerrar el archivo en cada línea, que es lo
+# que hacía registrar_log antes.
+#
+#   python -m benchmarks.bench_logs [--hilos 8] [--lineas 160000] [--rpas 4]
+
+import os
+import time
+import argparse
+import threading
+
+from benchmarks._entorno import preparar
+
+def _escribir_directo(ruta: str, linea: str):
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(linea)
+
+def _en_paralelo(hilos: int, lineas: int, rpas: int, funcion):
+    por_hilo = lineas // hilos
+
+    def trabajador(h):
+        for i in range(por_hilo):
+            funcion(f"bench_{(h + i) % rpas}", f"RPA: línea {i} del hilo {h} " + "x" * 60)
+
+    trabajadores = [threading.Thread(target=trabajador, args=(h,)) for h in range(hilos)]
+    inicio = time.perf_counter()
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    return por_hilo * hilos, time.perf_counter() - inicio
+
+def _contar_lineas(directorio: str, prefijo: str) -> int:
+    total = 0
+    for archivo in os.listdir(directorio):
+        if archivo.startswith(prefijo) and archivo.endswith(".log"):
+            with open(os.path.join(directorio, archivo), "rb") as f:
+                total += sum(1 for _ in f)
+    return total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del escritor de logs")
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--lineas", type=int, default=160000)
+    parser.add_argument("--rpas", type=int, default=4)
+    args = parser.parse_args(argv)
+    preparar()
+    # Sin rotación durante la medida: se cuentan las líneas en los .log.
+    os.environ["ESENDER_LOG_MAX_MB"] = "0"
+    os.environ["ESENDER_LOG_ROTACION_HORAS"] = "0"
+    from core.log_handler import DIRECTORIO_LOGS, escritor_logs, registrar_log
+
+    def directo(nombre, mensaje):
+        ruta = os.path.join(DIRECTORIO_LOGS, f"{nombre.replace('bench', 'directo')}.log")
+        _escribir_directo(ruta, f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {mensaje}\n")
+
+    n, segundos = _en_paralelo(args.hilos, args.lineas, args.rpas, directo)
+    print(f"Abrir y escribir por línea: {n / segundos:,.0f} líneas/s "
+          f"({_contar_lineas(DIRECTORIO_LOGS, 'directo_')} en disco)")
+
+    inicio = time.perf_counter()
+    n, segundos = _en_paralelo(args.hilos, args.lineas, args.rpas, registrar_log)
+    escritor_logs.vaciar()
+    en_disco = time.perf_counter() - inicio
+    print(f"Escritor en segundo plano: {n / segundos:,.0f} llamadas/s aceptadas, "
+          f"{n / en_disco:,.0f} líneas/s hasta estar en disco "
+          f"({_contar_lineas(DIRECTORIO_LOGS, 'bench_')} en disco)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Memoria al escribir un reporte con capturas grandes: escritura MIME por
+# bloques (escribir_mime) frente a construir el mensaje con email.mime y
+# as_bytes(), que es lo que hacía el envío antes.
+#
+#   python -m benchmarks.bench_mime [--capturas 6] [--mib 8] [--sin-referencia]
+
+import os
+import argparse
+import tempfile
+import tracemalloc
+from email import message_from_binary_file, policy
+from email.mime.image import MIMEImage
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from benchmarks._entorno import preparar
+
+CORREO = {"remitente": "agente@example.com", "destinatarios": ["a@example.com"], "cc": [], "adjuntar_capturas": True}
+
+def _referencia(imagenes) -> int:
+    mensaje = MIMEMultipart("related")
+    alternativa = MIMEMultipart("alternative")
+    alternativa.attach(MIMEText("<p>reporte</p>", "html", "utf-8"))
+    mensaje.attach(alternativa)
+    for cid, ruta in imagenes:
+        with open(ruta, "rb") as f:
+            datos = f.read()
+        inline = MIMEImage(datos, "png")
+        inline.add_header("Content-ID", f"<{cid}>")
+        mensaje.attach(inline)
+        adjunto = MIMEImage(datos, "png")
+        adjunto.add_header("Content-Disposition", "attachment", filename=os.path.basename(ruta))
+        mensaje.attach(adjunto)
+    return len(mensaje.as_bytes())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de memoria de la escritura MIME")
+    parser.add_argument("--capturas", type=int, default=6)
+    parser.add_argument("--mib", type=int, default=8)
+    parser.add_argument("--sin-referencia", action="store_true")
+    args = parser.parse_args(argv)
+    directorio = preparar()
+    from core.mail_sender import escribir_mime
+
+    imagenes = []
+    for i in range(args.capturas):
+        ruta = os.path.join(directorio, f"captura_{i}.png")
+        with open(ruta, "wb") as f:
+            f.write(os.urandom(args.mib * 1024 * 1024))
+        imagenes.append((f"screenshot{i}", ruta))
+
+    if not args.sin_referencia:
+        tracemalloc.start()
+        tamano = _referencia(imagenes)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"email.mime + as_bytes(): pico {pico / 2**20:.1f} MiB para {tamano / 2**20:.0f} MiB")
+
+    with tempfile.TemporaryFile() as salida:
+        tracemalloc.start()
+        escribir_mime(salida, CORREO, "Reporte", "<p>reporte</p>", imagenes, adjuntar=True)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"escribir_mime: pico {pico / 2**20:.1f} MiB para {salida.tell() / 2**20:.0f} MiB")
+
+        # Comprobación: las imágenes salen idénticas al volver a leer el mensaje.
+        salida.seek(0)
+        mensaje = message_from_binary_file(salida, policy=policy.default)
+        partes = [p for p in mensaje.walk() if p.get_content_maintype() != "multipart"][1:]
+        esperadas = []
+        for _, ruta in imagenes:
+            with open(ruta, "rb") as f:
+                esperadas += [f.read()] * 2
+        iguales = len(partes) == len(esperadas) and all(p.get_payload(decode=True) == d for p, d in zip(partes, esperadas))
+        print(f"Partes de imagen idénticas al original: {iguales}")
+
+if __name__ == "__main__":
+    main()
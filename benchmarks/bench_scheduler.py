@@ -0,0 +1,52 @@
+# Coste del scheduler de un solo hilo: hilos usados, memoria por
+# programación y tiempo de cancelación para 10..10k RPAs programados.
+#
+#   python -m benchmarks.bench_scheduler [--tamanos 10 100 1000 10000]
+
+import argparse
+import threading
+import time
+import tracemalloc
+
+from benchmarks._entorno import preparar
+
+class _ManagerFalso:
+    def obtener_duracion_estimada(self, nombre):
+        return None
+
+    def ejecutar_rpa(self, nombre):
+        return True
+
+def medir(n: int) -> dict:
+    from core.scheduler import RPAScheduler
+    config = {"programacion": {"frecuencia": "daily", "intervalo": 1, "hora_inicio": "03:00"}}
+    scheduler = RPAScheduler(_ManagerFalso())
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for i in range(n):
+        scheduler.programar_rpa(f"rpa_{i}", config, _ManagerFalso().ejecutar_rpa)
+    memoria = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    hilos = sum(1 for h in threading.enumerate() if h.name == "RPAScheduler")
+
+    inicio = time.perf_counter()
+    for i in range(n):
+        scheduler.cancelar(f"rpa_{i}")
+    cancelar_s = time.perf_counter() - inicio
+    scheduler.detener()
+    scheduler._hilo.join()
+    return {"n": n, "hilos": hilos, "memoria_kb": memoria / 1024, "cancelar_s": cancelar_s}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del scheduler")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    args = parser.parse_args(argv)
+    preparar()
+    for n in args.tamanos:
+        r = medir(n)
+        print(f"{r['n']:>6} programaciones: {r['hilos']} hilo(s) de scheduler, "
+              f"{r['memoria_kb']:.1f} KB, cancelar todas {r['cancelar_s']:.3f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from playwright.async_api import async_playwright
+from core.log_handler import LOG_AGENTE, registrar_log
+
+try:
+    import psutil
+except ImportError:  # La comprobación de memoria es opcional.
+    psutil = None
+
+MAX_USOS_NAVEGADOR = int(os.environ.get("ESENDER_NAVEGADOR_MAX_USOS", "50"))
+MAX_MEMORIA_NAVEGADOR_MB = int(os.environ.get("ESENDER_NAVEGADOR_MAX_MB", "1500"))
+INTERVALO_SALUD_S = 60
+ARGS_NAVEGADOR = ["--ignore-certificate-errors"]
+
+class _Navegador:
+    def __init__(self, browser, headless: bool, tiempo_arranque: float, marca: str = ""):
+        self.browser = browser
+        self.headless = headless
+        self.tiempo_arranque = tiempo_arranque
+        self.marca = marca
+        self.proceso = None
+        self.usos = 0
+        self.activos = 0
+        self.retirado = False
+
+class SesionNavegador:
+    # Lo que recibe una ejecución: acceso al navegador compartido para crear
+    # contextos aislados, que se cierran todos al terminar la sesión.
+    def __init__(self, navegador: _Navegador, reutilizado: bool, tiempo_obtencion: float):
+        self.navegador = navegador
+        self.reutilizado = reutilizado
+        self.tiempo_obtencion = tiempo_obtencion
+        self._contextos: List = []
+
+    async def nuevo_contexto(self, **kwargs):
+        contexto = await self.navegador.browser.new_context(**kwargs)
+        self._contextos.append(contexto)
+        return contexto
+
+    async def _cerrar(self):
+        for contexto in self._contextos:
+            try:
+                await contexto.close()
+            except Exception:
+                pass
+        self._contextos.clear()
+
+# Servicio de navegadores Chromium calientes compartidos entre ejecuciones.
+# Un hilo propio mantiene un event loop con Playwright async; hay un navegador
+# por modo (headless / visible) y cada ejecución obtiene contextos aislados
+# sobre él. El navegador se recicla tras MAX_USOS_NAVEGADOR sesiones, si se
+# desconecta o si su árbol de procesos supera MAX_MEMORIA_NAVEGADOR_MB
+# (requiere psutil). Cada navegador se lanza con un argumento propio
+# (--esender-navegador=<id>) para encontrar su proceso entre los de Chromium.
+class PoolNavegadores:
+
+    def __init__(self, max_usos: int = MAX_USOS_NAVEGADOR, max_memoria_mb: int = MAX_MEMORIA_NAVEGADOR_MB):
+        self.max_usos = max_usos
+        self.max_memoria_mb = max_memoria_mb
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._playwright = None
+        self._navegadores: Dict[bool, _Navegador] = {}
+        self._locks_modo: Dict[bool, asyncio.Lock] = {}
+        self.metricas = {
+            "lanzamientos": 0,
+            "reutilizaciones": 0,
+            "reciclajes": 0,
+            "arranque_total_s": 0.0,
+        }
+
+    def _asegurar_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                listo = threading.Event()
+
+                def correr():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(listo.set)
+                    loop.create_task(self._vigilar())
+                    loop.run_forever()
+
+                threading.Thread(target=correr, name="PoolNavegadores", daemon=True).start()
+                listo.wait()
+                self._loop = loop
+                if psutil is None:
+                    registrar_log(LOG_AGENTE, "[WARN] psutil no está instalado: los navegadores no se reciclarán por memoria.")
+            return self._loop
+
+    def ejecutar(self, corrutina):
+        # Ejecuta la corrutina en el loop del pool y bloquea al llamador hasta su fin.
+        loop = self._asegurar_loop()
+        return asyncio.run_coroutine_threadsafe(corrutina, loop).result()
+
+    async def _lanzar(self, headless: bool) -> _Navegador:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        marca = f"--esender-navegador={uuid.uuid4().hex}"
+        inicio = time.monotonic()
+        browser = await self._playwright.chromium.launch(headless=headless, args=ARGS_NAVEGADOR + [marca])
+        navegador = _Navegador(browser, headless, time.monotonic() - inicio, marca)
+        self.metricas["lanzamientos"] += 1
+        self.metricas["arranque_total_s"] += navegador.tiempo_arranque
+        return navegador
+
+    @staticmethod
+    def _proceso_navegador(navegador: _Navegador):
+        # El proceso principal de Chromium de este navegador: el que lleva su marca
+        # y cuyo padre no la lleva (por si algún hijo la heredara).
+        if navegador.proceso is not None and navegador.proceso.is_running():
+            return navegador.proceso
+        marcados = {}
+        for proceso in psutil.Process().children(recursive=True):
+            try:
+                if navegador.marca in proceso.cmdline():
+                    marcados[proceso.pid] = proceso
+            except psutil.Error:
+                continue
+        navegador.proceso = next((p for p in marcados.values() if p.ppid() not in marcados), None)
+        return navegador.proceso
+
+    def _memoria_navegador_mb(self, navegador: _Navegador) -> Optional[float]:
+        if psutil is None:
+            return None
+        try:
+            proceso = self._proceso_navegador(navegador)
+            if proceso is None:
+                return None
+            total = proceso.memory_info().rss
+            for hijo in proceso.children(recursive=True):
+                try:
+                    total += hijo.memory_info().rss
+                except psutil.Error:
+                    continue
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    def _motivo_reciclaje(self, navegador: _Navegador) -> Optional[str]:
+        if not navegador.browser.is_connected():
+            return "navegador desconectado"
+        if navegador.usos >= self.max_usos:
+            return f"{navegador.usos} usos"
+        memoria = self._memoria_navegador_mb(navegador)
+        if memoria is not None and memoria > self.max_memoria_mb:
+            return f"{memoria:.0f} MB en uso"
+        return None
+
+    async def _retirar(self, navegador: _Navegador, motivo: str):
+        navegador.retirado = True
+        if self._navegadores.get(navegador.headless) is navegador:
+            del self._navegadores[navegador.headless]
+        self.metricas["reciclajes"] += 1
+        registrar_log(LOG_AGENTE, f"[INFO] Reciclando navegador ({'headless' if navegador.headless else 'visible'}): {motivo}")
+        if navegador.activos == 0:
+            await self._cerrar_navegador(navegador)
+
+    async def _cerrar_navegador(self, navegador: _Navegador):
+        try:
+            await navegador.browser.close()
+        except Exception:
+            pass
+
+    async def _obtener(self, headless: bool):
+        lock = self._locks_modo.setdefault(headless, asyncio.Lock())
+        async with lock:
+            navegador = self._navegadores.get(headless)
+            if navegador:
+                motivo = self._motivo_reciclaje(navegador)
+                if motivo:
+                    await self._retirar(navegador, motivo)
+                    navegador = None
+
+            reutilizado = navegador is not None
+            if navegador is None:
+                navegador = await self._lanzar(headless)
+                self._navegadores[headless] = navegador
+            else:
+                self.metricas["reutilizaciones"] += 1
+
+            navegador.usos += 1
+            navegador.activos += 1
+            return navegador, reutilizado
+
+    @asynccontextmanager
+    async def sesion(self, headless: bool):
+        inicio = time.monotonic()
+        navegador, reutilizado = await self._obtener(headless)
+        sesion = SesionNavegador(navegador, reutilizado, time.monotonic() - inicio)
+        try:
+            yield sesion
+        finally:
+            await sesion._cerrar()
+            navegador.activos -= 1
+            if navegador.retirado and navegador.activos == 0:
+                await self._cerrar_navegador(navegador)
+
+    async def _vigilar(self):
+        # Chequeo periódico: retira navegadores caídos o agotados aunque nadie los pida.
+        while True:
+            await asyncio.sleep(INTERVALO_SALUD_S)
+            for headless, navegador in list(self._navegadores.items()):
+                async with self._locks_modo.setdefault(headless, asyncio.Lock()):
+                    if self._navegadores.get(headless) is not navegador:
+                        continue
+                    motivo = self._motivo_reciclaje(navegador)
+                    if motivo:
+                        await self._retirar(navegador, motivo)
+
+    def obtener_metricas(self) -> Dict:
+        metricas = dict(self.metricas)
+        lanzamientos = metricas["lanzamientos"]
+        metricas["arranque_promedio_s"] = round(metricas["arranque_total_s"] / lanzamientos, 3) if lanzamientos else 0.0
+        metricas["navegadores_abiertos"] = len(self._navegadores)
+        return metricas
+
+    async def _cerrar_todo(self):
+        for navegador in list(self._navegadores.values()):
+            await self._cerrar_navegador(navegador)
+        self._navegadores.clear()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def cerrar(self):
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cerrar_todo(), self._loop).result(timeout=30)
+        except Exception as e:
+            registrar_log(LOG_AGENTE, f"[WARN] No se pudo cerrar el pool de navegadores: {e}")
+
+pool_navegadores = PoolNavegadores()
@@ -0,0 +1,95 @@
+import io
+import os
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+PROCESOS_CODIFICACION = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+FORMATOS = {
+    "png": ("PNG", ".png"),
+    "jpeg": ("JPEG", ".jpg"),
+    "jpg": ("JPEG", ".jpg"),
+    "webp": ("WEBP", ".webp"),
+}
+
+def opciones_captura(rpa_data: Dict, ruta: Dict) -> Dict:
+    # rpa.pantalla.captura define el formato por defecto; cada ruta puede fijar su selector.
+    opciones = dict(rpa_data.get("pantalla", {}).get("captura") or {})
+    formato = str(opciones.get("formato", "png")).lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de captura no válido: {formato}")
+    opciones["formato"] = formato
+    if ruta.get("captura_selector"):
+        opciones["selector"] = ruta["captura_selector"]
+    return opciones
+
+def extension(opciones: Dict) -> str:
+    return FORMATOS[opciones["formato"]][1]
+
+def _requiere_procesado(opciones: Dict) -> bool:
+    return opciones["formato"] != "png" or bool(opciones.get("ancho_max") or opciones.get("alto_max"))
+
+def codificar_captura(png: bytes, destino: str, opciones: Dict) -> Dict:
+    # Se ejecuta en un proceso del pool: reescala y recodifica el PNG original.
+    from PIL import Image
+
+    imagen = Image.open(io.BytesIO(png))
+    ancho_max = int(opciones.get("ancho_max") or imagen.width)
+    alto_max = int(opciones.get("alto_max") or imagen.height)
+    if imagen.width > ancho_max or imagen.height > alto_max:
+        imagen.thumbnail((ancho_max, alto_max), Image.LANCZOS)
+
+    formato_pil = FORMATOS[opciones["formato"]][0]
+    parametros = {"optimize": True}
+    if formato_pil in ("JPEG", "WEBP"):
+        parametros["quality"] = int(opciones.get("calidad", 80))
+        if formato_pil == "JPEG" and imagen.mode not in ("RGB", "L"):
+            imagen = imagen.convert("RGB")
+    imagen.save(destino, formato_pil, **parametros)
+
+    return {
+        "bytes_originales": len(png),
+        "bytes_finales": os.path.getsize(destino),
+        "dimensiones": list(imagen.size)
+    }
+
+def _guardar_sin_cambios(png: bytes, destino: str) -> Dict:
+    with open(destino, "wb") as f:
+        f.write(png)
+    return {"bytes_originales": len(png), "bytes_finales": len(png), "dimensiones": None}
+
+# Codificación de capturas fuera del hilo de navegación: Playwright entrega el
+# PNG en memoria y un pool de procesos lo reescala y comprime mientras la
+# ejecución sigue con la siguiente ruta.
+class PipelineCapturas:
+
+    def __init__(self, procesos: int = PROCESOS_CODIFICACION):
+        self.procesos = procesos
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _obtener_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: los procesos no heredan hilos ni el estado de Playwright.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.procesos, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def codificar(self, png: bytes, destino: str, opciones: Dict) -> "asyncio.Future":
+        loop = asyncio.get_running_loop()
+        if not _requiere_procesado(opciones):
+            return loop.run_in_executor(None, _guardar_sin_cambios, png, destino)
+        return loop.run_in_executor(self._obtener_executor(), codificar_captura, png, destino, opciones)
+
+    def cerrar(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+pipeline_capturas = PipelineCapturas()
@@ -1,23 +1,35 @@
+import os
+import copy
 import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from base64 import b64decode
+from typing import Dict, Optional
 from Crypto.Cipher import AES
-from Crypto.Util.Padding import unpad
+from Crypto.Util.Padding import pad, unpad
 
-def descifrar_configuracion(ruta_enc: str, ruta_key: str) -> dict:
+CACHE_MAX_ENTRADAS = 256
+CACHE_TTL_SEGUNDOS: Optional[float] = None
+
+def _leer_clave(ruta_key: str) -> bytes:
     try:
         with open(ruta_key, "rb") as f_key:
             key = f_key.read()
         if len(key) != 32:
             raise ValueError("La clave debe tener exactamente 32 bytes para AES-256.")
+        return key
     except Exception as e:
         raise RuntimeError(f"Error al leer clave: {e}")
 
+def _descifrar(ruta_enc: str, key: bytes) -> dict:
     try:
         with open(ruta_enc, "rb") as f_enc:
             raw = f_enc.read()
         if len(raw) < 16:
             raise ValueError("Archivo cifrado inválido o muy corto.")
-        
+
         iv = raw[:16]
         datos_cifrados = raw[16:]
 
@@ -28,4 +40,86 @@ def descifrar_configuracion(ruta_enc: str, ruta_key: str) -> dict:
     except (ValueError, json.JSONDecodeError) as e:
         raise RuntimeError(f"Error al descifrar o interpretar configuración: {e}")
     except Exception as e:
-        raise RuntimeError(f"Fallo general durante el descifrado: {e}")
\ No newline at end of file
+        raise RuntimeError(f"Fallo general durante el descifrado: {e}")
+
+def cifrar_datos(datos: bytes, ruta_key: str) -> bytes:
+    key = _leer_clave(ruta_key)
+    iv = os.urandom(16)
+    cipher = AES.new(key, AES.MODE_CBC, iv)
+    return iv + cipher.encrypt(pad(datos, AES.block_size))
+
+def descifrar_datos(raw: bytes, ruta_key: str) -> bytes:
+    key = _leer_clave(ruta_key)
+    if len(raw) < 16:
+        raise RuntimeError("Datos cifrados inválidos o muy cortos.")
+    try:
+        cipher = AES.new(key, AES.MODE_CBC, raw[:16])
+        return unpad(cipher.decrypt(raw[16:]), AES.block_size)
+    except ValueError as e:
+        raise RuntimeError(f"Error al descifrar datos: {e}")
+
+# Caché LRU de configuraciones ya descifradas. La clave de cada entrada es la
+# identidad del .enc (ruta, mtime, tamaño) más el hash de la clave AES, así que
+# reemplazar cualquiera de los dos archivos invalida la entrada por sí solo.
+class CacheConfiguraciones:
+
+    def __init__(self, max_entradas: int = CACHE_MAX_ENTRADAS, ttl_segundos: Optional[float] = CACHE_TTL_SEGUNDOS):
+        self.max_entradas = max_entradas
+        self.ttl_segundos = ttl_segundos
+        self._entradas: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    @staticmethod
+    def _identidad(ruta_enc: str, key: bytes) -> tuple:
+        st = os.stat(ruta_enc)
+        return (st.st_mtime_ns, st.st_size, hashlib.sha256(key).hexdigest())
+
+    def obtener(self, ruta_enc: str, ruta_key: str) -> dict:
+        ruta = os.path.abspath(ruta_enc)
+        key = _leer_clave(ruta_key)
+        try:
+            identidad = self._identidad(ruta, key)
+        except OSError as e:
+            raise RuntimeError(f"Fallo general durante el descifrado: {e}")
+
+        with self._lock:
+            entrada = self._entradas.get(ruta)
+            if entrada and entrada[0] == identidad and not self._expirada(entrada[1]):
+                self._entradas.move_to_end(ruta)
+                self.aciertos += 1
+                return copy.deepcopy(entrada[2])
+            self.fallos += 1
+
+        config = _descifrar(ruta, key)
+        with self._lock:
+            self._entradas[ruta] = (identidad, time.monotonic(), config)
+            self._entradas.move_to_end(ruta)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return copy.deepcopy(config)
+
+    def _expirada(self, creada: float) -> bool:
+        return self.ttl_segundos is not None and time.monotonic() - creada > self.ttl_segundos
+
+    def invalidar(self, ruta_enc: Optional[str] = None):
+        with self._lock:
+            if ruta_enc is None:
+                self._entradas.clear()
+            else:
+                self._entradas.pop(os.path.abspath(ruta_enc), None)
+
+    def metricas(self) -> Dict:
+        with self._lock:
+            return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": len(self._entradas)}
+
+cache_configuraciones = CacheConfiguraciones()
+
+def descifrar_configuracion(ruta_enc: str, ruta_key: str, usar_cache: bool = True) -> dict:
+    if usar_cache:
+        return cache_configuraciones.obtener(ruta_enc, ruta_key)
+    return _descifrar(ruta_enc, _leer_clave(ruta_key))
+
+def invalidar_cache_configuracion(ruta_enc: Optional[str] = None):
+    cache_configuraciones.invalidar(ruta_enc)
@@ -0,0 +1,116 @@
+import os
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict, List
+from core.log_handler import registrar_log
+
+MAX_EJECUCIONES_CONCURRENTES = int(os.environ.get("ESENDER_MAX_EJECUCIONES", "4"))
+
+# Pool acotado de ejecuciones. Cada ejecución de RPA abre su propio navegador,
+# por lo que el número de workers es también el límite global de navegadores.
+# Un RPA sólo puede estar una vez en cola o en curso: los disparos duplicados
+# (scheduler o "Ejecutar ahora") se descartan mientras haya uno pendiente.
+class RPAExecutionPool:
+
+    def __init__(self, max_concurrentes: int = MAX_EJECUCIONES_CONCURRENTES):
+        self.max_concurrentes = max(1, int(max_concurrentes))
+        self._cola = deque()
+        self._condicion = threading.Condition()
+        self._pendientes: Dict[str, str] = {}  # nombre -> "en_cola" | "en_curso"
+        self._workers = []
+        self._observadores_fin: List[Callable[[str], None]] = []
+        self._detenido = False
+        self._metricas = {
+            "aceptadas": 0,
+            "descartadas": 0,
+            "completadas": 0,
+            "espera_total_s": 0.0,
+            "espera_max_s": 0.0,
+        }
+
+    def _asegurar_workers(self):
+        self._workers = [w for w in self._workers if w.is_alive()]
+        while len(self._workers) < self.max_concurrentes:
+            worker = threading.Thread(
+                target=self._trabajar, name=f"RPAWorker-{len(self._workers) + 1}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def agregar_observador_fin(self, observador: Callable[[str], None]):
+        # observador(nombre) se llama desde el worker al terminar cada ejecución.
+        self._observadores_fin.append(observador)
+
+    def enviar(self, nombre: str, funcion: Callable[[], None]) -> bool:
+        with self._condicion:
+            if self._detenido:
+                return False
+            estado = self._pendientes.get(nombre)
+            if estado:
+                self._metricas["descartadas"] += 1
+                registrar_log(nombre, f"[i] Disparo ignorado: el RPA ya está {estado.replace('_', ' ')}.")
+                return False
+            self._pendientes[nombre] = "en_cola"
+            self._cola.append((nombre, funcion, time.monotonic()))
+            self._metricas["aceptadas"] += 1
+            self._asegurar_workers()
+            self._condicion.notify()
+            return True
+
+    def _trabajar(self):
+        while True:
+            with self._condicion:
+                while not self._cola and not self._detenido:
+                    self._condicion.wait()
+                if self._detenido:
+                    return
+                nombre, funcion, encolado = self._cola.popleft()
+                espera = time.monotonic() - encolado
+                self._pendientes[nombre] = "en_curso"
+                self._metricas["espera_total_s"] += espera
+                self._metricas["espera_max_s"] = max(self._metricas["espera_max_s"], espera)
+
+            if espera >= 1:
+                registrar_log(nombre, f"[i] Ejecución iniciada tras {espera:.1f}s en cola.")
+            try:
+                funcion()
+            except Exception as e:
+                registrar_log(nombre, f"[ERROR] Fallo al ejecutar RPA: {e}")
+            finally:
+                with self._condicion:
+                    self._pendientes.pop(nombre, None)
+                    self._metricas["completadas"] += 1
+                for observador in self._observadores_fin:
+                    observador(nombre)
+
+    def en_ejecucion(self, nombre: str) -> bool:
+        return self._pendientes.get(nombre) == "en_curso"
+
+    def en_cola(self, nombre: str) -> bool:
+        return self._pendientes.get(nombre) == "en_cola"
+
+    def obtener_metricas(self) -> Dict:
+        with self._condicion:
+            metricas = dict(self._metricas)
+            iniciadas = metricas["aceptadas"] - len(self._cola)
+            metricas["espera_promedio_s"] = round(metricas["espera_total_s"] / iniciadas, 3) if iniciadas else 0.0
+            metricas["en_cola"] = len(self._cola)
+            metricas["espera_actual_s"] = round(time.monotonic() - self._cola[0][2], 3) if self._cola else 0.0
+            metricas["en_curso"] = sum(1 for e in self._pendientes.values() if e == "en_curso")
+            metricas["max_concurrentes"] = self.max_concurrentes
+            return metricas
+
+    def detener(self, timeout: float = 10.0):
+        # Descarta lo que está en cola y espera (como mucho `timeout`) a las
+        # ejecuciones en curso, que todavía usan sus navegadores.
+        with self._condicion:
+            self._detenido = True
+            for nombre, *_ in self._cola:
+                self._pendientes.pop(nombre, None)
+            self._cola.clear()
+            self._condicion.notify_all()
+        limite = time.monotonic() + timeout
+        for worker in self._workers:
+            if worker is not threading.current_thread():
+                worker.join(max(0.0, limite - time.monotonic()))
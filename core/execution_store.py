@@ -0,0 +1,339 @@
+import os
+import json
+import queue
+import atexit
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from core.log_handler import LOG_AGENTE, registrar_log
+
+DIRECTORIO_HISTORIAL = os.path.join(os.getcwd(), "historial_rpa")
+RUTA_HISTORIAL = os.path.join(DIRECTORIO_HISTORIAL, "ejecuciones.db")
+
+MAX_OPERACIONES_LOTE = 500
+LIMITE_POR_DEFECTO = 50
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id TEXT PRIMARY KEY,
+    rpa TEXT NOT NULL,
+    inicio TEXT NOT NULL,
+    fin TEXT,
+    estado TEXT NOT NULL,
+    error TEXT,
+    duracion_s REAL,
+    navegacion_s REAL,
+    capturas INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_ejecuciones_inicio ON ejecuciones (inicio, id);
+CREATE INDEX IF NOT EXISTS idx_ejecuciones_rpa ON ejecuciones (rpa, inicio, id);
+CREATE INDEX IF NOT EXISTS idx_ejecuciones_estado ON ejecuciones (estado, inicio, id);
+
+CREATE TABLE IF NOT EXISTS rutas (
+    ejecucion_id TEXT NOT NULL,
+    orden INTEGER NOT NULL,
+    url TEXT,
+    tiempo_carga REAL,
+    ttfb_ms REAL,
+    load_ms REAL,
+    lcp_ms REAL,
+    login_ms REAL,
+    espera_real_ms REAL,
+    bytes_transferidos INTEGER,
+    captura TEXT,
+    detalle TEXT,
+    PRIMARY KEY (ejecucion_id, orden)
+);
+
+CREATE TABLE IF NOT EXISTS correos (
+    ejecucion_id TEXT PRIMARY KEY,
+    id_mensaje TEXT,
+    estado TEXT NOT NULL,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    actualizado TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_correos_mensaje ON correos (id_mensaje);
+"""
+
+def _ahora() -> str:
+    return datetime.now().strftime(FORMATO_FECHA)
+
+def _fila_ruta(ejecucion_id: str, orden: int, detalle: Dict) -> Tuple:
+    metricas = detalle.get("metricas") or {}
+    bytes_transferidos = detalle.get("bytes_transferidos", metricas.get("bytes_transferidos"))
+    return (
+        ejecucion_id, orden, detalle.get("url"), detalle.get("tiempo_carga"),
+        metricas.get("ttfb_ms"), metricas.get("load_ms"), metricas.get("lcp_ms"),
+        detalle.get("login_ms"), detalle.get("espera_real_ms"), bytes_transferidos,
+        detalle.get("nombre_captura"), json.dumps(detalle, ensure_ascii=False, default=str)
+    )
+
+def _codificar_cursor(fila: Dict) -> str:
+    return f"{fila['inicio']}|{fila['id']}"
+
+def _decodificar_cursor(cursor: str) -> Tuple[str, str]:
+    inicio, _, id_ejecucion = cursor.rpartition("|")
+    return inicio, id_ejecucion
+
+# Historial de ejecuciones en SQLite (historial_rpa/ejecuciones.db), en modo WAL
+# para que la interfaz y la línea de comandos lean mientras se escribe. Las
+# escrituras no bloquean la ejecución: se encolan y un hilo las aplica por lotes,
+# una transacción por lote. Cada ejecución tiene una fila en `ejecuciones`
+# (en_curso al empezar, exito o error al terminar), una por ruta en `rutas`
+# (las métricas más consultadas en columnas y el detalle completo en JSON) y una
+# en `correos` con el estado de su correo, que actualizan el spool y el modo
+# resumen. Las consultas se paginan por (inicio, id) en lugar de OFFSET, así que
+# cada página cuesta lo mismo con cien ejecuciones que con un millón.
+class HistorialEjecuciones:
+
+    def __init__(self, ruta: str = RUTA_HISTORIAL):
+        self.ruta = ruta
+        self._cola: "queue.Queue" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._detenido = False
+        self.metricas = {"operaciones": 0, "lotes": 0}
+
+    def _conectar(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        conexion = sqlite3.connect(self.ruta, timeout=10)
+        conexion.row_factory = sqlite3.Row
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        conexion.executescript(ESQUEMA)
+        return conexion
+
+    def _lectura(self) -> sqlite3.Connection:
+        # Una conexión de lectura por hilo; sqlite3 no comparte conexiones entre hilos.
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = self._local.conexion = self._conectar()
+        return conexion
+
+    def iniciar(self):
+        if self._hilo is not None:
+            return
+        with self._lock:
+            if self._hilo is None and not self._detenido:
+                self._hilo = threading.Thread(target=self._trabajar, name="HistorialEjecuciones", daemon=True)
+                self._hilo.start()
+
+    # ---- Escritura ----
+
+    def _encolar(self, sql: str, parametros):
+        if self._detenido:
+            return
+        self.iniciar()
+        self._cola.put((sql, parametros))
+
+    def _trabajar(self):
+        conexion = self._conectar()
+        # Al arrancar el agente no hay nada en curso: lo que quedó así se cortó a medias.
+        with conexion:
+            conexion.execute("UPDATE ejecuciones SET estado = 'interrumpida' WHERE estado = 'en_curso'")
+        while True:
+            lote = [self._cola.get()]
+            while len(lote) < MAX_OPERACIONES_LOTE:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            continuar = True
+            try:
+                with conexion:
+                    for sql, parametros in lote:
+                        if sql is None:
+                            continuar = False
+                        elif isinstance(parametros, list):
+                            conexion.executemany(sql, parametros)
+                        else:
+                            conexion.execute(sql, parametros)
+                self.metricas["operaciones"] += len(lote)
+                self.metricas["lotes"] += 1
+            except Exception as e:
+                registrar_log(LOG_AGENTE, f"[ERROR] No se pudo escribir el historial de ejecuciones: {e}")
+            finally:
+                for _ in lote:
+                    self._cola.task_done()
+            if not continuar:
+                conexion.close()
+                return
+
+    def iniciar_ejecucion(self, id_ejecucion: str, nombre_rpa: str, inicio: datetime):
+        self._encolar(
+            "INSERT OR REPLACE INTO ejecuciones (id, rpa, inicio, estado) VALUES (?, ?, ?, 'en_curso')",
+            (id_ejecucion, nombre_rpa, inicio.strftime(FORMATO_FECHA))
+        )
+
+    def finalizar_ejecucion(self, id_ejecucion: str, inicio: datetime, detalles: List[Dict],
+                            capturas: int, error: Optional[str] = None):
+        fin = datetime.now()
+        navegacion = sum(d.get("tiempo_carga") or 0 for d in detalles)
+        self._encolar(
+            "UPDATE ejecuciones SET fin = ?, estado = ?, error = ?, duracion_s = ?, navegacion_s = ?, capturas = ? WHERE id = ?",
+            (fin.strftime(FORMATO_FECHA), "error" if error else "exito", error,
+             round((fin - inicio).total_seconds(), 3), round(navegacion, 3), capturas, id_ejecucion)
+        )
+        if detalles:
+            self._encolar(
+                "INSERT OR REPLACE INTO rutas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [_fila_ruta(id_ejecucion, orden, detalle) for orden, detalle in enumerate(detalles)]
+            )
+
+    def registrar_correo(self, id_ejecucion: str, estado: str, id_mensaje: Optional[str] = None,
+                         intentos: int = 0, error: Optional[str] = None):
+        # estado: en_resumen, encolado, reintentando, enviado o descartado.
+        self._encolar(
+            "INSERT INTO correos (ejecucion_id, id_mensaje, estado, intentos, error, actualizado) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (ejecucion_id) DO UPDATE SET "
+            "id_mensaje = COALESCE(excluded.id_mensaje, id_mensaje), estado = excluded.estado, "
+            "intentos = excluded.intentos, error = excluded.error, actualizado = excluded.actualizado",
+            (id_ejecucion, id_mensaje, estado, intentos, error, _ahora())
+        )
+
+    def vaciar(self):
+        if self._hilo is not None:
+            self._cola.join()
+
+    def detener(self, timeout: float = 10.0):
+        with self._lock:
+            if self._detenido:
+                return
+            self._detenido = True
+        if self._hilo is not None:
+            self._cola.put((None, None))
+            self._hilo.join(timeout)
+            self._hilo = None
+
+    # ---- Consulta ----
+
+    def consultar_ejecuciones(self, rpa: Optional[str] = None, estado: Optional[str] = None,
+                              desde: Optional[str] = None, hasta: Optional[str] = None,
+                              limite: int = LIMITE_POR_DEFECTO,
+                              cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        # Ejecuciones de la más reciente a la más antigua. Devuelve la página y el
+        # cursor para pedir la siguiente (None si no hay más). Fechas "AAAA-MM-DD[ HH:MM:SS]".
+        condiciones, parametros = [], []
+        if rpa:
+            condiciones.append("e.rpa = ?")
+            parametros.append(rpa)
+        if estado:
+            condiciones.append("e.estado = ?")
+            parametros.append(estado)
+        if desde:
+            condiciones.append("e.inicio >= ?")
+            parametros.append(desde)
+        if hasta:
+            condiciones.append("e.inicio < ?")
+            parametros.append(hasta)
+        if cursor:
+            condiciones.append("(e.inicio, e.id) < (?, ?)")
+            parametros.extend(_decodificar_cursor(cursor))
+        sql = (
+            "SELECT e.*, c.estado AS correo, c.intentos AS correo_intentos, c.error AS correo_error "
+            "FROM ejecuciones e LEFT JOIN correos c ON c.ejecucion_id = e.id"
+            + (" WHERE " + " AND ".join(condiciones) if condiciones else "")
+            + " ORDER BY e.inicio DESC, e.id DESC LIMIT ?"
+        )
+        parametros.append(limite + 1)
+        filas = [dict(f) for f in self._lectura().execute(sql, parametros)]
+        siguiente = _codificar_cursor(filas[limite - 1]) if len(filas) > limite else None
+        return filas[:limite], siguiente
+
+    def obtener_rutas(self, id_ejecucion: str) -> List[Dict]:
+        filas = self._lectura().execute(
+            "SELECT * FROM rutas WHERE ejecucion_id = ? ORDER BY orden", (id_ejecucion,)
+        )
+        rutas = []
+        for fila in filas:
+            ruta = dict(fila)
+            ruta["detalle"] = json.loads(ruta["detalle"]) if ruta["detalle"] else {}
+            rutas.append(ruta)
+        return rutas
+
+    def resumen_por_rpa(self, desde: Optional[str] = None, hasta: Optional[str] = None) -> List[Dict]:
+        # Por RPA: ejecuciones, errores, último error y duración/navegación medias.
+        condiciones, parametros = ["estado != 'en_curso'"], []
+        if desde:
+            condiciones.append("inicio >= ?")
+            parametros.append(desde)
+        if hasta:
+            condiciones.append("inicio < ?")
+            parametros.append(hasta)
+        sql = (
+            "SELECT rpa, COUNT(*) AS ejecuciones, SUM(estado = 'error') AS errores, "
+            "MAX(CASE WHEN estado = 'error' THEN inicio END) AS ultimo_error, "
+            "AVG(duracion_s) AS duracion_media_s, AVG(navegacion_s) AS navegacion_media_s, "
+            "MAX(navegacion_s) AS navegacion_max_s "
+            "FROM ejecuciones WHERE " + " AND ".join(condiciones)
+            + " GROUP BY rpa ORDER BY errores DESC, rpa"
+        )
+        return [dict(f) for f in self._lectura().execute(sql, parametros)]
+
+    def listar_rpas(self) -> List[str]:
+        return [f[0] for f in self._lectura().execute("SELECT DISTINCT rpa FROM ejecuciones ORDER BY rpa")]
+
+historial_ejecuciones = HistorialEjecuciones()
+atexit.register(historial_ejecuciones.detener)
+
+def _formatear(valor, decimales: int = 1) -> str:
+    if valor is None:
+        return "-"
+    return f"{valor:.{decimales}f}" if isinstance(valor, float) else str(valor)
+
+def main(argumentos: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m core.execution_store",
+        description="Consulta el historial de ejecuciones del agente."
+    )
+    parser.add_argument("--rpa", help="Sólo este RPA")
+    parser.add_argument("--estado", choices=["exito", "error", "en_curso", "interrumpida"])
+    parser.add_argument("--desde", help="Fecha inicial incluida (AAAA-MM-DD[ HH:MM:SS])")
+    parser.add_argument("--hasta", help="Fecha final excluida (AAAA-MM-DD[ HH:MM:SS])")
+    parser.add_argument("--limite", type=int, default=20)
+    parser.add_argument("--cursor", help="Cursor impreso al final de la página anterior")
+    parser.add_argument("--rutas", metavar="ID", help="Detalle por ruta de una ejecución")
+    parser.add_argument("--resumen", action="store_true", help="Totales y errores por RPA")
+    parser.add_argument("--db", default=RUTA_HISTORIAL, help=argparse.SUPPRESS)
+    args = parser.parse_args(argumentos)
+
+    historial = HistorialEjecuciones(args.db)
+    if args.resumen:
+        for fila in historial.resumen_por_rpa(args.desde, args.hasta):
+            print(
+                f"{fila['rpa']}: {fila['ejecuciones']} ejecuciones, {fila['errores']} con error"
+                f" (último {fila['ultimo_error'] or '-'}), duración media {_formatear(fila['duracion_media_s'])}s,"
+                f" navegación media {_formatear(fila['navegacion_media_s'])}s (máx. {_formatear(fila['navegacion_max_s'])}s)"
+            )
+        return
+
+    if args.rutas:
+        for ruta in historial.obtener_rutas(args.rutas):
+            print(
+                f"{ruta['orden'] + 1}. {ruta['url']} → carga {_formatear(ruta['tiempo_carga'], 2)}s,"
+                f" TTFB {_formatear(ruta['ttfb_ms'], 0)} ms, load {_formatear(ruta['load_ms'], 0)} ms,"
+                f" LCP {_formatear(ruta['lcp_ms'], 0)} ms, {_formatear(ruta['bytes_transferidos'])} bytes"
+            )
+        return
+
+    filas, siguiente = historial.consultar_ejecuciones(
+        args.rpa, args.estado, args.desde, args.hasta, args.limite, args.cursor
+    )
+    for fila in filas:
+        texto = (
+            f"{fila['inicio']}  {fila['rpa']}  {fila['estado']}  {_formatear(fila['duracion_s'])}s"
+            f"  navegación {_formatear(fila['navegacion_s'])}s  correo {fila['correo'] or '-'}  [{fila['id']}]"
+        )
+        if fila["error"]:
+            texto += f"\n    {fila['error'].splitlines()[0]}"
+        print(texto)
+    if siguiente:
+        print(f"\nMás resultados: --cursor \"{siguiente}\"")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import shutil
+import zipfile
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from core.crypto_utils import descifrar_configuracion
+from core.log_handler import registrar_log
+from core.rpa_manager import DIRECTORIO_RPAS, RPAManager
+
+HILOS_VALIDACION = min(8, (os.cpu_count() or 2) * 2)
+TAMANO_BLOQUE_COPIA = 1024 * 1024
+
+def _agrupar_paquetes(archivos_por_carpeta: Dict[str, List[str]], nombre_raiz: str) -> List[Dict]:
+    # Un paquete es una pareja .enc/.key dentro de la misma carpeta. Si la carpeta
+    # tiene una sola pareja toma el nombre de la carpeta; si tiene varias, se
+    # emparejan por nombre de archivo.
+    paquetes = []
+    for carpeta, archivos in sorted(archivos_por_carpeta.items()):
+        encs = {os.path.splitext(os.path.basename(a))[0]: a for a in archivos if a.lower().endswith(".enc")}
+        keys = {os.path.splitext(os.path.basename(a))[0]: a for a in archivos if a.lower().endswith(".key")}
+        metas = [a for a in archivos if os.path.basename(a) == "meta.json"]
+        nombre_carpeta = os.path.basename(carpeta.rstrip("/\\")) or nombre_raiz
+
+        if len(encs) == 1 and len(keys) == 1:
+            paquetes.append({
+                "nombre": nombre_carpeta,
+                "enc": next(iter(encs.values())),
+                "key": next(iter(keys.values())),
+                "meta": metas[0] if metas else None
+            })
+            continue
+
+        for base, enc in encs.items():
+            paquetes.append({
+                "nombre": base,
+                "enc": enc,
+                "key": keys.get(base),
+                "meta": None
+            })
+    return paquetes
+
+def _descubrir_carpeta(origen: str) -> List[Dict]:
+    archivos_por_carpeta: Dict[str, List[str]] = {}
+    for raiz, _, archivos in os.walk(origen):
+        relevantes = [os.path.join(raiz, a) for a in archivos if a.lower().endswith((".enc", ".key")) or a == "meta.json"]
+        if relevantes:
+            archivos_por_carpeta[raiz] = relevantes
+    return _agrupar_paquetes(archivos_por_carpeta, os.path.basename(os.path.abspath(origen)))
+
+def _descubrir_zip(origen: str) -> List[Dict]:
+    archivos_por_carpeta: Dict[str, List[str]] = {}
+    with zipfile.ZipFile(origen) as zf:
+        for miembro in zf.namelist():
+            base = os.path.basename(miembro)
+            if base.lower().endswith((".enc", ".key")) or base == "meta.json":
+                archivos_por_carpeta.setdefault(os.path.dirname(miembro), []).append(miembro)
+    return _agrupar_paquetes(archivos_por_carpeta, os.path.splitext(os.path.basename(origen))[0])
+
+def _copiar(ruta: str, destino: str, zf: Optional[zipfile.ZipFile]):
+    fuente = zf.open(ruta) if zf else open(ruta, "rb")
+    with fuente as f_in, open(destino, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out, TAMANO_BLOQUE_COPIA)
+
+def _preparar_paquete(origen: str, paquete: Dict, staging: str) -> Dict:
+    # Copia el paquete a staging/<nombre> y comprueba que descifra.
+    zf = zipfile.ZipFile(origen) if zipfile.is_zipfile(origen) else None
+    carpeta = os.path.join(staging, paquete["nombre"])
+    try:
+        if not paquete["key"]:
+            raise ValueError("No se encontró el archivo .key correspondiente.")
+        os.makedirs(carpeta)
+        ruta_enc = os.path.join(carpeta, "rpa_config.enc")
+        ruta_key = os.path.join(carpeta, "rpa.key")
+        _copiar(paquete["enc"], ruta_enc, zf)
+        _copiar(paquete["key"], ruta_key, zf)
+
+        descripcion = ""
+        if paquete["meta"]:
+            ruta_meta = os.path.join(carpeta, "meta.origen.json")
+            _copiar(paquete["meta"], ruta_meta, zf)
+            with open(ruta_meta, "r", encoding="utf-8") as f:
+                descripcion = json.load(f).get("descripcion", "")
+            os.remove(ruta_meta)
+
+        descifrar_configuracion(ruta_enc, ruta_key, usar_cache=False)
+        return {**paquete, "carpeta": carpeta, "descripcion": descripcion, "error": None}
+    except Exception as e:
+        return {**paquete, "carpeta": carpeta, "error": str(e)}
+    finally:
+        if zf:
+            zf.close()
+
+def importar_lote(manager: RPAManager, origen: str) -> Dict:
+    resumen = {"importados": [], "duplicados": [], "fallidos": []}
+    if zipfile.is_zipfile(origen):
+        paquetes = _descubrir_zip(origen)
+    elif os.path.isdir(origen):
+        paquetes = _descubrir_carpeta(origen)
+    else:
+        raise ValueError(f"El origen no es una carpeta ni un archivo .zip: {origen}")
+
+    # Los duplicados (ya cargados o repetidos en el lote) no se copian.
+    pendientes = []
+    vistos = set()
+    for paquete in paquetes:
+        paquete["nombre"] = paquete["nombre"].strip().replace(" ", "_")
+        nombre = paquete["nombre"]
+        if nombre in vistos or nombre in manager.rpas or os.path.exists(os.path.join(DIRECTORIO_RPAS, nombre)):
+            resumen["duplicados"].append(nombre)
+            continue
+        vistos.add(nombre)
+        pendientes.append(paquete)
+
+    staging = tempfile.mkdtemp(prefix=".importacion_", dir=DIRECTORIO_RPAS)
+    try:
+        with ThreadPoolExecutor(max_workers=HILOS_VALIDACION, thread_name_prefix="RPAImport") as executor:
+            preparados = list(executor.map(lambda p: _preparar_paquete(origen, p, staging), pendientes))
+
+        for paquete in preparados:
+            nombre = paquete["nombre"]
+            if paquete["error"]:
+                resumen["fallidos"].append((nombre, paquete["error"]))
+                continue
+            try:
+                os.replace(paquete["carpeta"], os.path.join(DIRECTORIO_RPAS, nombre))
+                manager.registrar_rpa(nombre, paquete["descripcion"])
+                registrar_log(nombre, f"[OK] RPA importado desde {origen}.")
+                resumen["importados"].append(nombre)
+            except Exception as e:
+                resumen["fallidos"].append((nombre, str(e)))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    return resumen
+
+def formatear_resumen(resumen: Dict) -> str:
+    lineas = [
+        f"Importados: {len(resumen['importados'])}",
+        f"Duplicados omitidos: {len(resumen['duplicados'])}",
+        f"Fallidos: {len(resumen['fallidos'])}"
+    ]
+    if resumen["duplicados"]:
+        lineas.append("\nDuplicados: " + ", ".join(resumen["duplicados"]))
+    for nombre, error in resumen["fallidos"]:
+        lineas.append(f"[ERROR] {nombre}: {error}")
+    return "\n".join(lineas)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importa en lote RPAs (.enc + .key) desde una carpeta o un .zip.")
+    parser.add_argument("origen", help="Carpeta o archivo .zip con los paquetes de RPA")
+    args = parser.parse_args(argv)
+
+    manager = RPAManager()
+    manager.carga_completa.wait()
+    try:
+        resumen = importar_lote(manager, args.origen)
+    finally:
+        # El registro guarda los meta.json de forma diferida: se vuelcan antes de salir.
+        manager.metadatos.detener()
+    print(formatear_resumen(resumen))
+    return 1 if resumen["fallidos"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
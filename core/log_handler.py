@@ -1,14 +1,360 @@
 import os
+import gzip
+import mmap
 import time
-from typing import List
+import struct
+import queue
+import atexit
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
 
 DIRECTORIO_LOGS = os.path.join(os.getcwd(), "logs_rpa")
 os.makedirs(DIRECTORIO_LOGS, exist_ok=True)
 
+MAX_BYTES_LOG = int(float(os.environ.get("ESENDER_LOG_MAX_MB", "10")) * 1024 * 1024)
+MAX_HORAS_LOG = float(os.environ.get("ESENDER_LOG_ROTACION_HORAS", "24"))
+ROTADOS_CONSERVADOS = int(os.environ.get("ESENDER_LOG_ROTADOS", "5"))
+MAX_ARCHIVOS_ABIERTOS = 64
+MAX_LINEAS_LOTE = 1000
+BLOQUE_LECTURA_INVERSA = 8192
+
+# Línea con la que RPAManager abre cada ejecución; marca los límites de ejecución en el índice.
+MARCA_INICIO_EJECUCION = "RPA - Inicio de ejecución"
+REGISTRO_INDICE = struct.Struct("<Q")
+# Log de los hilos del agente que no pertenecen a ningún RPA (spool, navegadores, índices).
+LOG_AGENTE = "_agente"
+
 def _ruta_log(nombre_rpa: str) -> str:
     nombre_archivo = f"{nombre_rpa}.log"
     return os.path.join(DIRECTORIO_LOGS, nombre_archivo)
 
+def _ruta_indice(ruta_log: str) -> str:
+    # <nombre>.idx y no <nombre>.log.idx, para no confundirlo con un log rotado. El
+    # de un rotado <nombre>.log.<fecha>[.gz] es <nombre>.idx.<fecha>, por lo mismo.
+    if ruta_log.endswith(".log"):
+        return ruta_log[:-4] + ".idx"
+    if ruta_log.endswith(".gz"):
+        ruta_log = ruta_log[:-3]
+    carpeta, archivo = os.path.split(ruta_log)
+    base, separador, sello = archivo.rpartition(".log.")
+    if separador:
+        return os.path.join(carpeta, f"{base}.idx.{sello}")
+    return ruta_log + ".idx"
+
+def _segmentos_rotados(ruta_log: str) -> List[str]:
+    # Rotados de un log, del más reciente al más antiguo, sin la extensión .gz
+    # (durante la compresión pueden coexistir <rotado> y <rotado>.gz).
+    carpeta, base = os.path.split(ruta_log)
+    try:
+        archivos = os.listdir(carpeta)
+    except OSError:
+        return []
+    segmentos = {a[:-3] if a.endswith(".gz") else a for a in archivos if a.startswith(base + ".") and not a.endswith(".tmp")}
+    return [os.path.join(carpeta, s) for s in sorted(segmentos, reverse=True)]
+
+def _abrir_segmento(segmento: str):
+    # El log actual o un rotado, comprimido o no.
+    try:
+        return open(segmento, "rb")
+    except FileNotFoundError:
+        if segmento.endswith(".log"):
+            raise
+        return gzip.open(segmento + ".gz", "rb")
+
+def _reconstruir_indice(ruta_log: str):
+    # Recorre el log una vez para recuperar un índice ausente o desfasado.
+    offsets = []
+    posicion = 0
+    marca = MARCA_INICIO_EJECUCION.encode("utf-8")
+    with open(ruta_log, "rb") as f:
+        for linea in f:
+            if marca in linea:
+                offsets.append(posicion)
+            posicion += len(linea)
+    with open(_ruta_indice(ruta_log), "wb") as f:
+        f.write(b"".join(REGISTRO_INDICE.pack(o) for o in offsets))
+
+def _indice_valido(ruta_log: str, tamano_log: int) -> bool:
+    try:
+        tamano = os.path.getsize(_ruta_indice(ruta_log))
+    except OSError:
+        return tamano_log == 0
+    if tamano % REGISTRO_INDICE.size:
+        return False
+    if tamano == 0:
+        return True
+    with open(_ruta_indice(ruta_log), "rb") as f:
+        f.seek(-REGISTRO_INDICE.size, os.SEEK_END)
+        return REGISTRO_INDICE.unpack(f.read())[0] < tamano_log
+
+def _inicio_log(ruta: str, tamano: int) -> float:
+    # Antigüedad de un log para rotarlo: la fecha de su primera línea, que no cambia
+    # al reabrirlo (reinicio, o expulsado de los handles abiertos). Si no se puede
+    # leer, la fecha de creación del archivo.
+    if tamano == 0:
+        return time.time()
+    try:
+        with open(ruta, "rb") as f:
+            primera = f.read(21).decode("utf-8", errors="replace")
+        return time.mktime(time.strptime(primera[1:20], "%Y-%m-%d %H:%M:%S"))
+    except (OSError, ValueError):
+        st = os.stat(ruta)
+        return getattr(st, "st_birthtime", st.st_ctime)
+
+# Cada log lleva al lado un <nombre>.idx con el offset (uint64) de cada línea
+# MARCA_INICIO_EJECUCION, escrito por el mismo hilo que escribe el log.
+class _Archivo:
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.handle = open(ruta, "ab")
+        self.tamano = self.handle.tell()
+        self.inodo = os.fstat(self.handle.fileno()).st_ino
+        if not _indice_valido(ruta, self.tamano):
+            _reconstruir_indice(ruta)
+        self.indice = open(_ruta_indice(ruta), "ab")
+        self.abierto = _inicio_log(ruta, self.tamano)
+
+    def close(self):
+        self.handle.close()
+        self.indice.close()
+
+# Escritor de logs en segundo plano. registrar_log sólo encola la línea; un
+# hilo la escribe junto con todas las que haya pendientes, agrupadas por
+# archivo y con un handle abierto por RPA (como mucho MAX_ARCHIVOS_ABIERTOS).
+# Cuando un log supera MAX_BYTES_LOG o lleva MAX_HORAS_LOG abierto se rota a
+# <nombre>.log.<fecha>.gz, conservando los ROTADOS_CONSERVADOS más recientes.
+# Lo pendiente se escribe al salir (atexit) o al llamar a detener(); lo que
+# llegue después se escribe desde el propio hilo que llama, por el mismo camino
+# (índice, tamaño y rotación) y sin dejar el archivo abierto.
+class EscritorLogs:
+
+    def __init__(self, max_bytes: int = MAX_BYTES_LOG, max_horas: float = MAX_HORAS_LOG,
+                 rotados: int = ROTADOS_CONSERVADOS):
+        self.max_bytes = max_bytes
+        self.max_segundos = max_horas * 3600 if max_horas > 0 else None
+        self.rotados = rotados
+        self._cola: "queue.Queue" = queue.Queue()
+        self._archivos: "OrderedDict[str, _Archivo]" = OrderedDict()
+        self._hilo: Optional[threading.Thread] = None
+        self._compresiones: List[threading.Thread] = []
+        self._observadores: List[Callable[[str], None]] = []
+        self._consumidores: List[Tuple[Callable, Callable]] = []
+        self._lock = threading.Lock()
+        self._lock_directo = threading.Lock()
+        self._detenido = False
+        self.metricas = {"lineas": 0, "lotes": 0, "rotaciones": 0}
+
+    def escribir(self, ruta: str, linea: str):
+        # Con el lock: una línea encolada antes de detener() siempre llega al hilo.
+        with self._lock:
+            if not self._detenido:
+                if self._hilo is None:
+                    self._hilo = threading.Thread(target=self._trabajar, name="EscritorLogs", daemon=True)
+                    self._hilo.start()
+                self._cola.put((ruta, linea))
+                return
+        # Tras detener() (p. ej. durante el cierre) se escribe directamente.
+        self._escribir_directo(ruta, [linea])
+
+    def _escribir_directo(self, ruta: str, lineas: List[str]):
+        hilo = self._hilo
+        if hilo is not None and hilo is not threading.current_thread():
+            # detener() en curso: primero termina el hilo, que comparte los handles.
+            hilo.join(10.0)
+        with self._lock_directo:
+            self._volcar(OrderedDict([(ruta, lineas)]))
+            self._cerrar(ruta)
+
+    def _trabajar(self):
+        while True:
+            lote = [self._cola.get()]
+            while len(lote) < MAX_LINEAS_LOTE:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if not self._procesar(lote):
+                    return
+            finally:
+                for _ in lote:
+                    self._cola.task_done()
+
+    def _procesar(self, lote) -> bool:
+        # Agrupa las líneas por archivo respetando el orden; las órdenes
+        # (cerrar, detener) cortan el lote para aplicarse en su sitio.
+        pendientes: Dict[str, List[str]] = OrderedDict()
+        continuar = True
+        for ruta, dato in lote:
+            if ruta is None:
+                self._volcar(pendientes)
+                pendientes = OrderedDict()
+                orden, argumento, hecho = dato
+                if orden == "cerrar":
+                    self._cerrar(argumento)
+                elif orden == "detener":
+                    for abierta in list(self._archivos):
+                        self._cerrar(abierta)
+                    continuar = False
+                hecho.set()
+            else:
+                pendientes.setdefault(ruta, []).append(dato)
+        self._volcar(pendientes)
+        self.metricas["lotes"] += 1
+        return continuar
+
+    def _volcar(self, pendientes: Dict[str, List[str]]):
+        for ruta, lineas in pendientes.items():
+            try:
+                archivo = self._abrir(ruta)
+                datos = []
+                inicios = []
+                offset = archivo.tamano
+                for linea in lineas:
+                    codificada = linea.encode("utf-8")
+                    if MARCA_INICIO_EJECUCION in linea:
+                        inicios.append(REGISTRO_INDICE.pack(offset))
+                    datos.append(codificada)
+                    offset += len(codificada)
+                archivo.handle.write(b"".join(datos))
+                archivo.handle.flush()
+                if inicios:
+                    archivo.indice.write(b"".join(inicios))
+                    archivo.indice.flush()
+                for al_escribir, _ in self._consumidores:
+                    al_escribir(ruta, archivo.inodo, archivo.tamano, offset, lineas)
+                archivo.tamano = offset
+                self.metricas["lineas"] += len(lineas)
+                if self._debe_rotar(archivo):
+                    self._rotar(archivo)
+            except Exception as e:
+                print(f"[ERROR] No se pudo registrar log en {ruta}: {e}")
+            for observador in self._observadores:
+                observador(ruta)
+
+    def agregar_observador(self, observador: Callable[[str], None]):
+        # observador(ruta) se llama desde el hilo escritor tras cada escritura: debe ser inmediato.
+        self._observadores.append(observador)
+
+    def agregar_consumidor(self, al_escribir: Callable[[str, int, int, int, List[str]], None],
+                           al_mover: Callable[[str, Optional[str]], None]):
+        # al_escribir(ruta, inodo, inicio, fin, lineas) recibe cada lote con los offsets en
+        # los que quedó escrito; al_mover(ruta, destino) avisa de que el log se rotó a
+        # `destino` o, con None, de que se borró. Se llaman en el orden de escritura y
+        # casi siempre desde el hilo escritor: deben ser inmediatos.
+        self._consumidores.append((al_escribir, al_mover))
+
+    def log_borrado(self, ruta: str):
+        for _, al_mover in self._consumidores:
+            al_mover(ruta, None)
+
+    def _abrir(self, ruta: str) -> _Archivo:
+        archivo = self._archivos.get(ruta)
+        if archivo is None:
+            archivo = self._archivos[ruta] = _Archivo(ruta)
+            while len(self._archivos) > MAX_ARCHIVOS_ABIERTOS:
+                _, antiguo = self._archivos.popitem(last=False)
+                antiguo.close()
+        else:
+            self._archivos.move_to_end(ruta)
+        return archivo
+
+    def _cerrar(self, ruta: str):
+        archivo = self._archivos.pop(ruta, None)
+        if archivo:
+            archivo.close()
+
+    def _debe_rotar(self, archivo: _Archivo) -> bool:
+        if self.max_bytes and archivo.tamano >= self.max_bytes:
+            return True
+        return self.max_segundos is not None and time.time() - archivo.abierto >= self.max_segundos
+
+    def _rotar(self, archivo: _Archivo):
+        self._cerrar(archivo.ruta)
+        ahora = time.time()
+        base = f"{archivo.ruta}.{time.strftime('%Y%m%d%H%M%S', time.localtime(ahora))}{int(ahora * 1000) % 1000:03d}"
+        destino, secuencia = base, 0
+        while os.path.exists(destino) or os.path.exists(destino + ".gz"):
+            secuencia += 1
+            destino = f"{base}_{secuencia:02d}"
+        os.replace(archivo.ruta, destino)
+        # El índice acompaña al rotado: una ejecución que siga en curso empieza allí
+        # y obtener_ultimas_ejecuciones la completa con el principio del log nuevo.
+        try:
+            os.replace(_ruta_indice(archivo.ruta), _ruta_indice(destino))
+        except FileNotFoundError:
+            pass
+        for _, al_mover in self._consumidores:
+            al_mover(archivo.ruta, destino)
+        # El log nuevo se crea ya (vacío y con índice vacío) para que el RPA no
+        # desaparezca de los listados hasta la siguiente línea.
+        self._abrir(archivo.ruta)
+        self.metricas["rotaciones"] += 1
+        # La compresión va en otro hilo para no frenar la escritura.
+        hilo = threading.Thread(target=self._comprimir, args=(archivo.ruta, destino), daemon=True)
+        self._compresiones = [h for h in self._compresiones if h.is_alive()] + [hilo]
+        hilo.start()
+
+    def _comprimir(self, ruta_log: str, rotado: str):
+        try:
+            with open(rotado, "rb") as origen, gzip.open(rotado + ".gz.tmp", "wb") as destino:
+                shutil.copyfileobj(origen, destino)
+            os.replace(rotado + ".gz.tmp", rotado + ".gz")
+            os.remove(rotado)
+        except Exception as e:
+            print(f"[WARN] No se pudo comprimir {rotado}: {e}")
+            return
+        carpeta, base = os.path.split(ruta_log)
+        comprimidos = sorted(a for a in os.listdir(carpeta) if a.startswith(base + ".") and a.endswith(".gz"))
+        for sobrante in comprimidos[:-self.rotados] if self.rotados else comprimidos:
+            for archivo in (os.path.join(carpeta, sobrante), _ruta_indice(os.path.join(carpeta, sobrante))):
+                try:
+                    os.remove(archivo)
+                except OSError:
+                    pass
+
+    def _orden(self, orden: str, argumento=None, timeout: float = 10.0):
+        if self._hilo is None:
+            return
+        hecho = threading.Event()
+        self._cola.put((None, (orden, argumento, hecho)))
+        hecho.wait(timeout)
+
+    def cerrar_archivo(self, ruta: str):
+        # Escribe lo pendiente y suelta el handle (necesario antes de borrar el archivo en Windows).
+        self._orden("cerrar", ruta)
+
+    def vaciar(self):
+        if self._hilo is not None:
+            self._cola.join()
+
+    def detener(self, timeout: float = 10.0):
+        with self._lock:
+            self._detenido = True
+        if self._hilo is None:
+            return
+        self._orden("detener", timeout=timeout)
+        self._hilo.join(timeout)
+        self._hilo = None
+        for hilo in self._compresiones:
+            hilo.join(timeout)
+        # Lo que el hilo no llegó a escribir antes del timeout.
+        pendientes: Dict[str, List[str]] = OrderedDict()
+        while True:
+            try:
+                ruta, linea = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if ruta is not None:
+                pendientes.setdefault(ruta, []).append(linea)
+        for ruta, lineas in pendientes.items():
+            self._escribir_directo(ruta, lineas)
+
+escritor_logs = EscritorLogs()
+atexit.register(escritor_logs.detener)
+
 def registrar_log(nombre_rpa: str, mensaje: str):
     if not nombre_rpa or not nombre_rpa.strip():
         return
@@ -18,8 +364,7 @@ def registrar_log(nombre_rpa: str, mensaje: str):
     ruta = _ruta_log(nombre_rpa.strip())
 
     try:
-        with open(ruta, "a", encoding="utf-8") as f:
-            f.write(linea_log)
+        escritor_logs.escribir(ruta, linea_log)
     except Exception as e:
         print(f"[ERROR] No se pudo registrar log para {nombre_rpa}: {e}")
 
@@ -31,45 +376,158 @@ def obtener_log_completo(nombre_rpa: str) -> List[str]:
     except Exception:
         return [f"[ERROR] No se pudo leer el log de {nombre_rpa}."]
 
-def obtener_resumen_logs(cantidad_lineas: int = 1) -> List[str]:
-    resumen = []
+def leer_ultimas_lineas(ruta: str, cantidad: int = 1, usar_mmap: bool = False) -> List[str]:
+    # Lee hacia atrás desde el final: el coste depende de `cantidad`, no del tamaño del log.
+    if cantidad <= 0:
+        return []
+    try:
+        with open(ruta, "rb") as f:
+            tamano = os.fstat(f.fileno()).st_size
+            if tamano == 0:
+                return []
+            if usar_mmap:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                    fin = tamano - 1 if mapa[tamano - 1:tamano] == b"\n" else tamano
+                    inicio = fin
+                    for _ in range(cantidad):
+                        inicio = mapa.rfind(b"\n", 0, inicio)
+                        if inicio < 0:
+                            break
+                    datos = mapa[inicio + 1:tamano]
+            else:
+                datos = b""
+                posicion = tamano
+                while posicion > 0 and datos.count(b"\n", 0, len(datos) - 1) < cantidad:
+                    paso = min(BLOQUE_LECTURA_INVERSA, posicion)
+                    posicion -= paso
+                    f.seek(posicion)
+                    datos = f.read(paso) + datos
+    except OSError:
+        return []
+    lineas = datos.decode("utf-8", errors="replace").splitlines()
+    return lineas[-cantidad:]
 
+def _leer_rango(ruta: str, inicio: int, fin: Optional[int] = None) -> List[str]:
+    with _abrir_segmento(ruta) as f:
+        f.seek(inicio)
+        datos = f.read() if fin is None else f.read(fin - inicio)
+    return datos.decode("utf-8", errors="replace").splitlines()
+
+def _leer_offsets(ruta: str, cantidad: int) -> Tuple[List[int], bool]:
+    # Los últimos `cantidad` inicios de ejecución del índice y si son todos los que tiene.
+    with open(_ruta_indice(ruta), "rb") as f:
+        tamano = os.fstat(f.fileno()).st_size
+        total = tamano // REGISTRO_INDICE.size
+        registros = min(cantidad, total)
+        f.seek((total - registros) * REGISTRO_INDICE.size)
+        datos = f.read(registros * REGISTRO_INDICE.size)
+    return [o for (o,) in REGISTRO_INDICE.iter_unpack(datos)], registros == total
+
+def obtener_ultimas_ejecuciones(nombre_rpa: str, cantidad: int = 1) -> List[List[str]]:
+    # Las líneas de las últimas `cantidad` ejecuciones, de la más antigua a la más reciente.
+    # Se recorren el log actual y los rotados hacia atrás: lo que un segmento tiene
+    # antes de su primer inicio es el final de la última ejecución del anterior.
+    ruta = _ruta_log(nombre_rpa)
+    ejecuciones: List[List[str]] = []
+    continuacion: List[str] = []
+    for segmento in [ruta] + _segmentos_rotados(ruta):
+        faltan = cantidad - len(ejecuciones)
+        if faltan <= 0:
+            break
+        try:
+            offsets, completos = _leer_offsets(segmento, faltan)
+            if not offsets:
+                continuacion = _leer_rango(segmento, 0) + continuacion
+                continue
+            tramos = [_leer_rango(segmento, o, fin) for o, fin in zip(offsets, offsets[1:] + [None])]
+            tramos[-1] += continuacion
+            ejecuciones = tramos + ejecuciones
+            if not completos or len(ejecuciones) >= cantidad:
+                break
+            continuacion = _leer_rango(segmento, 0, offsets[0])
+        except (OSError, EOFError):
+            # Sin log actual todavía se sigue por los rotados; un rotado sin índice corta el recorrido.
+            if segmento != ruta:
+                break
+    return ejecuciones
+
+def obtener_estado_ultima_ejecucion(nombre_rpa: str) -> Dict:
+    ejecuciones = obtener_ultimas_ejecuciones(nombre_rpa, 1)
+    if not ejecuciones:
+        return {"estado": "sin_ejecuciones", "inicio": None, "ultima_linea": None}
+    lineas = ejecuciones[0]
+    texto = "\n".join(lineas)
+    if "[SUCCESS]" in texto:
+        estado = "exito"
+    elif "RPA - Ejecución finalizada" in texto:
+        estado = "error"
+    else:
+        estado = "en_curso"
+    return {
+        "estado": estado,
+        "inicio": lineas[0][1:20] if lineas and lineas[0].startswith("[") else None,
+        "ultima_linea": lineas[-1] if lineas else None
+    }
+
+def _nombres_con_log() -> List[str]:
+    # RPAs con log actual o sólo con rotados (<nombre>.log.<fecha>[.gz]).
+    nombres = set()
     for archivo in os.listdir(DIRECTORIO_LOGS):
         if archivo.endswith(".log"):
-            nombre_rpa = archivo[:-4]
-            ruta = os.path.join(DIRECTORIO_LOGS, archivo)
+            nombres.add(archivo[:-4])
+        elif ".log." in archivo and not archivo.endswith(".tmp"):
+            nombres.add(archivo.rpartition(".log.")[0])
+    return sorted(nombres)
 
-            try:
-                with open(ruta, "r", encoding="utf-8") as f:
-                    lineas = f.readlines()
-                    if lineas:
-                        ultimas = lineas[-cantidad_lineas:]
-                        resumen.append(f"{nombre_rpa}: {ultimas[-1].strip()}")
-                    else:
-                        resumen.append(f"{nombre_rpa}: [Sin registros]")
-            except Exception as e:
-                resumen.append(f"{nombre_rpa}: [Error al leer log] {e}")
+def _ultimas_lineas_segmento(segmento: str, cantidad: int) -> List[str]:
+    if os.path.exists(segmento):
+        return leer_ultimas_lineas(segmento, cantidad)
+    try:
+        with gzip.open(segmento + ".gz", "rb") as f:
+            return f.read().decode("utf-8", errors="replace").splitlines()[-cantidad:]
+    except (OSError, EOFError):
+        return []
+
+def obtener_resumen_logs(cantidad_lineas: int = 1) -> List[str]:
+    resumen = []
+
+    for nombre_rpa in _nombres_con_log():
+        ruta = _ruta_log(nombre_rpa)
+        ultimas = leer_ultimas_lineas(ruta, cantidad_lineas)
+        if not ultimas:
+            # Recién rotado: la última línea está en el rotado más reciente.
+            rotados = _segmentos_rotados(ruta)
+            ultimas = _ultimas_lineas_segmento(rotados[0], cantidad_lineas) if rotados else []
+        if ultimas:
+            resumen.append(f"{nombre_rpa}: {ultimas[-1].strip()}")
+        else:
+            resumen.append(f"{nombre_rpa}: [Sin registros]")
 
     return resumen
 
+def _archivos_log(ruta: str) -> List[str]:
+    archivos = [ruta, _ruta_indice(ruta)]
+    for segmento in _segmentos_rotados(ruta):
+        archivos += [segmento, segmento + ".gz", _ruta_indice(segmento)]
+    return archivos
+
 def borrar_log_rpa(nombre_rpa: str):
     ruta = _ruta_log(nombre_rpa)
+    escritor_logs.cerrar_archivo(ruta)
     try:
-        if os.path.exists(ruta):
-            os.remove(ruta)
+        for archivo in _archivos_log(ruta):
+            if os.path.exists(archivo):
+                os.remove(archivo)
+        escritor_logs.log_borrado(ruta)
     except Exception as e:
         print(f"[ERROR] No se pudo borrar el log de {nombre_rpa}: {e}")
 
 def borrar_todos_los_logs():
-    for archivo in os.listdir(DIRECTORIO_LOGS):
-        if archivo.endswith(".log"):
-            try:
-                os.remove(os.path.join(DIRECTORIO_LOGS, archivo))
-            except Exception as e:
-                print(f"[ERROR] No se pudo borrar {archivo}: {e}")
+    for nombre_rpa in _nombres_con_log():
+        borrar_log_rpa(nombre_rpa)
 
 def obtener_total_logs_rpa() -> int:
     return len(listar_logs_disponibles())
 
 def listar_logs_disponibles() -> List[str]:
-    return [archivo[:-4] for archivo in os.listdir(DIRECTORIO_LOGS) if archivo.endswith(".log")]
\ No newline at end of file
+    return _nombres_con_log()
\ No newline at end of file
@@ -0,0 +1,417 @@
+import os
+import re
+import gzip
+import time
+import queue
+import sqlite3
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from core.log_handler import DIRECTORIO_LOGS, LOG_AGENTE, escritor_logs, registrar_log
+from core.execution_store import DIRECTORIO_HISTORIAL
+
+RUTA_INDICE_LOGS = os.path.join(DIRECTORIO_HISTORIAL, "logs.db")
+
+DIAS_CONSERVADOS = int(os.environ.get("ESENDER_BUSQUEDA_DIAS", "180"))
+MAX_LINEAS_LOTE = 5000
+MAX_FUENTES_MEZCLA = 256
+LIMITE_RESULTADOS = 200
+INTERVALO_PODA_S = 24 * 3600
+# Etiqueta del mensaje → severidad guardada (una palabra, para poder filtrarla en FTS).
+SEVERIDADES = {"[ERROR]": "ERROR", "[WARN]": "WARN", "[!]": "AVISO"}
+
+PATRON_REGISTRO = re.compile(r"\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] ?(.*)", re.S)
+PATRON_INICIO = re.compile(rb"\[\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\]")
+PATRON_TERMINO = re.compile(r"\w+\*?")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS lineas (
+    id INTEGER PRIMARY KEY,
+    rpa TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    severidad TEXT NOT NULL,
+    mensaje TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_lineas_fecha ON lineas (fecha);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS lineas_fts USING fts5(
+    rpa, severidad, mensaje, content='lineas', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS lineas_ai AFTER INSERT ON lineas BEGIN
+    INSERT INTO lineas_fts (rowid, rpa, severidad, mensaje) VALUES (new.id, new.rpa, new.severidad, new.mensaje);
+END;
+CREATE TRIGGER IF NOT EXISTS lineas_ad AFTER DELETE ON lineas BEGIN
+    INSERT INTO lineas_fts (lineas_fts, rowid, rpa, severidad, mensaje)
+    VALUES ('delete', old.id, old.rpa, old.severidad, old.mensaje);
+END;
+
+CREATE TABLE IF NOT EXISTS archivos (
+    nombre TEXT PRIMARY KEY,
+    inodo INTEGER NOT NULL,
+    offset INTEGER NOT NULL
+);
+"""
+
+def _severidad(mensaje: str) -> str:
+    for etiqueta, severidad in SEVERIDADES.items():
+        if etiqueta in mensaje:
+            return severidad
+    return "INFO"
+
+def _fila(rpa: str, registro: str) -> Optional[Tuple]:
+    registro = registro.rstrip("\r\n")
+    coincidencia = PATRON_REGISTRO.match(registro)
+    if coincidencia:
+        fecha, mensaje = coincidencia.groups()
+    elif registro.strip():
+        fecha, mensaje = "", registro
+    else:
+        return None
+    return rpa, fecha, _severidad(mensaje), mensaje
+
+def _registros(f, limite: Optional[int] = None) -> Iterator[str]:
+    # Recorre un log (o un .gz) por líneas y une las de continuación (p. ej. un
+    # traceback) al registro al que pertenecen.
+    leidos = 0
+    actual: List[bytes] = []
+    for linea in f:
+        if limite is not None and leidos >= limite:
+            break
+        leidos += len(linea)
+        if PATRON_INICIO.match(linea) and actual:
+            yield b"".join(actual).decode("utf-8", errors="replace")
+            actual = []
+        actual.append(linea)
+    if actual:
+        yield b"".join(actual).decode("utf-8", errors="replace")
+
+def _frase(texto: str) -> str:
+    return '"' + texto.replace('"', '""') + '"'
+
+def _expresion_fts(texto: str, rpa: Optional[str], severidad: Optional[str]) -> Optional[str]:
+    # Palabras exactas y todas obligatorias; con * al final se busca por prefijo
+    # (más lento con prefijos muy comunes): "smtp time*" → mensaje : ("smtp" "time"*).
+    # El RPA y la severidad también se filtran dentro de FTS, que cruza las listas
+    # de coincidencias en lugar de recorrer todas las líneas del texto buscado.
+    partes = []
+    terminos = PATRON_TERMINO.findall(texto)
+    if terminos:
+        partes.append("mensaje : (" + " ".join(_frase(t.rstrip("*")) + ("*" if t.endswith("*") else "") for t in terminos) + ")")
+    if rpa:
+        partes.append(f"rpa : {_frase(rpa)}")
+    if severidad:
+        partes.append(f"severidad : {_frase(severidad)}")
+    return " AND ".join(partes) if partes else None
+
+# Índice de búsqueda de texto completo sobre los logs (historial_rpa/logs.db,
+# SQLite FTS5). Se alimenta del escritor de logs: cada lote escrito llega con el
+# inodo del archivo y los offsets en que quedó, y un hilo lo indexa en una
+# transacción junto con el offset hasta el que ese archivo está indexado. Así
+# nada se indexa dos veces y lo escrito con el índice parado (otro proceso, o
+# el agente cerrado) se lee del disco en cuanto se detecta el hueco. Al arrancar
+# se indexa lo que haya en disco sin indexar (rotados incluidos), mezclando los
+# archivos por fecha y antes que cualquier línea nueva: el id de cada línea sigue
+# el orden cronológico y las búsquedas devuelven lo más reciente primero sin
+# tener que ordenar. El índice conserva DIAS_CONSERVADOS días aunque los logs
+# rotados ya se hayan borrado.
+class IndiceLogs:
+
+    def __init__(self, ruta: str = RUTA_INDICE_LOGS, directorio: str = DIRECTORIO_LOGS,
+                 dias: int = DIAS_CONSERVADOS):
+        self.ruta = ruta
+        self.directorio = directorio
+        self.dias = dias
+        self._cola: "queue.Queue" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._detenido = False
+        self._archivos: Dict[str, Tuple[int, int]] = {}
+        self.metricas = {"lineas_indexadas": 0, "lotes": 0, "indexando_historico": False, "ultimo_error": None}
+
+    def _conectar(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        conexion = sqlite3.connect(self.ruta, timeout=10)
+        conexion.row_factory = sqlite3.Row
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute("PRAGMA synchronous=NORMAL")
+        conexion.executescript(ESQUEMA)
+        return conexion
+
+    def _lectura(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = self._local.conexion = self._conectar()
+        return conexion
+
+    def iniciar(self):
+        with self._lock:
+            if self._hilo is not None or self._detenido:
+                return
+            # El histórico va primero en la cola, delante de cualquier lote nuevo.
+            self.metricas["indexando_historico"] = True
+            self._cola.put(("historico", None))
+            escritor_logs.agregar_consumidor(self._al_escribir, self._al_mover)
+            self._hilo = threading.Thread(target=self._trabajar, name="IndiceLogs", daemon=True)
+            self._hilo.start()
+
+    def _al_escribir(self, ruta: str, inodo: int, inicio: int, fin: int, lineas: List[str]):
+        if not self._detenido:
+            self._cola.put(("lote", (ruta, inodo, inicio, fin, lineas)))
+
+    def _al_mover(self, ruta: str, destino: Optional[str]):
+        if not self._detenido:
+            self._cola.put(("movido", (ruta, destino)))
+
+    # ---- Hilo indexador ----
+
+    def _avisar(self, mensaje: str):
+        # El aviso también se indexa: repetir el mismo error en cada lote lo
+        # realimentaría sin fin, así que sólo se registra cuando cambia.
+        if mensaje != self.metricas["ultimo_error"]:
+            self.metricas["ultimo_error"] = mensaje
+            registrar_log(LOG_AGENTE, mensaje)
+
+    def _trabajar(self):
+        conexion = self._conectar()
+        conexion.execute("PRAGMA cache_size = -65536")
+        self._archivos = {f["nombre"]: (f["inodo"], f["offset"]) for f in conexion.execute("SELECT * FROM archivos")}
+        proxima_poda = time.monotonic()
+        while True:
+            espera = max(proxima_poda - time.monotonic(), 0)
+            try:
+                eventos = [self._cola.get(timeout=espera)]
+            except queue.Empty:
+                self._podar(conexion)
+                proxima_poda = time.monotonic() + INTERVALO_PODA_S
+                continue
+            while len(eventos) < MAX_LINEAS_LOTE:
+                try:
+                    eventos.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            continuar = True
+            try:
+                with conexion:
+                    for tipo, datos in eventos:
+                        if tipo == "lote":
+                            self._indexar_lote(conexion, *datos)
+                        elif tipo == "movido":
+                            self._movido(conexion, *datos)
+                        elif tipo == "historico":
+                            self._indexar_historico(conexion)
+                        elif tipo == "detener":
+                            continuar = False
+                self.metricas["lotes"] += 1
+            except Exception as e:
+                self._avisar(f"[ERROR] No se pudo actualizar el índice de búsqueda de logs: {e}")
+                # Lo que quedó sin confirmar se relee del disco al detectar el hueco.
+                self._archivos = {f["nombre"]: (f["inodo"], f["offset"]) for f in conexion.execute("SELECT * FROM archivos")}
+            finally:
+                for _ in eventos:
+                    self._cola.task_done()
+            if not continuar:
+                conexion.close()
+                return
+
+    def _insertar(self, conexion: sqlite3.Connection, registros: Iterable[Tuple[str, str]]):
+        # registros: pares (rpa, registro); se insertan por bloques de MAX_LINEAS_LOTE.
+        filas = []
+        for rpa, registro in registros:
+            fila = _fila(rpa, registro)
+            if fila:
+                filas.append(fila)
+            if len(filas) >= MAX_LINEAS_LOTE:
+                conexion.executemany("INSERT INTO lineas (rpa, fecha, severidad, mensaje) VALUES (?, ?, ?, ?)", filas)
+                self.metricas["lineas_indexadas"] += len(filas)
+                filas = []
+        conexion.executemany("INSERT INTO lineas (rpa, fecha, severidad, mensaje) VALUES (?, ?, ?, ?)", filas)
+        self.metricas["lineas_indexadas"] += len(filas)
+
+    def _guardar_posicion(self, conexion: sqlite3.Connection, nombre: str, inodo: int, offset: int):
+        self._archivos[nombre] = (inodo, offset)
+        conexion.execute("INSERT OR REPLACE INTO archivos (nombre, inodo, offset) VALUES (?, ?, ?)", (nombre, inodo, offset))
+
+    def _leer(self, ruta: str, inodo: Optional[int], desde: int, hasta: Optional[int]) -> Iterator[Tuple[str, str, str]]:
+        # (fecha, rpa, registro) de los bytes [desde, hasta) del archivo, si sigue siendo el mismo.
+        rpa = os.path.basename(ruta).split(".log")[0]
+        fecha = ""
+        try:
+            abrir = gzip.open if ruta.endswith(".gz") else open
+            with abrir(ruta, "rb") as f:
+                if inodo is not None and os.fstat(f.fileno()).st_ino != inodo:
+                    return
+                f.seek(desde)
+                for registro in _registros(f, None if hasta is None else hasta - desde):
+                    if PATRON_REGISTRO.match(registro):
+                        fecha = registro[1:20]
+                    yield fecha, rpa, registro
+        except (OSError, EOFError) as e:
+            self._avisar(f"[WARN] No se pudo indexar {ruta}: {e}")
+
+    def _leer_hueco(self, conexion: sqlite3.Connection, ruta: str, inodo: Optional[int], desde: int, hasta: Optional[int]):
+        self._insertar(conexion, ((rpa, registro) for _, rpa, registro in self._leer(ruta, inodo, desde, hasta)))
+
+    def _indexar_lote(self, conexion: sqlite3.Connection, ruta: str, inodo: int, inicio: int, fin: int, lineas: List[str]):
+        nombre = os.path.basename(ruta)
+        inodo_indexado, offset = self._archivos.get(nombre, (None, 0))
+        if inodo_indexado != inodo:
+            offset = 0
+        if fin <= offset:
+            return
+        if inicio > offset:
+            self._leer_hueco(conexion, ruta, inodo, offset, inicio)
+        elif inicio < offset:
+            # Parte del lote ya se leyó de disco: se salta por bytes.
+            posicion, pendientes = inicio, []
+            for linea in lineas:
+                if posicion >= offset:
+                    pendientes.append(linea)
+                posicion += len(linea.encode("utf-8"))
+            lineas = pendientes
+        self._insertar(conexion, ((nombre[:-4], linea) for linea in lineas))
+        self._guardar_posicion(conexion, nombre, inodo, fin)
+
+    def _movido(self, conexion: sqlite3.Connection, ruta: str, destino: Optional[str]):
+        nombre = os.path.basename(ruta)
+        inodo, offset = self._archivos.get(nombre, (None, 0))
+        if destino is not None:
+            # Lo que falte del log rotado (sólo si el histórico no llegó a leerlo).
+            rotado = destino if os.path.exists(destino) else destino + ".gz"
+            if inodo is not None and os.path.exists(rotado):
+                tamano = os.path.getsize(destino) if rotado == destino else None
+                if tamano is None or tamano > offset:
+                    self._leer_hueco(conexion, rotado, inodo if rotado == destino else None, offset, tamano)
+            self._guardar_posicion(conexion, os.path.basename(destino), 0, -1)
+        self._guardar_posicion(conexion, nombre, 0, 0)
+
+    def _indexar_historico(self, conexion: sqlite3.Connection):
+        # Una fuente por RPA (sus rotados pendientes y luego lo no indexado del log
+        # actual), mezcladas por fecha para que los ids queden en orden cronológico.
+        try:
+            archivos = sorted(os.listdir(self.directorio))
+        except OSError:
+            archivos = []
+        fuentes, posiciones = [], []
+        for archivo in archivos:
+            if not archivo.endswith(".log"):
+                continue
+            ruta = os.path.join(self.directorio, archivo)
+            rotados = {}
+            for a in archivos:
+                if a.startswith(archivo + ".") and not a.endswith(".tmp"):
+                    # Durante la compresión pueden coexistir <rotado> y <rotado>.gz.
+                    rotados.setdefault(a[:-3] if a.endswith(".gz") else a, a)
+            tramos = []
+            for nombre_rotado in sorted(rotados):
+                if nombre_rotado not in self._archivos:
+                    tramos.append((os.path.join(self.directorio, rotados[nombre_rotado]), None, 0, None))
+                    posiciones.append((nombre_rotado, 0, -1))
+            try:
+                st = os.stat(ruta)
+            except OSError:
+                st = None
+            if st is not None:
+                inodo, offset = self._archivos.get(archivo, (None, 0))
+                if inodo != st.st_ino or offset > st.st_size:
+                    offset = 0
+                if st.st_size > offset:
+                    tramos.append((ruta, st.st_ino, offset, st.st_size))
+                posiciones.append((archivo, st.st_ino, st.st_size))
+            if tramos:
+                fuentes.append(registro for tramo in tramos for registro in self._leer(*tramo))
+
+        for i in range(0, len(fuentes), MAX_FUENTES_MEZCLA):
+            mezcla = heapq.merge(*fuentes[i:i + MAX_FUENTES_MEZCLA], key=lambda r: r[0])
+            self._insertar(conexion, ((rpa, registro) for _, rpa, registro in mezcla))
+        for nombre, inodo, offset in posiciones:
+            self._guardar_posicion(conexion, nombre, inodo, offset)
+        self.metricas["indexando_historico"] = False
+
+    def _podar(self, conexion: sqlite3.Connection):
+        if self.dias <= 0:
+            return
+        limite = (datetime.now() - timedelta(days=self.dias)).strftime("%Y-%m-%d")
+        try:
+            while True:
+                with conexion:
+                    borradas = conexion.execute(
+                        "DELETE FROM lineas WHERE id IN (SELECT id FROM lineas WHERE fecha < ? LIMIT ?)",
+                        (limite, MAX_LINEAS_LOTE)
+                    ).rowcount
+                if borradas < MAX_LINEAS_LOTE:
+                    break
+        except Exception as e:
+            self._avisar(f"[WARN] No se pudo podar el índice de búsqueda de logs: {e}")
+
+    def vaciar(self):
+        if self._hilo is not None:
+            self._cola.join()
+
+    def detener(self, timeout: float = 10.0):
+        # Lo escrito después se indexa desde disco en el próximo arranque.
+        with self._lock:
+            if self._detenido:
+                return
+            if self._hilo is not None:
+                escritor_logs.vaciar()
+            self._detenido = True
+        if self._hilo is not None:
+            self._cola.put(("detener", None))
+            self._hilo.join(timeout)
+            self._hilo = None
+
+    # ---- Consulta ----
+
+    def _id_desde(self, fecha: str) -> Optional[int]:
+        # Primer id con fecha >= `fecha`; como los ids siguen el orden cronológico,
+        # un rango de fechas es un rango de ids que FTS recorre sin mirar el resto.
+        fila = self._lectura().execute(
+            "SELECT id FROM lineas WHERE fecha >= ? ORDER BY fecha, id LIMIT 1", (fecha,)
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def buscar(self, texto: str = "", rpa: Optional[str] = None, severidad: Optional[str] = None,
+               desde: Optional[str] = None, hasta: Optional[str] = None, limite: int = LIMITE_RESULTADOS,
+               antes_de: Optional[int] = None) -> Tuple[List[Dict], Optional[int]]:
+        # De la línea más reciente a la más antigua. Devuelve los resultados y el id
+        # que se pasa como `antes_de` para la página siguiente (None si no hay más).
+        # severidad: ERROR, WARN, AVISO ([!]) o INFO. `hasta` es exclusiva; las
+        # fechas van como "AAAA-MM-DD[ HH:MM:SS]".
+        expresion = _expresion_fts(texto, rpa, severidad)
+        if expresion:
+            sql = "SELECT l.* FROM lineas_fts JOIN lineas l ON l.id = lineas_fts.rowid WHERE lineas_fts MATCH ?"
+            parametros: List = [expresion]
+            orden = "lineas_fts.rowid"
+        else:
+            sql = "SELECT l.* FROM lineas l WHERE 1 = 1"
+            parametros = []
+            orden = "l.id"
+
+        if desde:
+            id_minimo = self._id_desde(desde)
+            if id_minimo is None:
+                return [], None
+            sql += f" AND {orden} >= ? AND l.fecha >= ?"
+            parametros += [id_minimo, desde]
+        if hasta:
+            id_tope = self._id_desde(hasta)
+            if id_tope is not None:
+                sql += f" AND {orden} < ?"
+                parametros.append(id_tope)
+            sql += " AND l.fecha < ?"
+            parametros.append(hasta)
+        if antes_de:
+            sql += f" AND {orden} < ?"
+            parametros.append(antes_de)
+        if rpa:
+            sql += " AND l.rpa = ?"
+            parametros.append(rpa)
+        sql += f" ORDER BY {orden} DESC LIMIT ?"
+        parametros.append(limite + 1)
+        filas = [dict(f) for f in self._lectura().execute(sql, parametros)]
+        siguiente = filas[limite - 1]["id"] if len(filas) > limite else None
+        return filas[:limite], siguiente
+
+indice_logs = IndiceLogs()
@@ -0,0 +1,154 @@
+import os
+import gzip
+import time
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+from core.log_handler import DIRECTORIO_LOGS, escritor_logs
+
+MAX_LINEAS_VISIBLES = 5000
+BYTES_INICIALES = 64 * 1024
+INTERVALO_SONDEO_S = 30
+
+class _Posicion:
+    def __init__(self, inodo: int, offset: int):
+        self.inodo = inodo
+        self.offset = offset
+        self.parcial = b""
+        self.leido_en = time.time()
+
+# Lectura incremental de los logs por RPA. Recuerda el offset de cada archivo
+# y sólo lee los bytes añadidos desde la última vez. El escritor de logs avisa
+# de qué archivos han cambiado; los demás se comprueban con stat cada
+# INTERVALO_SONDEO_S por si otro proceso escribe en ellos. Si el inodo cambia,
+# el log se rotó: se termina de leer el archivo rotado y se sigue desde el
+# principio del nuevo. Si el archivo encoge, se truncó y se relee desde cero.
+# La primera lectura de un archivo arranca en sus últimos BYTES_INICIALES.
+class SeguidorLogs:
+
+    def __init__(self, directorio: str = DIRECTORIO_LOGS, max_lineas: int = MAX_LINEAS_VISIBLES,
+                 bytes_iniciales: int = BYTES_INICIALES, notificaciones: bool = True):
+        self.directorio = directorio
+        self.bytes_iniciales = bytes_iniciales
+        self.recientes: Deque[str] = deque(maxlen=max_lineas)
+        self._posiciones: Dict[str, _Posicion] = {}
+        self._modificados = set()
+        self._lock = threading.Lock()
+        self._ultimo_sondeo = 0.0
+        self.notificaciones = notificaciones
+        if notificaciones:
+            escritor_logs.agregar_observador(self._marcar)
+
+    def _marcar(self, ruta: str):
+        with self._lock:
+            self._modificados.add(os.path.abspath(ruta))
+
+    def _ruta(self, nombre_rpa: str) -> str:
+        return os.path.abspath(os.path.join(self.directorio, f"{nombre_rpa}.log"))
+
+    def leer_nuevas(self, nombres_rpa: Iterable[str]) -> List[str]:
+        # Devuelve las líneas nuevas como "<nombre>: <línea>" y las añade a `recientes`.
+        ahora = time.monotonic()
+        sondear = not self.notificaciones or ahora - self._ultimo_sondeo >= INTERVALO_SONDEO_S
+        if sondear:
+            self._ultimo_sondeo = ahora
+        with self._lock:
+            modificados, self._modificados = self._modificados, set()
+
+        nuevas = []
+        for nombre in nombres_rpa:
+            ruta = self._ruta(nombre)
+            if sondear or ruta in modificados or ruta not in self._posiciones:
+                for linea in self._leer(ruta):
+                    nuevas.append(f"{nombre}: {linea}")
+        self.recientes.extend(nuevas)
+        return nuevas
+
+    def _leer(self, ruta: str) -> List[str]:
+        posicion = self._posiciones.get(ruta)
+        try:
+            st = os.stat(ruta)
+        except OSError:
+            if posicion is None:
+                return []
+            # Rotado sin líneas nuevas todavía (o borrado): se termina el anterior.
+            datos = self._resto_rotado(ruta, posicion)
+            posicion.inodo, posicion.offset, posicion.leido_en = None, 0, time.time()
+            return self._partir(posicion, datos)
+
+        datos = b""
+        if posicion is None:
+            posicion = self._posiciones[ruta] = _Posicion(st.st_ino, max(0, st.st_size - self.bytes_iniciales))
+            if posicion.offset:
+                datos = self._leer_desde(ruta, posicion.offset)
+                # Se descarta la primera línea, probablemente cortada.
+                corte = datos.find(b"\n")
+                posicion.offset += len(datos)
+                datos = datos[corte + 1:] if corte >= 0 else b""
+                return self._partir(posicion, datos)
+        elif posicion.inodo != st.st_ino:
+            datos = self._resto_rotado(ruta, posicion)
+            posicion.inodo, posicion.offset = st.st_ino, 0
+        elif st.st_size < posicion.offset:
+            posicion.offset, posicion.parcial = 0, b""
+
+        if st.st_size > posicion.offset:
+            nuevo = self._leer_desde(ruta, posicion.offset)
+            posicion.offset += len(nuevo)
+            datos += nuevo
+        posicion.leido_en = time.time()
+        return self._partir(posicion, datos)
+
+    @staticmethod
+    def _leer_desde(ruta: str, offset: int) -> bytes:
+        try:
+            with open(ruta, "rb") as f:
+                f.seek(offset)
+                return f.read()
+        except OSError:
+            return b""
+
+    def _resto_rotado(self, ruta: str, posicion: _Posicion) -> bytes:
+        # El archivo que se estaba leyendo es el primero rotado después de la
+        # última lectura (los nombres llevan la fecha de rotación, ver log_handler):
+        # se lee desde el offset guardado. Si entre dos lecturas hubo más
+        # rotaciones, los rotados siguientes se leen enteros, del más antiguo al
+        # más reciente.
+        carpeta, base = os.path.split(ruta)
+        sello = time.strftime("%Y%m%d%H%M%S", time.localtime(posicion.leido_en)) + f"{int(posicion.leido_en * 1000) % 1000:03d}"
+        rotados = sorted({
+            # Durante la compresión pueden coexistir <rotado> y <rotado>.gz.
+            a[:-3] if a.endswith(".gz") else a for a in os.listdir(carpeta)
+            if a.startswith(base + ".") and not a.endswith(".tmp") and a[len(base) + 1:] >= sello
+        })
+        datos = []
+        for n, nombre in enumerate(rotados):
+            rotado = os.path.join(carpeta, nombre)
+            try:
+                try:
+                    f = open(rotado, "rb")
+                except FileNotFoundError:
+                    f = gzip.open(rotado + ".gz", "rb")
+                with f:
+                    if n == 0:
+                        f.seek(posicion.offset)
+                    datos.append(f.read())
+            except (OSError, EOFError):
+                continue
+        return b"".join(datos)
+
+    @staticmethod
+    def _partir(posicion: _Posicion, datos: bytes) -> List[str]:
+        if not datos:
+            return []
+        datos = posicion.parcial + datos
+        lineas = datos.split(b"\n")
+        posicion.parcial = lineas.pop()
+        return [linea.decode("utf-8", errors="replace").rstrip("\r") for linea in lineas if linea.strip()]
+
+    def olvidar(self, nombre_rpa: Optional[str] = None):
+        # Tras borrar o renombrar logs: la próxima lectura vuelve a empezar por el final.
+        if nombre_rpa is None:
+            self._posiciones.clear()
+        else:
+            self._posiciones.pop(self._ruta(nombre_rpa), None)
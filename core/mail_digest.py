@@ -0,0 +1,281 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import threading
+from typing import Dict, List, Optional
+from core.log_handler import LOG_AGENTE, registrar_log
+from core.execution_store import historial_ejecuciones
+from core.mail_spool import cola_correo
+from core.mail_template import compilar_plantilla
+from core.mail_sender import (
+    asunto_correo, bloque_capturas_html, configuracion_smtp, destinatarios_correo,
+    escribir_mime, lista_urls_html
+)
+
+DIRECTORIO_RESUMEN = os.path.join(os.getcwd(), "resumen_correo")
+os.makedirs(DIRECTORIO_RESUMEN, exist_ok=True)
+
+VENTANA_POR_DEFECTO_MIN = 60
+
+class _ContadorBytes:
+    # Destino de escritura que sólo cuenta bytes, para medir mensajes sin guardarlos.
+    def __init__(self):
+        self.total = 0
+
+    def write(self, datos: bytes):
+        self.total += len(datos)
+
+def modo_resumen(correo_config: Dict) -> Optional[Dict]:
+    modo = correo_config.get("modo_resumen") or {}
+    return modo if modo.get("activo") else None
+
+def _escribir_json(ruta: str, datos: Dict):
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+# Modo resumen (correo.modo_resumen.activo): en lugar de enviar un correo por
+# ejecución, los reportes con el mismo remitente, servidor y destinatarios se
+# acumulan durante ventana_min minutos y se envían juntos en un solo mensaje,
+# renderizado con la plantilla cuerpo_html del primer reporte del grupo.
+# Cada grupo vive en resumen_correo/<clave>_<id>/ con un grupo.json y un directorio
+# por reporte que guarda su JSON y una copia de sus capturas, de modo que los
+# grupos abiertos sobreviven a un reinicio. Al cerrarse, el resumen pasa al
+# spool de correo como cualquier otro mensaje.
+class AgrupadorResumen:
+
+    def __init__(self, directorio: str = DIRECTORIO_RESUMEN):
+        self.directorio = directorio
+        self._grupos: Dict[str, Dict] = {}
+        self._condicion = threading.Condition()
+        self._hilo: Optional[threading.Thread] = None
+        self._activo = False
+        self.metricas = {
+            "reportes_agrupados": 0,
+            "resumenes_enviados": 0,
+            "mensajes_ahorrados": 0,
+            "bytes_ahorrados": 0,
+        }
+
+    @staticmethod
+    def clave(correo_config: Dict) -> str:
+        smtp, usar_remoto = configuracion_smtp(correo_config)
+        identidad = [
+            correo_config.get("remitente", ""),
+            smtp.get("servidor"), smtp.get("puerto"), smtp.get("usuario") or "", usar_remoto,
+            sorted(correo_config.get("destinatarios", [])),
+            sorted(correo_config.get("cc", []))
+        ]
+        return hashlib.sha256(json.dumps(identidad).encode("utf-8")).hexdigest()[:16]
+
+    def iniciar(self):
+        with self._condicion:
+            if self._activo:
+                return
+            self._activo = True
+            self._recuperar()
+            self._hilo = threading.Thread(target=self._vigilar, name="ResumenCorreo", daemon=True)
+            self._hilo.start()
+
+    def _recuperar(self):
+        for nombre in os.listdir(self.directorio):
+            ruta_grupo = os.path.join(self.directorio, nombre, "grupo.json")
+            if not os.path.isfile(ruta_grupo):
+                continue
+            try:
+                with open(ruta_grupo, "r", encoding="utf-8") as f:
+                    grupo = json.load(f)
+                self._grupos[grupo["clave"]] = grupo
+            except Exception as e:
+                registrar_log(LOG_AGENTE, f"[WARN] Grupo de resumen ilegible {nombre}: {e}")
+        if self._grupos:
+            registrar_log(LOG_AGENTE, f"[INFO] Modo resumen: {len(self._grupos)} grupos pendientes recuperados.")
+
+    def agregar(self, correo_config: Dict, rpa_config: Dict, capturas: List, timestamp: str,
+                id_ejecucion: Optional[str] = None) -> str:
+        self.iniciar()
+        nombre_rpa = rpa_config.get("nombre", "RPA")
+        smtp, usar_remoto = configuracion_smtp(correo_config)
+        clave = self.clave(correo_config)
+        ventana_min = float(modo_resumen(correo_config).get("ventana_min", VENTANA_POR_DEFECTO_MIN))
+
+        with self._condicion:
+            grupo = self._grupos.get(clave)
+            if grupo is None:
+                ahora = time.time()
+                grupo = {
+                    "clave": clave,
+                    "carpeta": f"{clave}_{uuid.uuid4().hex[:8]}",
+                    "abierto": ahora,
+                    "cierre": ahora + ventana_min * 60,
+                    "remitente": correo_config.get("remitente", ""),
+                    "destinatarios": correo_config.get("destinatarios", []),
+                    "cc": correo_config.get("cc", []),
+                    "servidor": f"{smtp.get('servidor')}:{smtp.get('puerto')}",
+                    "reportes": []
+                }
+                self._grupos[clave] = grupo
+
+            id_reporte = f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+            carpeta = os.path.join(self.directorio, grupo["carpeta"], id_reporte)
+            os.makedirs(carpeta, exist_ok=True)
+            copias = []
+            for url, ruta in capturas:
+                if os.path.exists(ruta):
+                    destino = os.path.join(carpeta, os.path.basename(ruta))
+                    shutil.copyfile(ruta, destino)
+                    copias.append((url, destino))
+
+            # La configuración SMTP va cifrada con la clave del spool: el resumen se
+            # envía aunque para entonces alguno de sus RPAs se haya renombrado o eliminado.
+            reporte = {
+                "id": id_reporte,
+                "nombre_rpa": nombre_rpa,
+                "id_ejecucion": id_ejecucion,
+                "fecha": timestamp,
+                "capturas": copias,
+                "lista_urls": lista_urls_html({"rpa": rpa_config}),
+                "asunto": asunto_correo(correo_config),
+                "cuerpo_html": correo_config.get("cuerpo_html", ""),
+                "adjuntar_capturas": correo_config.get("adjuntar_capturas", False),
+                "asunto_resumen": modo_resumen(correo_config).get("asunto"),
+                "smtp": cola_correo.cifrar_smtp(smtp, usar_remoto)
+            }
+            _escribir_json(os.path.join(carpeta, "reporte.json"), reporte)
+            grupo["reportes"].append(id_reporte)
+            _escribir_json(os.path.join(self.directorio, grupo["carpeta"], "grupo.json"), grupo)
+            self.metricas["reportes_agrupados"] += 1
+            self._condicion.notify()
+        if id_ejecucion:
+            historial_ejecuciones.registrar_correo(id_ejecucion, "en_resumen")
+        return grupo["carpeta"]
+
+    def _vigilar(self):
+        while True:
+            with self._condicion:
+                vencidos = []
+                while self._activo:
+                    ahora = time.time()
+                    vencidos = [g for g in self._grupos.values() if g["cierre"] <= ahora]
+                    if vencidos:
+                        for grupo in vencidos:
+                            del self._grupos[grupo["clave"]]
+                        break
+                    proximo = min((g["cierre"] for g in self._grupos.values()), default=None)
+                    self._condicion.wait(None if proximo is None else proximo - ahora)
+                if not self._activo:
+                    return
+            for grupo in vencidos:
+                try:
+                    self._enviar(grupo)
+                except Exception as e:
+                    registrar_log(LOG_AGENTE, f"[ERROR] No se pudo enviar el resumen {grupo['carpeta']}: {e}")
+
+    def _leer_reportes(self, grupo: Dict) -> List[Dict]:
+        reportes = []
+        for id_reporte in grupo["reportes"]:
+            try:
+                with open(os.path.join(self.directorio, grupo["carpeta"], id_reporte, "reporte.json"), "r", encoding="utf-8") as f:
+                    reportes.append(json.load(f))
+            except Exception as e:
+                registrar_log(LOG_AGENTE, f"[WARN] Reporte {id_reporte} del resumen ilegible: {e}")
+        return reportes
+
+    def _configuracion_smtp(self, reportes: List[Dict]):
+        # La del reporte más reciente que se pueda descifrar.
+        ultimo_error = None
+        for reporte in reversed(reportes):
+            if "smtp" not in reporte:
+                continue
+            try:
+                return cola_correo.descifrar_smtp(reporte["smtp"])
+            except Exception as e:
+                ultimo_error = e
+        raise RuntimeError(f"Ningún reporte del resumen tiene una configuración SMTP legible: {ultimo_error}")
+
+    def _componer(self, reportes: List[Dict]):
+        # Un solo render de la plantilla del primer reporte con el contenido de todos.
+        primero = reportes[0]
+        nombres = list(dict.fromkeys(r["nombre_rpa"] for r in reportes))
+        secciones = []
+        imagenes = []
+        for n, reporte in enumerate(reportes):
+            prefijo = f"r{n}_"
+            secciones.append(f"<h3>{reporte['nombre_rpa']} · {reporte['fecha']}</h3>")
+            secciones.append(bloque_capturas_html(reporte["capturas"], prefijo) or "<p>No se tomaron capturas.</p>")
+            imagenes.extend((f"{prefijo}screenshot{idx}", ruta) for idx, (_, ruta) in enumerate(reporte["capturas"]))
+        cuerpo_html = compilar_plantilla(primero["cuerpo_html"]).renderizar({
+            "nombre_rpa": ", ".join(nombres),
+            "fecha": f"{reportes[0]['fecha']} - {reportes[-1]['fecha']}" if len(reportes) > 1 else primero["fecha"],
+            "lista_urls": "".join(dict.fromkeys(r["lista_urls"] for r in reportes)),
+            "bloque_capturas": "".join(secciones)
+        })
+        asunto = primero.get("asunto_resumen") or f"{primero['asunto']} - resumen de {len(reportes)} reportes"
+        return asunto, cuerpo_html, imagenes
+
+    def _enviar(self, grupo: Dict):
+        reportes = self._leer_reportes(grupo)
+        if reportes:
+            correo = {"remitente": grupo["remitente"], "destinatarios": grupo["destinatarios"], "cc": grupo["cc"]}
+            asunto, cuerpo_html, imagenes = self._componer(reportes)
+            adjuntar = reportes[0]["adjuntar_capturas"]
+            nombre_rpa = reportes[0]["nombre_rpa"]
+
+            def escribir(archivo):
+                escribir_mime(archivo, correo, asunto, cuerpo_html, imagenes, adjuntar, nombre_rpa)
+                return grupo["remitente"]
+
+            smtp, usar_remoto = self._configuracion_smtp(reportes)
+            id_mensaje = cola_correo.encolar(
+                escribir, destinatarios_correo(correo), grupo["servidor"],
+                nombre_rpa, smtp, usar_remoto,
+                [r["id_ejecucion"] for r in reportes if r.get("id_ejecucion")]
+            )
+            ahorrados = self._bytes_ahorrados(correo, asunto, cuerpo_html, reportes)
+            with self._condicion:
+                self.metricas["resumenes_enviados"] += 1
+                self.metricas["mensajes_ahorrados"] += len(reportes) - 1
+                self.metricas["bytes_ahorrados"] += ahorrados
+            for nombre in dict.fromkeys(r["nombre_rpa"] for r in reportes):
+                registrar_log(nombre, f"RPA: Resumen de {len(reportes)} reportes encolado para envío → {id_mensaje}")
+        shutil.rmtree(os.path.join(self.directorio, grupo["carpeta"]), ignore_errors=True)
+
+    @staticmethod
+    def _bytes_ahorrados(correo: Dict, asunto: str, cuerpo_html: str, reportes: List[Dict]) -> int:
+        # Las partes de imagen son idénticas en ambos casos; se comparan cabeceras y HTML.
+        individuales = 0
+        for reporte in reportes:
+            contador = _ContadorBytes()
+            html = compilar_plantilla(reporte["cuerpo_html"]).renderizar({
+                "nombre_rpa": reporte["nombre_rpa"],
+                "fecha": reporte["fecha"],
+                "lista_urls": reporte["lista_urls"],
+                "bloque_capturas": bloque_capturas_html(reporte["capturas"]) or "<p>No se tomaron capturas.</p>"
+            })
+            escribir_mime(contador, correo, reporte["asunto"], html, [], False)
+            individuales += contador.total
+        contador = _ContadorBytes()
+        escribir_mime(contador, correo, asunto, cuerpo_html, [], False)
+        return max(individuales - contador.total, 0)
+
+    def obtener_metricas(self) -> Dict:
+        with self._condicion:
+            metricas = dict(self.metricas)
+            metricas["grupos_abiertos"] = len(self._grupos)
+            metricas["reportes_pendientes"] = sum(len(g["reportes"]) for g in self._grupos.values())
+        return metricas
+
+    def detener(self, timeout: float = 10.0):
+        # Los grupos abiertos quedan en disco y se envían tras el próximo arranque.
+        with self._condicion:
+            self._activo = False
+            self._condicion.notify_all()
+        if self._hilo:
+            self._hilo.join(timeout)
+            self._hilo = None
+
+agrupador_resumen = AgrupadorResumen()
@@ -1,96 +1,176 @@
-import smtplib
+import io
 import os
+import uuid
+import base64
+import shutil
+import mimetypes
+import tempfile
 from datetime import datetime
-from email.mime.text import MIMEText
-from email.mime.image import MIMEImage
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+from email import policy
+from typing import BinaryIO
 from core.log_handler import registrar_log
+from core.smtp_pool import pool_smtp
+from core.mail_template import compilar_plantilla
 
-def enviar_reporte_por_correo(correo_config, rpa_config, capturas, timestamp):
+# Bytes de imagen leídos por bloque: múltiplo de 57 para que cada bloque
+# codificado en base64 ocupe líneas completas de 76 caracteres.
+BLOQUE_LECTURA = 57 * 1024
+MAX_MEMORIA_CODIFICADA = 1024 * 1024
+
+def configuracion_smtp(correo_config):
     usar_remoto = correo_config.get("usar_remoto", False)
     smtp = correo_config.get("smtp_remoto" if usar_remoto else "smtp_local", {})
-    nombre_rpa = rpa_config.get("rpa", {}).get("nombre", "RPA")
-
     if usar_remoto and (not smtp.get("usuario") or not smtp.get("clave_aplicacion")):
         raise ValueError("Credenciales de servidor remoto incompletas.")
+    return smtp, usar_remoto
 
-    now = datetime.now()
-    asunto = correo_config.get("asunto", "Reporte automático")
-    if correo_config.get("incluir_fecha", False):
-        asunto += f" - {now.strftime('%Y-%m-%d %H:%M')}"
-
-    html_base = correo_config.get("cuerpo_html", "")
-    cuerpo_html = html_base.replace("{{nombre_rpa}}", nombre_rpa)
-    cuerpo_html = cuerpo_html.replace("{{fecha}}", timestamp)
+def destinatarios_correo(correo_config):
+    destinatarios = correo_config.get("destinatarios", []) + correo_config.get("cc", [])
+    if not destinatarios:
+        raise ValueError("No se ha especificado ningún destinatario ni CC para el correo.")
+    return destinatarios
 
+def lista_urls_html(rpa_config):
     url_ruta = rpa_config.get("rpa", {}).get("url_ruta", [])
-    lista_urls_html = "".join(f"<li>{ruta.get('url', '')}</li>" for ruta in url_ruta)
-    cuerpo_html = cuerpo_html.replace("{{lista_urls}}", f"<ul>{lista_urls_html}</ul>")
+    return "<ul>" + "".join(f"<li>{ruta.get('url', '')}</li>" for ruta in url_ruta) + "</ul>"
 
-    bloque_capturas_html = ""
+def bloque_capturas_html(capturas, prefijo_cid=""):
+    bloque = ""
     for idx, (url, _) in enumerate(capturas):
-        cid = f"screenshot{idx}"
-        bloque_capturas_html += f"""
+        cid = f"{prefijo_cid}screenshot{idx}"
+        bloque += f"""
         <hr>
         <p><b>Captura {idx + 1}:</b> <a href="{url}" target="_blank">{url}</a></p>
         <img src="cid:{cid}" alt="Captura {idx + 1}" style="max-width:800px; border:1px solid #ccc;" />
         """
-    cuerpo_html = cuerpo_html.replace("{{bloque_capturas}}", bloque_capturas_html or "<p>No se tomaron capturas.</p>")
-
-    msg_root = MIMEMultipart('related')
-    msg_root['From'] = correo_config.get("remitente", "")
-    msg_root['To'] = ", ".join(correo_config.get("destinatarios", []))
-    msg_root['Cc'] = ", ".join(correo_config.get("cc", []))
-    msg_root['Subject'] = asunto.strip()
-
-    msg_alternative = MIMEMultipart('alternative')
-    msg_root.attach(msg_alternative)
-    msg_alternative.attach(MIMEText(cuerpo_html, "html", "utf-8"))
-
-    adjuntar = correo_config.get("adjuntar_capturas", False)
-    for idx, (_, img_path) in enumerate(capturas):
-        cid = f"screenshot{idx}"
-        if os.path.exists(img_path):
-            try:
-                with open(img_path, "rb") as f:
-                    img_data = f.read()
-
-                img_inline = MIMEImage(img_data, _subtype="png")
-                img_inline.add_header("Content-ID", f"<{cid}>")
-                img_inline.add_header("Content-Disposition", "inline", filename=os.path.basename(img_path))
-                msg_root.attach(img_inline)
-
+    return bloque
+
+def construir_cuerpo_html(correo_config, rpa_config, capturas, timestamp):
+    return compilar_plantilla(correo_config.get("cuerpo_html", "")).renderizar({
+        "nombre_rpa": rpa_config.get("rpa", {}).get("nombre", "RPA"),
+        "fecha": timestamp,
+        "lista_urls": lista_urls_html(rpa_config),
+        "bloque_capturas": bloque_capturas_html(capturas) or "<p>No se tomaron capturas.</p>"
+    })
+
+def _escribir_encabezado(salida: BinaryIO, nombre: str, valor: str):
+    # Plegada a 78 columnas con CRLF y con lo no ASCII codificado (RFC 5322 y 2047): una
+    # lista larga de destinatarios no puede superar el límite de 998 caracteres por línea.
+    salida.write(policy.SMTP.fold(nombre, policy.SMTP.header_factory(nombre, valor)).encode("ascii"))
+
+def _escribir_lineas(salida: BinaryIO, *lineas: str):
+    for linea in lineas:
+        salida.write(linea.encode("ascii") + b"\r\n")
+
+def _codificar_base64(entrada: BinaryIO, salida: BinaryIO):
+    while True:
+        bloque = entrada.read(BLOQUE_LECTURA)
+        if not bloque:
+            break
+        codificado = base64.b64encode(bloque)
+        for i in range(0, len(codificado), 76):
+            salida.write(codificado[i:i + 76] + b"\r\n")
+
+# Escribe el mensaje MIME completo en `salida` sin construirlo en memoria: el
+# HTML es pequeño, pero cada captura se lee y codifica en base64 por bloques.
+# Con adjuntar la imagen se codifica una sola vez en un temporal que comparten
+# la parte inline y el adjunto. La estructura es la misma que generaba
+# email.mime: related > (alternative > html) + imágenes. `imagenes` es una
+# lista de (cid, ruta).
+def escribir_mime(salida: BinaryIO, correo_config, asunto, cuerpo_html, imagenes, adjuntar, nombre_rpa="RPA"):
+    frontera_related = f"==related_{uuid.uuid4().hex}"
+    frontera_alternative = f"==alternative_{uuid.uuid4().hex}"
+
+    _escribir_lineas(
+        salida,
+        f'Content-Type: multipart/related; boundary="{frontera_related}"',
+        "MIME-Version: 1.0"
+    )
+    _escribir_encabezado(salida, "From", correo_config.get("remitente", ""))
+    _escribir_encabezado(salida, "To", ", ".join(correo_config.get("destinatarios", [])))
+    if correo_config.get("cc"):
+        _escribir_encabezado(salida, "Cc", ", ".join(correo_config["cc"]))
+    _escribir_encabezado(salida, "Subject", asunto.strip())
+    _escribir_lineas(
+        salida,
+        "",
+        f"--{frontera_related}",
+        f'Content-Type: multipart/alternative; boundary="{frontera_alternative}"',
+        "MIME-Version: 1.0",
+        "",
+        f"--{frontera_alternative}",
+        'Content-Type: text/html; charset="utf-8"',
+        "MIME-Version: 1.0",
+        "Content-Transfer-Encoding: base64",
+        ""
+    )
+    _codificar_base64(io.BytesIO(cuerpo_html.encode("utf-8")), salida)
+    _escribir_lineas(salida, "", f"--{frontera_alternative}--", "")
+
+    for cid, img_path in imagenes:
+        if not os.path.exists(img_path):
+            continue
+        nombre_archivo = os.path.basename(img_path)
+        tipo = mimetypes.guess_type(img_path)[0] or "image/png"
+        try:
+            with open(img_path, "rb") as img, tempfile.SpooledTemporaryFile(max_size=MAX_MEMORIA_CODIFICADA) as codificada:
+                _codificar_base64(img, codificada)
+                partes = [(tipo, "inline", [f"Content-ID: <{cid}>"])]
                 if adjuntar:
-                    img_attach = MIMEBase("application", "octet-stream")
-                    img_attach.set_payload(img_data)
-                    encoders.encode_base64(img_attach)
-                    img_attach.add_header("Content-Disposition", "attachment", filename=os.path.basename(img_path))
-                    msg_root.attach(img_attach)
-            except Exception as e:
-                registrar_log(nombre_rpa, f"[WARN] No se pudo adjuntar {img_path}: {e}")
-
-    destinatarios = correo_config.get("destinatarios", [])
-    cc = correo_config.get("cc", [])
-    if not destinatarios and not cc:
-        raise ValueError("No se ha especificado ningún destinatario ni CC para el correo.")
+                    partes.append(("application/octet-stream", "attachment", []))
+                for tipo_parte, disposicion, extra in partes:
+                    _escribir_lineas(
+                        salida,
+                        f"--{frontera_related}",
+                        f"Content-Type: {tipo_parte}",
+                        "MIME-Version: 1.0",
+                        "Content-Transfer-Encoding: base64",
+                        *extra,
+                        f'Content-Disposition: {disposicion}; filename="{nombre_archivo}"',
+                        ""
+                    )
+                    codificada.seek(0)
+                    shutil.copyfileobj(codificada, salida)
+        except Exception as e:
+            registrar_log(nombre_rpa, f"[WARN] No se pudo adjuntar {img_path}: {e}")
+
+    _escribir_lineas(salida, f"--{frontera_related}--")
+
+def asunto_correo(correo_config):
+    asunto = correo_config.get("asunto", "Reporte automático")
+    if correo_config.get("incluir_fecha", False):
+        asunto += f" - {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+    return asunto
+
+def escribir_mensaje(correo_config, rpa_config, capturas, timestamp, salida: BinaryIO) -> str:
+    escribir_mime(
+        salida,
+        correo_config,
+        asunto_correo(correo_config),
+        construir_cuerpo_html(correo_config, rpa_config, capturas, timestamp),
+        [(f"screenshot{idx}", img_path) for idx, (_, img_path) in enumerate(capturas)],
+        correo_config.get("adjuntar_capturas", False),
+        rpa_config.get("rpa", {}).get("nombre", "RPA")
+    )
+    return correo_config.get("remitente", "")
+
+def enviar_mensaje(correo_config, mensaje: BinaryIO, remitente, nombre_rpa="RPA"):
+    smtp, usar_remoto = configuracion_smtp(correo_config)
+    destinatarios = destinatarios_correo(correo_config)
 
     try:
         registrar_log(nombre_rpa, "RPA: Enviando correo...")
-        server = smtplib.SMTP(smtp["servidor"], smtp["puerto"])
-        server.ehlo()
-        if usar_remoto:
-            server.starttls()
-            server.ehlo()
-            server.login(smtp["usuario"], smtp["clave_aplicacion"])
-
-        server.sendmail(msg_root["From"], destinatarios + cc, msg_root.as_string())
-        server.quit()
-
+        pool_smtp.enviar_archivo(smtp, usar_remoto, remitente, destinatarios, mensaje)
         registrar_log(nombre_rpa, "RPA: Envío de correo completado")
         return True
 
     except Exception as e:
         registrar_log(nombre_rpa, f"[ERROR] Fallo al enviar correo: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def enviar_reporte_por_correo(correo_config, rpa_config, capturas, timestamp):
+    configuracion_smtp(correo_config)
+    nombre_rpa = rpa_config.get("rpa", {}).get("nombre", "RPA")
+    with tempfile.TemporaryFile() as mensaje:
+        remitente = escribir_mensaje(correo_config, rpa_config, capturas, timestamp, mensaje)
+        return enviar_mensaje(correo_config, mensaje, remitente, nombre_rpa)
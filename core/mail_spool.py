@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import uuid
+import base64
+import random
+import smtplib
+import threading
+from typing import BinaryIO, Callable, Dict, List, Optional
+from core.log_handler import LOG_AGENTE, registrar_log
+from core.execution_store import historial_ejecuciones
+from core.crypto_utils import cifrar_datos, descifrar_datos
+from core.smtp_pool import pool_smtp
+
+DIRECTORIO_SPOOL = os.path.join(os.getcwd(), "spool_correo")
+DIRECTORIO_DEAD = os.path.join(DIRECTORIO_SPOOL, "dead")
+os.makedirs(DIRECTORIO_DEAD, exist_ok=True)
+
+HILOS_ENVIO = int(os.environ.get("ESENDER_SPOOL_HILOS", "2"))
+MAX_ENVIOS_POR_MINUTO = int(os.environ.get("ESENDER_SMTP_MAX_POR_MINUTO", "30"))
+MAX_INTENTOS = 8
+ESPERA_BASE_S = 30
+ESPERA_MAXIMA_S = 3600
+
+def _escribir_atomico(ruta: str, datos: bytes):
+    temporal = ruta + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write(datos)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+def _es_permanente(error: Exception) -> bool:
+    # Sólo una respuesta 5xx del servidor es definitiva; lo demás (red, 4xx, disco) se reintenta.
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return bool(error.recipients) and all(codigo >= 500 for codigo, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+# Cola de salida de correo en disco. Cada mensaje es un par <id>.eml (el MIME
+# escrito por mail_sender) + <id>.json (metadatos). El JSON lleva la
+# configuración SMTP del envío cifrada con spool.key, una clave propia del
+# spool: el mensaje no depende de que el RPA siga existiendo ni de que no se
+# haya renombrado mientras espera. El JSON se escribe después del .eml, así que un
+# .eml sin JSON es un encolado interrumpido y se descarta al arrancar.
+# Los fallos temporales se reintentan con espera exponencial; los permanentes o
+# los que agotan MAX_INTENTOS pasan a spool_correo/dead/. Cada cambio de estado
+# se anota en el historial de las ejecuciones que lleva el mensaje.
+class ColaCorreo:
+
+    def __init__(self, directorio: str = DIRECTORIO_SPOOL, hilos: int = HILOS_ENVIO,
+                 max_por_minuto: int = MAX_ENVIOS_POR_MINUTO):
+        self.directorio = directorio
+        self.directorio_dead = os.path.join(directorio, "dead")
+        self.ruta_clave = os.path.join(directorio, "spool.key")
+        self._lock_clave = threading.Lock()
+        self.hilos = hilos
+        self.intervalo_servidor_s = 60.0 / max_por_minuto if max_por_minuto > 0 else 0.0
+        self._pendientes: Dict[str, Dict] = {}
+        self._en_envio = set()
+        self._ultimo_envio: Dict[str, float] = {}
+        self._condicion = threading.Condition()
+        self._hilos: List[threading.Thread] = []
+        self._activo = False
+        self._espera_s: Optional[float] = None
+        self.metricas = {"enviados": 0, "reintentos": 0, "dead": 0}
+
+    def _ruta(self, id_mensaje: str, extension: str, directorio: Optional[str] = None) -> str:
+        return os.path.join(directorio or self.directorio, f"{id_mensaje}{extension}")
+
+    def _recuperar(self):
+        os.makedirs(self.directorio_dead, exist_ok=True)
+        for archivo in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, archivo)
+            if archivo.endswith(".tmp"):
+                os.remove(ruta)
+            elif archivo.endswith(".json"):
+                try:
+                    with open(ruta, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                    self._pendientes[meta["id"]] = meta
+                except Exception as e:
+                    registrar_log(LOG_AGENTE, f"[WARN] Mensaje del spool ilegible {archivo}: {e}")
+        for archivo in os.listdir(self.directorio):
+            if archivo.endswith(".eml") and archivo[:-4] not in self._pendientes:
+                os.remove(os.path.join(self.directorio, archivo))
+        if self._pendientes:
+            registrar_log(LOG_AGENTE, f"[INFO] Spool de correo: {len(self._pendientes)} mensajes pendientes recuperados.")
+
+    def _asegurar_clave(self):
+        with self._lock_clave:
+            if os.path.isfile(self.ruta_clave):
+                return
+            os.makedirs(self.directorio, exist_ok=True)
+            _escribir_atomico(self.ruta_clave, os.urandom(32))
+
+    def cifrar_smtp(self, smtp: Dict, usar_remoto: bool) -> str:
+        # Configuración SMTP (con credenciales) para guardar en disco junto a un mensaje pendiente.
+        self._asegurar_clave()
+        datos = json.dumps({"smtp": smtp, "usar_remoto": usar_remoto}).encode("utf-8")
+        return base64.b64encode(cifrar_datos(datos, self.ruta_clave)).decode("ascii")
+
+    def descifrar_smtp(self, cifrado: str):
+        datos = json.loads(descifrar_datos(base64.b64decode(cifrado), self.ruta_clave).decode("utf-8"))
+        return datos["smtp"], datos["usar_remoto"]
+
+    def iniciar(self):
+        with self._condicion:
+            if self._activo:
+                return
+            self._activo = True
+            self._recuperar()
+            for i in range(self.hilos):
+                hilo = threading.Thread(target=self._trabajar, name=f"SpoolCorreo-{i + 1}", daemon=True)
+                hilo.start()
+                self._hilos.append(hilo)
+
+    def encolar(self, escribir: Callable[[BinaryIO], str], destinatarios: List[str], servidor: str,
+                nombre_rpa: str, smtp: Dict, usar_remoto: bool, ejecuciones: Optional[List[str]] = None) -> str:
+        # escribir(archivo) vuelca el mensaje MIME directamente al .eml y devuelve el remitente.
+        # `ejecuciones` son los ids del historial que reporta el mensaje (varios en un resumen).
+        self.iniciar()
+        id_mensaje = f"{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        ruta_eml = self._ruta(id_mensaje, ".eml")
+        try:
+            with open(ruta_eml + ".tmp", "wb") as f:
+                remitente = escribir(f)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            os.remove(ruta_eml + ".tmp")
+            raise
+        os.replace(ruta_eml + ".tmp", ruta_eml)
+
+        ahora = time.time()
+        meta = {
+            "id": id_mensaje,
+            "nombre_rpa": nombre_rpa,
+            "remitente": remitente,
+            "destinatarios": destinatarios,
+            "servidor": servidor,
+            "smtp": self.cifrar_smtp(smtp, usar_remoto),
+            "ejecuciones": ejecuciones or [],
+            "creado": ahora,
+            "intentos": 0,
+            "proximo_intento": ahora,
+            "ultimo_error": None
+        }
+        self._guardar_meta(meta)
+        self._registrar_historial(meta, "encolado")
+        with self._condicion:
+            self._pendientes[id_mensaje] = meta
+            self._condicion.notify()
+        return id_mensaje
+
+    @staticmethod
+    def _registrar_historial(meta: Dict, estado: str):
+        for id_ejecucion in meta.get("ejecuciones", []):
+            historial_ejecuciones.registrar_correo(id_ejecucion, estado, meta["id"], meta["intentos"], meta["ultimo_error"])
+
+    def _guardar_meta(self, meta: Dict):
+        _escribir_atomico(self._ruta(meta["id"], ".json"), json.dumps(meta, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    def _siguiente(self) -> Optional[Dict]:
+        # Con el lock tomado: el mensaje vencido más antiguo cuyo servidor no esté limitado.
+        # Si no hay ninguno, devuelve None y deja en self._espera_s cuánto dormir.
+        ahora = time.time()
+        espera = None
+        for meta in sorted(self._pendientes.values(), key=lambda m: m["proximo_intento"]):
+            if meta["id"] in self._en_envio:
+                continue
+            listo = max(meta["proximo_intento"], self._ultimo_envio.get(meta["servidor"], 0.0) + self.intervalo_servidor_s)
+            if listo <= ahora:
+                self._en_envio.add(meta["id"])
+                self._ultimo_envio[meta["servidor"]] = ahora
+                return meta
+            espera = listo - ahora if espera is None else min(espera, listo - ahora)
+        self._espera_s = espera
+        return None
+
+    def _trabajar(self):
+        while True:
+            with self._condicion:
+                meta = None
+                while self._activo:
+                    meta = self._siguiente()
+                    if meta:
+                        break
+                    self._condicion.wait(self._espera_s)
+                if not self._activo:
+                    return
+            try:
+                self._enviar(meta)
+            except Exception as e:
+                registrar_log(meta.get("nombre_rpa") or LOG_AGENTE, f"[ERROR] Spool de correo: fallo inesperado con {meta['id']}: {e}")
+            finally:
+                with self._condicion:
+                    self._en_envio.discard(meta["id"])
+                    self._condicion.notify_all()
+
+    def _enviar(self, meta: Dict):
+        nombre_rpa = meta["nombre_rpa"]
+        try:
+            smtp, usar_remoto = self.descifrar_smtp(meta["smtp"])
+            with open(self._ruta(meta["id"], ".eml"), "rb") as mensaje:
+                rechazados = pool_smtp.enviar_archivo(smtp, usar_remoto, meta["remitente"], meta["destinatarios"], mensaje)
+        except Exception as e:
+            self._fallo(meta, e)
+            return
+
+        if rechazados:
+            registrar_log(nombre_rpa, f"[WARN] Destinatarios rechazados: {', '.join(rechazados)}")
+        for extension in (".json", ".eml"):
+            try:
+                os.remove(self._ruta(meta["id"], extension))
+            except FileNotFoundError:
+                pass
+        with self._condicion:
+            self._pendientes.pop(meta["id"], None)
+            self.metricas["enviados"] += 1
+        meta["intentos"] += 1
+        meta["ultimo_error"] = None
+        self._registrar_historial(meta, "enviado")
+        registrar_log(nombre_rpa, f"RPA: Envío de correo completado (intento {meta['intentos']})")
+
+    def _fallo(self, meta: Dict, error: Exception):
+        meta["intentos"] += 1
+        meta["ultimo_error"] = str(error)
+        nombre_rpa = meta["nombre_rpa"]
+        if _es_permanente(error) or meta["intentos"] >= MAX_INTENTOS:
+            self._guardar_meta(meta)
+            for extension in (".eml", ".json"):
+                try:
+                    os.replace(self._ruta(meta["id"], extension), self._ruta(meta["id"], extension, self.directorio_dead))
+                except FileNotFoundError:
+                    pass
+            with self._condicion:
+                self._pendientes.pop(meta["id"], None)
+                self.metricas["dead"] += 1
+            self._registrar_historial(meta, "descartado")
+            registrar_log(nombre_rpa, f"[ERROR] Correo descartado tras {meta['intentos']} intentos, movido a {self.directorio_dead}: {error}")
+            return
+
+        espera = min(ESPERA_BASE_S * 2 ** (meta["intentos"] - 1), ESPERA_MAXIMA_S)
+        espera *= random.uniform(0.8, 1.2)
+        meta["proximo_intento"] = time.time() + espera
+        self._guardar_meta(meta)
+        with self._condicion:
+            self.metricas["reintentos"] += 1
+        self._registrar_historial(meta, "reintentando")
+        registrar_log(nombre_rpa, f"[WARN] Fallo al enviar correo (intento {meta['intentos']}), nuevo intento en {espera:.0f}s: {error}")
+
+    def obtener_estado(self) -> Dict:
+        with self._condicion:
+            creados = [m["creado"] for m in self._pendientes.values()]
+            estado = dict(self.metricas)
+            estado["pendientes"] = len(creados)
+            estado["en_envio"] = len(self._en_envio)
+        estado["antiguedad_max_s"] = time.time() - min(creados) if creados else 0.0
+        return estado
+
+    def detener(self, timeout: float = 10.0):
+        # Los mensajes no enviados quedan en disco y se recuperan en el próximo arranque.
+        with self._condicion:
+            self._activo = False
+            self._condicion.notify_all()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos.clear()
+
+cola_correo = ColaCorreo()
@@ -0,0 +1,32 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+PATRON_VARIABLE = re.compile(r"\{\{(\w+)\}\}")
+
+# Plantilla de cuerpo_html ya analizada: una lista de segmentos literales y
+# variables {{nombre}}. Renderizar es un único join, sin recorrer el HTML una
+# vez por placeholder. Las variables sin valor se dejan tal cual, como hacía
+# la cadena de str.replace.
+class PlantillaHTML:
+
+    def __init__(self, texto: str):
+        self.segmentos: List[Tuple[bool, str]] = []
+        posicion = 0
+        for coincidencia in PATRON_VARIABLE.finditer(texto):
+            if coincidencia.start() > posicion:
+                self.segmentos.append((False, texto[posicion:coincidencia.start()]))
+            self.segmentos.append((True, coincidencia.group(1)))
+            posicion = coincidencia.end()
+        if posicion < len(texto):
+            self.segmentos.append((False, texto[posicion:]))
+
+    def renderizar(self, valores: Dict[str, str]) -> str:
+        return "".join(
+            valores.get(segmento, "{{" + segmento + "}}") if es_variable else segmento
+            for es_variable, segmento in self.segmentos
+        )
+
+@lru_cache(maxsize=128)
+def compilar_plantilla(texto: str) -> PlantillaHTML:
+    return PlantillaHTML(texto)
@@ -0,0 +1,183 @@
+import os
+import json
+import atexit
+import threading
+from contextlib import contextmanager
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, Mapping, Optional
+from core.log_handler import registrar_log
+
+RETRASO_GUARDADO_S = 0.5
+_VACIO: Mapping = MappingProxyType({})
+
+def _escribir_json_atomico(ruta: str, datos: Dict):
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+
+# Registro único de los meta.json de todos los RPAs. Cada cambio se aplica con
+# el lock tomado sobre la copia en memoria (leer-modificar-escribir en un paso)
+# y publica una instantánea inmutable nueva: las lecturas (interfaz, scheduler)
+# no toman el lock y nunca ven un meta a medio actualizar. Un hilo agrupa los
+# cambios de RETRASO_GUARDADO_S y escribe una vez cada meta.json modificado,
+# siempre a un temporal que luego sustituye al original, y al terminar llama a
+# `al_guardar` (el índice de RPAs). Las operaciones que mueven o borran la
+# carpeta de un RPA se hacen dentro de bloqueo_disco() para no cruzarse con una
+# escritura en curso.
+class RegistroMetadatos:
+
+    def __init__(self, directorio: str, al_guardar: Optional[Callable[[], None]] = None,
+                 retraso_s: float = RETRASO_GUARDADO_S):
+        self.directorio = directorio
+        self.al_guardar = al_guardar
+        self.retraso_s = retraso_s
+        self._metas: Dict[str, Dict] = {}
+        self._instantanea: Mapping[str, Mapping] = _VACIO
+        self._pendientes = set()
+        self._modificados = set()
+        self._lock = threading.Lock()
+        self._lock_disco = threading.RLock()
+        self._hay_pendientes = threading.Condition(self._lock)
+        self._despertar = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._detenido = False
+        self.metricas = {"cambios": 0, "escrituras": 0, "guardados": 0}
+
+    # ---- Lectura sin lock ----
+
+    def obtener(self, nombre: str) -> Mapping:
+        return self._instantanea.get(nombre, _VACIO)
+
+    def instantanea(self) -> Mapping[str, Mapping]:
+        return self._instantanea
+
+    # ---- Cambios ----
+
+    def _publicar(self, nombres: Iterable[str]):
+        # Con el lock tomado. Copia al escribir: sólo cambian las entradas tocadas.
+        nueva = dict(self._instantanea)
+        for nombre in nombres:
+            if nombre in self._metas:
+                nueva[nombre] = MappingProxyType(dict(self._metas[nombre]))
+            else:
+                nueva.pop(nombre, None)
+        self._instantanea = MappingProxyType(nueva)
+
+    def _marcar(self, nombre: str):
+        # Con el lock tomado.
+        self._modificados.add(nombre)
+        self._pendientes.add(nombre)
+        self.metricas["cambios"] += 1
+        self._publicar([nombre])
+        if self._hilo is None and not self._detenido:
+            self._hilo = threading.Thread(target=self._persistir, name="RegistroMetadatos", daemon=True)
+            self._hilo.start()
+            # Red de seguridad para usos cortos (línea de comandos, scripts): el
+            # hilo es daemon y lo pendiente se perdería al terminar el proceso.
+            atexit.register(self.detener)
+        self._hay_pendientes.notify()
+
+    def _tras_cambio(self):
+        # Tras detener() (cierre del agente) se guarda en el acto.
+        if self._detenido:
+            self._guardar_pendientes()
+
+    def cargar(self, metas: Dict[str, Dict]):
+        # Metas leídas de disco o del índice. No se vuelven a escribir, se combinan
+        # con lo que ya hay en memoria y no pisan las que ya se modificaron en esta sesión.
+        with self._lock:
+            nombres = [n for n in metas if n not in self._modificados]
+            for nombre in nombres:
+                self._metas.setdefault(nombre, {}).update(metas[nombre])
+            self._publicar(nombres)
+
+    def registrar(self, nombre: str, meta: Dict):
+        with self._lock:
+            self._metas[nombre] = dict(meta)
+            self._marcar(nombre)
+        self._tras_cambio()
+
+    def modificar(self, nombre: str, cambio: Callable[[Dict], None]) -> Mapping:
+        # cambio(meta) modifica el meta en sitio con el lock tomado: debe ser inmediato.
+        with self._lock:
+            meta = self._metas.get(nombre)
+            if meta is None:
+                return _VACIO
+            cambio(meta)
+            self._marcar(nombre)
+            resultado = self._instantanea[nombre]
+        self._tras_cambio()
+        return resultado
+
+    def actualizar(self, nombre: str, **valores) -> Mapping:
+        return self.modificar(nombre, lambda meta: meta.update(valores))
+
+    def eliminar(self, nombre: str):
+        with self._lock_disco, self._lock:
+            self._metas.pop(nombre, None)
+            self._pendientes.discard(nombre)
+            self._modificados.add(nombre)
+            self._publicar([nombre])
+
+    def renombrar(self, actual: str, nuevo: str):
+        with self._lock_disco, self._lock:
+            meta = self._metas.pop(actual, None)
+            self._pendientes.discard(actual)
+            self._modificados.add(actual)
+            self._publicar([actual])
+            if meta is not None:
+                self._metas[nuevo] = meta
+                self._marcar(nuevo)
+        self._tras_cambio()
+
+    @contextmanager
+    def bloqueo_disco(self):
+        with self._lock_disco:
+            yield
+
+    # ---- Persistencia ----
+
+    def _persistir(self):
+        while True:
+            with self._lock:
+                while not self._pendientes and not self._detenido:
+                    self._hay_pendientes.wait()
+                if self._detenido:
+                    return
+            # Los cambios que lleguen mientras tanto salen en la misma escritura.
+            self._despertar.wait(self.retraso_s)
+            self._guardar_pendientes()
+
+    def _guardar_pendientes(self):
+        with self._lock_disco:
+            with self._lock:
+                pendientes, self._pendientes = self._pendientes, set()
+                copias = {n: dict(self._metas[n]) for n in pendientes if n in self._metas}
+            if not copias:
+                return
+            for nombre, meta in copias.items():
+                try:
+                    _escribir_json_atomico(os.path.join(self.directorio, nombre, "meta.json"), meta)
+                    self.metricas["escrituras"] += 1
+                except Exception as e:
+                    registrar_log(nombre, f"[WARN] No se pudo guardar meta.json: {e}")
+            self.metricas["guardados"] += 1
+        if self.al_guardar:
+            self.al_guardar()
+
+    def vaciar(self):
+        # Escribe ya lo pendiente y espera a que termine cualquier escritura en curso.
+        self._guardar_pendientes()
+
+    def detener(self, timeout: float = 10.0):
+        with self._lock:
+            self._detenido = True
+            self._hay_pendientes.notify_all()
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+            self._hilo = None
+        self._guardar_pendientes()
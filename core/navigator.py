@@ -1,96 +1,423 @@
 import os
 import time
+import asyncio
+import itertools
 from datetime import datetime
-from playwright.sync_api import sync_playwright
+from urllib.parse import urlsplit
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from core.log_handler import registrar_log
+from core.browser_pool import pool_navegadores
+from core.session_cache import CacheSesiones
+from core.resource_filter import FiltroRecursos, combinar_reglas
+from core.capture_pipeline import pipeline_capturas, opciones_captura, extension
 
-def ejecutar_navegacion(rpa_config, screenshot_dir="Reportes"):
+ESPERA_MAXIMA_POR_DEFECTO_MS = 30000
+BUFFER_RESOURCE_TIMING = 2000
+ESTABLE_POR_DEFECTO_MS = 500
+
+# Alterna qué carga de la comparación con/sin bloqueo va primero.
+_turnos_medicion = itertools.count()
+
+# Navigation Timing + Resource Timing + LCP del documento actual, en ms desde navigationStart.
+JS_METRICAS_NAVEGACION = """
+async () => {
+    const nav = performance.getEntriesByType("navigation")[0];
+    const recursos = performance.getEntriesByType("resource");
+    let lcp = null;
+    try {
+        lcp = await new Promise((resolve) => {
+            let ultimo = null;
+            const observer = new PerformanceObserver((lista) => {
+                const entradas = lista.getEntries();
+                if (entradas.length) ultimo = entradas[entradas.length - 1].startTime;
+            });
+            observer.observe({type: "largest-contentful-paint", buffered: true});
+            setTimeout(() => {
+                const pendientes = observer.takeRecords();
+                if (pendientes.length) ultimo = pendientes[pendientes.length - 1].startTime;
+                observer.disconnect();
+                resolve(ultimo);
+            }, 50);
+        });
+    } catch (e) {
+        lcp = null;
+    }
+    if (!nav) {
+        return null;
+    }
+    const redondear = (valor) => (valor === null || valor === undefined ? null : Math.round(valor));
+    return {
+        dns_ms: redondear(nav.domainLookupEnd - nav.domainLookupStart),
+        conexion_ms: redondear(nav.connectEnd - nav.connectStart),
+        tls_ms: redondear(nav.secureConnectionStart > 0 ? nav.connectEnd - nav.secureConnectionStart : 0),
+        ttfb_ms: redondear(nav.responseStart - nav.requestStart),
+        dom_content_loaded_ms: redondear(nav.domContentLoadedEventEnd),
+        load_ms: redondear(nav.loadEventEnd),
+        lcp_ms: redondear(lcp),
+        recursos: recursos.length,
+        bytes_transferidos: (nav.transferSize || 0) + recursos.reduce((total, r) => total + (r.transferSize || 0), 0)
+    };
+}
+"""
+
+# Resuelve True cuando el DOM pasa estableMs sin mutaciones, o False al llegar a maximoMs.
+JS_DOM_ESTABLE = """
+([estableMs, maximoMs]) => new Promise((resolve) => {
+    let temporizador = null;
+    let limite = null;
+    const observer = new MutationObserver(() => reiniciar());
+    const terminar = (estable) => {
+        observer.disconnect();
+        clearTimeout(temporizador);
+        clearTimeout(limite);
+        resolve(estable);
+    };
+    const reiniciar = () => {
+        clearTimeout(temporizador);
+        temporizador = setTimeout(() => terminar(true), estableMs);
+    };
+    limite = setTimeout(() => terminar(false), maximoMs);
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    reiniciar();
+})
+"""
+
+def ejecutar_navegacion(rpa_config, screenshot_dir="Reportes", ruta_enc=None, ruta_key=None):
     rpa_data = rpa_config.get("rpa", {})
     url_rutas = rpa_data.get("url_ruta", [])
-    nombre_rpa = rpa_data.get("nombre", "RPA")
 
     if not url_rutas:
         raise ValueError("No se encontraron rutas de navegación.")
 
+    # Carpeta por RPA: las ejecuciones concurrentes no se pisan las capturas.
+    screenshot_dir = os.path.join(screenshot_dir, rpa_data.get("nombre", "RPA"))
     os.makedirs(screenshot_dir, exist_ok=True)
+    sesiones = CacheSesiones(os.path.dirname(ruta_enc), ruta_key, rpa_data.get("nombre", "RPA")) if ruta_enc and ruta_key else None
+    return pool_navegadores.ejecutar(_navegar(rpa_config, screenshot_dir, sesiones))
+
+class _GrupoAuth:
+    # Rutas de una ejecución que comparten identidad de autenticación y, por
+    # tanto, un mismo contexto (cookies y storage) con un único login.
+    def __init__(self, identidad, form=None):
+        self.identidad = identidad
+        self.form = form
+        self.contexto = None
+        self.lock = asyncio.Lock()
+        self.autenticado = False
+        self.estado_en_cache = False
+
+def _identidad_auth(ruta):
+    if not ruta.get("requiere_autenticacion", False):
+        return None
+    tipo_auth = ruta.get("tipo_autenticacion", "")
+    if tipo_auth == "http_basic":
+        creds = ruta.get("http_basic", {})
+        return f"http_basic|{creds.get('username', '')}|{creds.get('password', '')}"
+    if tipo_auth == "form_js":
+        url = urlsplit(ruta.get("url", ""))
+        return f"form_js|{url.scheme}://{url.netloc}|{ruta.get('form_js', {}).get('username_value', '')}"
+    return None
+
+async def _navegar(rpa_config, screenshot_dir, sesiones=None):
+    rpa_data = rpa_config.get("rpa", {})
+    url_rutas = rpa_data.get("url_ruta", [])
+    nombre_rpa = rpa_data.get("nombre", "RPA")
+    paralelismo = max(1, int(rpa_data.get("paralelismo", 1) or 1))
+
     now = datetime.now()
-    timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
     safe_timestamp = now.strftime("%Y-%m-%d_%H-%M-%S") if rpa_data.get("modo_navegador_visible", False) else "headless"
 
-    capturas = []
-    detalles = []
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(
-            headless=not rpa_data.get("modo_navegador_visible", False),
-            args=["--ignore-certificate-errors"]
-        )
-
-        for idx, ruta in enumerate(url_rutas):
-            url_actual = ruta.get("url")
-            wait_time = int(ruta.get("wait_time_ms", 0))
-            capturar = ruta.get("capturar", False)
-            requiere_auth = ruta.get("requiere_autenticacion", False)
-            tipo_auth = ruta.get("tipo_autenticacion", "")
-
-            if not url_actual:
-                raise ValueError(f"URL vacía en la posición {idx + 1}")
-
-            context_args = {
-                "viewport": {
-                    "width": rpa_data.get("pantalla", {}).get("viewport_width", 1920),
-                    "height": rpa_data.get("pantalla", {}).get("viewport_height", 1080)
-                },
-                "ignore_https_errors": True
+    grupos = {}
+    for idx, ruta in enumerate(url_rutas):
+        if not ruta.get("url"):
+            raise ValueError(f"URL vacía en la posición {idx + 1}")
+        identidad = _identidad_auth(ruta)
+        if identidad and identidad not in grupos:
+            grupos[identidad] = _GrupoAuth(identidad, ruta.get("form_js") if identidad.startswith("form_js") else None)
+
+    headless = not rpa_data.get("modo_navegador_visible", False)
+    async with pool_navegadores.sesion(headless) as sesion:
+        estado = "reutilizado" if sesion.reutilizado else "iniciado"
+        registrar_log(nombre_rpa, f"Navegador {estado} en {sesion.tiempo_obtencion:.2f}s")
+
+        if paralelismo == 1:
+            resultados = [
+                await _procesar_ruta(idx, ruta, rpa_data, sesion, screenshot_dir, safe_timestamp, grupos, sesiones)
+                for idx, ruta in enumerate(url_rutas)
+            ]
+        else:
+            registrar_log(nombre_rpa, f"Modo paralelo: hasta {paralelismo} rutas simultáneas")
+            semaforo = asyncio.Semaphore(paralelismo)
+
+            async def _limitada(idx, ruta):
+                async with semaforo:
+                    return await _procesar_ruta(idx, ruta, rpa_data, sesion, screenshot_dir, safe_timestamp, grupos, sesiones)
+
+            tareas = [asyncio.ensure_future(_limitada(idx, ruta)) for idx, ruta in enumerate(url_rutas)]
+            try:
+                # gather conserva el orden de url_ruta aunque terminen en otro orden.
+                resultados = await asyncio.gather(*tareas)
+            except Exception:
+                for tarea in tareas:
+                    tarea.cancel()
+                await asyncio.gather(*tareas, return_exceptions=True)
+                raise
+
+        # Las capturas se codifican en segundo plano; aquí se espera a que terminen todas.
+        for _, detalle, codificacion in resultados:
+            if codificacion is not None:
+                informe = await codificacion
+                detalle["captura_bytes_originales"] = informe["bytes_originales"]
+                detalle["captura_bytes_finales"] = informe["bytes_finales"]
+
+    capturas = [captura for captura, _, _ in resultados if captura]
+    detalles = [detalle for _, detalle, _ in resultados]
+    return capturas, detalles
+
+def _argumentos_contexto(rpa_data, ruta):
+    context_args = {
+        "viewport": {
+            "width": rpa_data.get("pantalla", {}).get("viewport_width", 1920),
+            "height": rpa_data.get("pantalla", {}).get("viewport_height", 1080)
+        },
+        "ignore_https_errors": True
+    }
+
+    if ruta.get("requiere_autenticacion", False) and ruta.get("tipo_autenticacion", "") == "http_basic":
+        creds = ruta.get("http_basic", {})
+        context_args["http_credentials"] = {
+            "username": creds.get("username", ""),
+            "password": creds.get("password", "")
+        }
+    return context_args
+
+async def _contexto_de_grupo(grupo, rpa_data, ruta, sesion, sesiones):
+    async with grupo.lock:
+        if grupo.contexto is None:
+            context_args = _argumentos_contexto(rpa_data, ruta)
+            if grupo.form is not None and sesiones:
+                estado = sesiones.cargar(grupo.identidad)
+                if estado:
+                    context_args["storage_state"] = estado
+                    grupo.estado_en_cache = True
+            grupo.contexto = await sesion.nuevo_contexto(**context_args)
+        return grupo.contexto
+
+async def _login_form_js(page, form, nombre_rpa):
+    inicio = time.monotonic()
+    try:
+        await page.fill(form.get("username_selector", "#username"), form["username_value"])
+        await page.fill(form.get("password_selector", "#password"), form["password_value"])
+        login_action = form.get("login_action", "Enter")
+        if login_action.lower() == "enter":
+            await page.keyboard.press("Enter")
+        else:
+            await page.click(login_action)
+    except Exception as e:
+        registrar_log(nombre_rpa, f"[ERROR] Fallo al aplicar autenticación form_js: {e}")
+        raise
+    return int((time.monotonic() - inicio) * 1000)
+
+async def _pide_login(page, form):
+    # Una sesión reutilizada es válida salvo que, ya cargada, la página muestre el login.
+    url_login = form.get("url_login")
+    if url_login and url_login in page.url:
+        return True
+    try:
+        return await page.locator(form.get("username_selector", "#username")).first.is_visible()
+    except Exception:
+        return False
+
+async def _esperar_condicion(page, espera, maximo_ms):
+    tipo = espera.get("tipo")
+    if tipo == "network_idle":
+        await page.wait_for_load_state("networkidle", timeout=maximo_ms)
+    elif tipo == "selector":
+        await page.wait_for_selector(espera["selector"], state="visible", timeout=maximo_ms)
+    elif tipo == "js":
+        await page.wait_for_function(espera["expresion"], timeout=maximo_ms)
+    elif tipo == "dom_estable":
+        estable_ms = int(espera.get("estable_ms", ESTABLE_POR_DEFECTO_MS))
+        if not await page.evaluate(JS_DOM_ESTABLE, [estable_ms, maximo_ms]):
+            raise PlaywrightTimeoutError(f"El DOM no se estabilizó en {maximo_ms} ms")
+    else:
+        raise ValueError(f"Tipo de espera no válido: {tipo}")
+
+async def _esperar(page, ruta, nombre_rpa):
+    # Con "espera" en la ruta se aguarda la condición de listo y wait_time_ms
+    # actúa sólo como tope; sin ella se mantiene la espera fija.
+    wait_time = int(ruta.get("wait_time_ms", 0))
+    espera = ruta.get("espera")
+    inicio = time.monotonic()
+
+    if not espera:
+        if wait_time > 0:
+            registrar_log(nombre_rpa, f"Esperando {wait_time} ms...")
+            await page.wait_for_timeout(wait_time)
+        return {"condicion": "fija", "real_ms": int((time.monotonic() - inicio) * 1000), "max_ms": wait_time, "cumplida": True}
+
+    maximo_ms = wait_time if wait_time > 0 else ESPERA_MAXIMA_POR_DEFECTO_MS
+    cumplida = True
+    try:
+        await _esperar_condicion(page, espera, maximo_ms)
+    except PlaywrightTimeoutError:
+        cumplida = False
+        registrar_log(nombre_rpa, f"[WARN] Condición '{espera.get('tipo')}' no cumplida en {maximo_ms} ms; se continúa.")
+    real_ms = int((time.monotonic() - inicio) * 1000)
+    registrar_log(nombre_rpa, f"Página lista ({espera.get('tipo')}) en {real_ms} ms de {maximo_ms} ms máx.")
+    return {"condicion": espera.get("tipo"), "real_ms": real_ms, "max_ms": maximo_ms, "cumplida": cumplida}
+
+async def _abrir_ruta(page, ruta, grupo, form, sesiones, nombre_rpa):
+    # Navega, espera y hace login sólo cuando hace falta. Devuelve el tiempo de
+    # carga, si hubo login (para guardar el nuevo storage_state) y la espera.
+    tiempo_inicio = time.time()
+    await page.goto(ruta.get("url"), timeout=60000)
+    tiempo_carga = round(time.time() - tiempo_inicio, 2)
+
+    hizo_login = False
+    login_ms = 0
+    if form is not None and not grupo.autenticado and not grupo.estado_en_cache:
+        login_ms += await _login_form_js(page, form, nombre_rpa)
+        hizo_login = True
+
+    espera = await _esperar(page, ruta, nombre_rpa)
+
+    if form is not None and not hizo_login and await _pide_login(page, form):
+        if sesiones and grupo.estado_en_cache:
+            sesiones.invalidar(grupo.identidad)
+            grupo.estado_en_cache = False
+            registrar_log(nombre_rpa, "[i] Sesión guardada expirada; se repite el login.")
+        login_ms += await _login_form_js(page, form, nombre_rpa)
+        hizo_login = True
+        segunda = await _esperar(page, ruta, nombre_rpa)
+        espera["real_ms"] += segunda["real_ms"]
+        espera["cumplida"] = segunda["cumplida"]
+    elif form is not None and not hizo_login and not grupo.autenticado:
+        registrar_log(nombre_rpa, "[i] Sesión guardada reutilizada, sin login.")
+
+    if grupo:
+        grupo.autenticado = True
+    espera["login_ms"] = login_ms
+    return tiempo_carga, hizo_login, espera
+
+async def _carga_de_referencia(sesion, context_args, url_actual, reglas, aplicar):
+    context = await sesion.nuevo_contexto(**context_args)
+    try:
+        page = await context.new_page()
+        filtro = FiltroRecursos(reglas, aplicar=aplicar)
+        await filtro.instalar(page)
+        inicio = time.time()
+        await page.goto(url_actual, timeout=60000)
+        return round(time.time() - inicio, 2), await filtro.totales()
+    finally:
+        await context.close()
+
+async def _medir_sin_bloqueo(sesion, context_args, url_actual, reglas):
+    # Dos cargas de referencia, con y sin bloqueo, en igualdad de condiciones:
+    # cada una en un contexto nuevo (caché fría, misma sesión) y con el mismo
+    # enrutado (ver FiltroRecursos). El navegador sí comparte DNS y conexiones
+    # entre contextos, así que la segunda carga parte con ventaja: el orden se
+    # alterna entre mediciones para que no favorezca siempre a la misma.
+    orden = (True, False) if next(_turnos_medicion) % 2 == 0 else (False, True)
+    cargas = {}
+    for aplicar in orden:
+        cargas[aplicar] = await _carga_de_referencia(sesion, context_args, url_actual, reglas, aplicar)
+    (tiempo_con, _), (tiempo_sin, referencia) = cargas[True], cargas[False]
+    return tiempo_con, tiempo_sin, referencia
+
+async def _procesar_ruta(idx, ruta, rpa_data, sesion, screenshot_dir, safe_timestamp, grupos, sesiones=None):
+    nombre_rpa = rpa_data.get("nombre", "RPA")
+    url_actual = ruta.get("url")
+    capturar = ruta.get("capturar", False)
+    grupo = grupos.get(_identidad_auth(ruta))
+    form = ruta.get("form_js", {}) if grupo and grupo.form is not None else None
+
+    captura = None
+    codificacion = None
+    if grupo:
+        context = await _contexto_de_grupo(grupo, rpa_data, ruta, sesion, sesiones)
+    else:
+        context = await sesion.nuevo_contexto(**_argumentos_contexto(rpa_data, ruta))
+    page = await context.new_page()
+    reglas = combinar_reglas(rpa_data, ruta)
+    filtro = FiltroRecursos(reglas) if reglas else None
+    bloqueo = {}
+    try:
+        if filtro:
+            await filtro.instalar(page)
+        await page.add_init_script(f"performance.setResourceTimingBufferSize({BUFFER_RESOURCE_TIMING})")
+        registrar_log(nombre_rpa, f"[{idx + 1}] Navegando a: {url_actual}")
+
+        if grupo and not grupo.autenticado:
+            # La primera ruta del grupo autentica; las demás esperan a que termine.
+            async with grupo.lock:
+                tiempo_carga, hizo_login, espera = await _abrir_ruta(page, ruta, grupo, form, sesiones, nombre_rpa)
+        else:
+            tiempo_carga, hizo_login, espera = await _abrir_ruta(page, ruta, grupo, form, sesiones, nombre_rpa)
+
+        try:
+            metricas = await page.evaluate(JS_METRICAS_NAVEGACION)
+        except Exception as e:
+            metricas = None
+            registrar_log(nombre_rpa, f"[WARN] No se pudieron leer las métricas de navegación: {e}")
+
+        if hizo_login and sesiones:
+            try:
+                sesiones.guardar(grupo.identidad, await context.storage_state())
+                grupo.estado_en_cache = True
+            except Exception as e:
+                registrar_log(nombre_rpa, f"[WARN] No se pudo guardar la sesión: {e}")
+
+        nombre_captura = None
+        if capturar:
+            opciones = opciones_captura(rpa_data, ruta)
+            nombre_captura = f"captura_{idx + 1}_{safe_timestamp}{extension(opciones)}"
+            path = os.path.join(screenshot_dir, nombre_captura)
+            if opciones.get("selector"):
+                png = await page.locator(opciones["selector"]).first.screenshot()
+            else:
+                full_page = rpa_data.get("pantalla", {}).get("captura_pagina_completa", True)
+                png = await page.screenshot(full_page=full_page)
+            codificacion = pipeline_capturas.codificar(png, path, opciones)
+            captura = (url_actual, path)
+            registrar_log(nombre_rpa, f"Captura tomada: {path}")
+
+        if filtro:
+            totales = await filtro.totales()
+            bloqueo = {
+                "peticiones_bloqueadas": totales["bloqueadas"],
+                "bytes_transferidos": totales["bytes_transferidos"],
+                "bytes_ahorrados": None,
+                "tiempo_carga_con_bloqueo": None,
+                "tiempo_carga_sin_bloqueo": None
             }
+            if reglas.get("medir_sin_bloqueo"):
+                context_args = _argumentos_contexto(rpa_data, ruta)
+                if grupo:
+                    # Con la sesión ya iniciada, para medir la misma página que se capturó.
+                    context_args["storage_state"] = await context.storage_state()
+                tiempo_con, tiempo_sin, referencia = await _medir_sin_bloqueo(sesion, context_args, url_actual, reglas)
+                bloqueo["bytes_ahorrados"] = referencia["bytes_transferidos"]
+                bloqueo["tiempo_carga_con_bloqueo"] = tiempo_con
+                bloqueo["tiempo_carga_sin_bloqueo"] = tiempo_sin
+    finally:
+        if grupo:
+            await page.close()
+        else:
+            await context.close()
 
-            if requiere_auth and tipo_auth == "http_basic":
-                creds = ruta.get("http_basic", {})
-                context_args["http_credentials"] = {
-                    "username": creds.get("username", ""),
-                    "password": creds.get("password", "")
-                }
-
-            with browser.new_context(**context_args) as context:
-                page = context.new_page()
-                registrar_log(nombre_rpa, f"[{idx + 1}] Navegando a: {url_actual}")
-
-                tiempo_inicio = time.time()
-                page.goto(url_actual, timeout=60000)
-                tiempo_fin = time.time()
-                tiempo_carga = round(tiempo_fin - tiempo_inicio, 2)
-
-                if requiere_auth and tipo_auth == "form_js":
-                    form = ruta.get("form_js", {})
-                    try:
-                        page.fill(form.get("username_selector", "#username"), form["username_value"])
-                        page.fill(form.get("password_selector", "#password"), form["password_value"])
-                        login_action = form.get("login_action", "Enter")
-                        if login_action.lower() == "enter":
-                            page.keyboard.press("Enter")
-                        else:
-                            page.click(login_action)
-                    except Exception as e:
-                        registrar_log(nombre_rpa, f"[ERROR] Fallo al aplicar autenticación form_js: {e}")
-                        raise
-
-                if wait_time > 0:
-                    registrar_log(nombre_rpa, f"Esperando {wait_time} ms...")
-                    page.wait_for_timeout(wait_time)
-
-                nombre_captura = None
-                if capturar:
-                    nombre_captura = f"captura_{idx + 1}_{safe_timestamp}.png"
-                    path = os.path.join(screenshot_dir, nombre_captura)
-                    full_page = rpa_data.get("pantalla", {}).get("captura_pagina_completa", True)
-                    page.screenshot(path=path, full_page=full_page)
-                    capturas.append((url_actual, path))
-                    registrar_log(nombre_rpa, f"Captura tomada: {path}")
-
-                detalles.append({
-                    "url": url_actual,
-                    "tiempo_carga": tiempo_carga,
-                    "nombre_captura": nombre_captura
-                })
-
-    return capturas, detalles
\ No newline at end of file
+    detalle = {
+        "url": url_actual,
+        "tiempo_carga": tiempo_carga,
+        "nombre_captura": nombre_captura,
+        "navegador_reutilizado": sesion.reutilizado,
+        "login_realizado": hizo_login,
+        "login_ms": espera["login_ms"],
+        "metricas": metricas,
+        "espera_condicion": espera["condicion"],
+        "espera_real_ms": espera["real_ms"],
+        "espera_max_ms": espera["max_ms"],
+        "espera_cumplida": espera["cumplida"],
+        **bloqueo
+    }
+    return captura, detalle, codificacion
@@ -0,0 +1,89 @@
+import time
+import bisect
+from typing import Dict, List, Tuple
+
+DURACION_POR_DEFECTO_S = 60.0
+
+# Reparte los inicios de los RPAs dentro de su ventana de tolerancia para
+# aplanar el pico de ejecuciones simultáneas. Cada RPA reserva el intervalo
+# [inicio, inicio + duración estimada] de su próxima ejecución; un RPA con
+# ventana elige, entre los instantes candidatos, el que deja menor
+# concurrencia máxima (y, a igualdad, el más cercano a su hora nominal).
+# Al dispararse, la reserva pasa a "en curso" y se mantiene hasta que el pool
+# de ejecución avisa de que terminó (terminar); mientras tanto el RPA ya tiene
+# reservada también su siguiente ejecución. Una ejecución que dura más de lo
+# estimado sigue ocupando hueco hasta que termina.
+class PlanificadorCarga:
+
+    def __init__(self, paso_s: int = 60):
+        self.paso_s = paso_s
+        self._reservas: Dict[str, Tuple[float, float]] = {}
+        self._en_curso: Dict[str, Tuple[float, float]] = {}
+
+    def _perfil(self, desde: float, hasta: float, excluir: str) -> Tuple[List[float], List[int]]:
+        eventos = []
+        ahora = time.time()
+        reservas = [(n, r) for n, r in self._reservas.items() if n != excluir]
+        reservas += [(n, (inicio, max(fin, ahora + self.paso_s))) for n, (inicio, fin) in self._en_curso.items()]
+        for nombre, (inicio, fin) in reservas:
+            if inicio < hasta and fin > desde:
+                eventos.append((inicio, 1))
+                eventos.append((fin, -1))
+        eventos.sort()
+
+        instantes: List[float] = []
+        niveles: List[int] = []
+        nivel = 0
+        for instante, delta in eventos:
+            nivel += delta
+            if instantes and instantes[-1] == instante:
+                niveles[-1] = nivel
+            else:
+                instantes.append(instante)
+                niveles.append(nivel)
+        return instantes, niveles
+
+    @staticmethod
+    def _pico(instantes: List[float], niveles: List[int], inicio: float, fin: float) -> int:
+        i = bisect.bisect_right(instantes, inicio)
+        pico = niveles[i - 1] if i > 0 else 0
+        while i < len(instantes) and instantes[i] < fin:
+            pico = max(pico, niveles[i])
+            i += 1
+        return pico
+
+    def planificar(self, nombre: str, nominal: float, ventana_s: float, duracion_s: float) -> float:
+        duracion_s = max(float(duracion_s or DURACION_POR_DEFECTO_S), 1.0)
+        if ventana_s <= 0:
+            self._reservas[nombre] = (nominal, nominal + duracion_s)
+            return nominal
+
+        limite = nominal + ventana_s
+        instantes, niveles = self._perfil(nominal, limite + duracion_s, nombre)
+
+        candidatos = {nominal + k * self.paso_s for k in range(int(ventana_s // self.paso_s) + 1)}
+        # Los finales de ejecuciones ya reservadas son los mejores huecos posibles.
+        candidatos.update(t for t in instantes if nominal < t <= limite)
+
+        elegido = min(
+            sorted(candidatos),
+            key=lambda c: self._pico(instantes, niveles, c, c + duracion_s)
+        )
+        self._reservas[nombre] = (elegido, elegido + duracion_s)
+        return elegido
+
+    def iniciar(self, nombre: str) -> bool:
+        # La reserva de la ejecución que se dispara pasa a en curso. Devuelve False
+        # si la anterior sigue en curso (el pool descartará este disparo).
+        reserva = self._reservas.pop(nombre, None)
+        if reserva is None or nombre in self._en_curso:
+            return False
+        self._en_curso[nombre] = reserva
+        return True
+
+    def terminar(self, nombre: str):
+        self._en_curso.pop(nombre, None)
+
+    def liberar(self, nombre: str):
+        # Sólo la próxima ejecución: una en curso se libera al terminar.
+        self._reservas.pop(nombre, None)
@@ -0,0 +1,73 @@
+import asyncio
+from fnmatch import fnmatch
+from typing import Dict, Optional
+
+# Filtro declarativo de peticiones por página. Las reglas vienen de
+# rpa.bloqueo_recursos y pueden sobrescribirse por ruta con la misma clave:
+#   "tipos":    tipos de recurso de Playwright a bloquear (font, media, image...)
+#   "patrones": patrones glob de URL a bloquear
+#   "permitir": patrones glob que nunca se bloquean (tienen prioridad)
+def combinar_reglas(rpa_data: Dict, ruta: Dict) -> Optional[Dict]:
+    reglas = dict(rpa_data.get("bloqueo_recursos") or {})
+    reglas.update(ruta.get("bloqueo_recursos") or {})
+    if not (reglas.get("tipos") or reglas.get("patrones")):
+        return None
+    return reglas
+
+# Con aplicar=False no bloquea nada: es la carga de referencia, que cuenta lo
+# que se habría bloqueado y suma sólo sus bytes, es decir, lo que el bloqueo ahorra.
+# Enruta igualmente todas las peticiones (y las deja pasar): en Playwright
+# enrutar desactiva la caché HTTP, y así las dos cargas que se comparan la
+# tienen desactivada por igual.
+class FiltroRecursos:
+
+    def __init__(self, reglas: Optional[Dict], aplicar: bool = True):
+        self.reglas = reglas or {}
+        self.aplicar = aplicar
+        self.tipos = set(self.reglas.get("tipos", []))
+        self.patrones = list(self.reglas.get("patrones", []))
+        self.permitir = list(self.reglas.get("permitir", []))
+        self.peticiones = 0
+        self.bloqueadas = 0
+        self.bytes_transferidos = 0
+        self._pendientes = []
+
+    def bloquea(self, url: str, tipo: str) -> bool:
+        if any(fnmatch(url, patron) for patron in self.permitir):
+            return False
+        return tipo in self.tipos or any(fnmatch(url, patron) for patron in self.patrones)
+
+    async def instalar(self, page):
+        async def enrutar(route):
+            peticion = route.request
+            self.peticiones += 1
+            if self.bloquea(peticion.url, peticion.resource_type):
+                self.bloqueadas += 1
+                if self.aplicar:
+                    await route.abort("blockedbyclient")
+                    return
+            await route.continue_()
+
+        def al_terminar(peticion):
+            if self.aplicar or self.bloquea(peticion.url, peticion.resource_type):
+                self._pendientes.append(asyncio.ensure_future(self._sumar_bytes(peticion)))
+
+        await page.route("**/*", enrutar)
+        page.on("requestfinished", al_terminar)
+
+    async def _sumar_bytes(self, peticion):
+        try:
+            tamanos = await peticion.sizes()
+            self.bytes_transferidos += max(tamanos.get("responseBodySize", 0), 0) + max(tamanos.get("responseHeadersSize", 0), 0)
+        except Exception:
+            pass
+
+    async def totales(self) -> Dict:
+        if self._pendientes:
+            await asyncio.gather(*self._pendientes, return_exceptions=True)
+            self._pendientes.clear()
+        return {
+            "peticiones": self.peticiones,
+            "bloqueadas": self.bloqueadas,
+            "bytes_transferidos": self.bytes_transferidos
+        }
@@ -1,10 +1,12 @@
-import os
-import json
+import uuid
 import traceback
 from datetime import datetime
 from core.log_handler import registrar_log
+from core.execution_store import historial_ejecuciones
 from core.crypto_utils import descifrar_configuracion
-from core.mail_sender import enviar_reporte_por_correo
+from core.mail_sender import configuracion_smtp, destinatarios_correo, escribir_mensaje
+from core.mail_spool import cola_correo
+from core.mail_digest import agrupador_resumen, modo_resumen
 from core.navigator import ejecutar_navegacion
 
 
@@ -16,54 +18,69 @@ def ejecutar_rpa(ruta_enc: str, ruta_key: str) -> str:
 
         nombre_rpa = config.get("rpa", {}).get("nombre", "RPA")
         registrar_log(nombre_rpa, "RPA: Inicio de ejecución")
+        inicio = datetime.now()
+        id_ejecucion = uuid.uuid4().hex
+        historial_ejecuciones.iniciar_ejecucion(id_ejecucion, nombre_rpa, inicio)
+        detalles, capturas = [], []
 
         registrar_log(nombre_rpa, "RPA: Iniciando navegación y captura de URLs")
-        capturas, detalles = ejecutar_navegacion(config)
+        capturas, detalles = ejecutar_navegacion(config, ruta_enc=ruta_enc, ruta_key=ruta_key)
 
         for detalle in detalles:
             registrar_log(nombre_rpa, f"RPA: URL accedida → {detalle.get('url')}")
             registrar_log(nombre_rpa, f"RPA: Tiempo de carga → {detalle.get('tiempo_carga', '?')}s")
+            metricas = detalle.get("metricas")
+            if metricas:
+                registrar_log(
+                    nombre_rpa,
+                    f"RPA: Métricas del navegador → DNS {metricas['dns_ms']} ms, conexión {metricas['conexion_ms']} ms, "
+                    f"TTFB {metricas['ttfb_ms']} ms, DOMContentLoaded {metricas['dom_content_loaded_ms']} ms, "
+                    f"load {metricas['load_ms']} ms, LCP {metricas['lcp_ms']} ms, "
+                    f"{metricas['recursos']} recursos, {metricas['bytes_transferidos']} bytes"
+                )
+            if detalle.get("login_realizado"):
+                registrar_log(nombre_rpa, f"RPA: Login → {detalle.get('login_ms', '?')} ms")
+            registrar_log(nombre_rpa, f"RPA: Espera ({detalle.get('espera_condicion', 'fija')}) → {detalle.get('espera_real_ms', '?')} ms de {detalle.get('espera_max_ms', '?')} ms máx.")
+            if "peticiones_bloqueadas" in detalle:
+                texto = f"RPA: Recursos bloqueados → {detalle['peticiones_bloqueadas']} peticiones, {detalle['bytes_transferidos']} bytes transferidos"
+                if detalle.get("bytes_ahorrados") is not None:
+                    texto += (f", {detalle['bytes_ahorrados']} bytes ahorrados, carga de referencia "
+                              f"{detalle['tiempo_carga_con_bloqueo']}s con bloqueo / {detalle['tiempo_carga_sin_bloqueo']}s sin bloqueo")
+                registrar_log(nombre_rpa, texto)
             registrar_log(nombre_rpa, f"RPA: Captura realizada → {detalle.get('nombre_captura', 'No capturada')}")
+            if "captura_bytes_finales" in detalle:
+                registrar_log(nombre_rpa, f"RPA: Tamaño de captura → {detalle['captura_bytes_originales']} → {detalle['captura_bytes_finales']} bytes")
 
         registrar_log(nombre_rpa, f"RPA: Total de capturas realizadas → {len(capturas)}")
 
-        registrar_log(nombre_rpa, "RPA: Enviando correo...")
-        enviar_reporte_por_correo(
-            config.get("correo", {}),
-            config.get("rpa", {}),
-            capturas,
-            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        )
-        registrar_log(nombre_rpa, "RPA: Envío de correo completado")
+        # El correo se entrega desde el spool: la ejecución termina sin esperar al servidor SMTP.
+        correo = config.get("correo", {})
+        smtp, usar_remoto = configuracion_smtp(correo)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if modo_resumen(correo):
+            grupo = agrupador_resumen.agregar(correo, config.get("rpa", {}), capturas, timestamp, id_ejecucion)
+            registrar_log(nombre_rpa, f"RPA: Reporte añadido al resumen de correo → {grupo}")
+        else:
+            id_mensaje = cola_correo.encolar(
+                lambda archivo: escribir_mensaje(correo, config.get("rpa", {}), capturas, timestamp, archivo),
+                destinatarios_correo(correo),
+                f"{smtp.get('servidor')}:{smtp.get('puerto')}",
+                nombre_rpa,
+                smtp,
+                usar_remoto,
+                [id_ejecucion]
+            )
+            registrar_log(nombre_rpa, f"RPA: Correo encolado para envío → {id_mensaje}")
 
         registrar_log(nombre_rpa, "RPA: Ejecución finalizada")
-        _incrementar_contador_ejecuciones(ruta_enc)
+        historial_ejecuciones.finalizar_ejecucion(id_ejecucion, inicio, detalles, len(capturas))
 
         return "[SUCCESS] RPA ejecutado con éxito."
 
     except Exception as e:
         error_msg = f"RPA: Error durante ejecución → {str(e)}\n{traceback.format_exc()}"
         registrar_log(nombre_rpa if 'nombre_rpa' in locals() else "rpa_desconocido", error_msg)
+        if 'id_ejecucion' in locals():
+            historial_ejecuciones.finalizar_ejecucion(id_ejecucion, inicio, detalles, len(capturas), str(e) or type(e).__name__)
         return error_msg
 
-
-def _incrementar_contador_ejecuciones(ruta_enc: str):
-    carpeta_rpa = os.path.dirname(ruta_enc)
-    ruta_meta = os.path.join(carpeta_rpa, "meta.json")
-    datos = {}
-
-    if os.path.exists(ruta_meta):
-        try:
-            with open(ruta_meta, "r", encoding="utf-8") as f:
-                datos = json.load(f)
-        except Exception:
-            datos = {}
-
-    datos["ejecuciones"] = datos.get("ejecuciones", 0) + 1
-    datos["ultima_ejecucion"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    try:
-        with open(ruta_meta, "w", encoding="utf-8") as f:
-            json.dump(datos, f, indent=2, ensure_ascii=False)
-    except Exception as e:
-        print(f"[WARN] No se pudo actualizar meta.json: {e}")
\ No newline at end of file
@@ -1,61 +1,163 @@
 import os
 import json
+import time
+import shutil
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
 
 from core.rpa_executor import ejecutar_rpa
-from core.log_handler import registrar_log
+from core.log_handler import LOG_AGENTE, MARCA_INICIO_EJECUCION, registrar_log
+from core.crypto_utils import descifrar_configuracion, invalidar_cache_configuracion
 from core.scheduler import RPAScheduler
+from core.execution_pool import RPAExecutionPool
+from core.meta_registry import RegistroMetadatos
 
 DIRECTORIO_RPAS = os.path.join(os.getcwd(), "rpas_cargados")
 os.makedirs(DIRECTORIO_RPAS, exist_ok=True)
+RUTA_INDICE = os.path.join(DIRECTORIO_RPAS, "indice.json")
+HILOS_CARGA = min(8, (os.cpu_count() or 2) * 2)
+
+def _resumir_programacion(config: Optional[Dict]) -> str:
+    prog = (config or {}).get("programacion") or {}
+    if not prog:
+        return ""
+    return f"{prog.get('frecuencia')} cada {prog.get('intervalo')} desde {prog.get('hora_inicio')}"
 
 class RPAManager:
     def __init__(self):
         self.rpas: Dict[str, Dict] = {}
+        self.metadatos = RegistroMetadatos(DIRECTORIO_RPAS, al_guardar=self._guardar_indice)
         self.scheduler = RPAScheduler(self)
-        self._cargar_rpas()
+        self.pool = RPAExecutionPool()
+        self.pool.agregar_observador_fin(self.scheduler.ejecucion_terminada)
+        self.carga_completa = threading.Event()
+        self._observadores_carga: List[Callable[[], None]] = []
+        self._lock_indice = threading.Lock()
+        # Nombres que la interfaz ha tocado (alta, baja, renombre, activación)
+        # mientras corre la carga en segundo plano, que no debe pisarlos.
+        self._lock = threading.Lock()
+        self._tocados_en_carga: Optional[set] = set()
+        self._cargar_indice()
+        threading.Thread(target=self._cargar_rpas, name="RPACarga", daemon=True).start()
 
-    def _cargar_rpas(self):
-        for nombre in os.listdir(DIRECTORIO_RPAS):
+    def _cargar_indice(self):
+        # Vista inmediata desde el índice persistido; la carga real se completa en segundo plano.
+        try:
+            with open(RUTA_INDICE, "r", encoding="utf-8") as f:
+                indice = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            registrar_log(LOG_AGENTE, f"[WARN] No se pudo leer el índice de RPAs: {e}")
+            return
+
+        self.metadatos.cargar({nombre: entrada.get("meta", {}) for nombre, entrada in indice.items()})
+        for nombre, entrada in indice.items():
             ruta_rpa = os.path.join(DIRECTORIO_RPAS, nombre)
-            if os.path.isdir(ruta_rpa):
-                ruta_enc = os.path.join(ruta_rpa, "rpa_config.enc")
-                ruta_key = os.path.join(ruta_rpa, "rpa.key")
-                ruta_meta = os.path.join(ruta_rpa, "meta.json")
-
-                if os.path.isfile(ruta_enc) and os.path.isfile(ruta_key):
-                    meta = {
-                        "activo": True,
-                        "descripcion": "",
-                        "creacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "ejecuciones": 0
-                    }
-                    if os.path.isfile(ruta_meta):
-                        try:
-                            with open(ruta_meta, "r", encoding="utf-8") as f:
-                                meta.update(json.load(f))
-                        except Exception as e:
-                            registrar_log(nombre, f"[!] Error cargando meta.json: {e}")
-
-                    self.rpas[nombre] = {
-                        "enc": ruta_enc,
-                        "key": ruta_key,
-                        "meta": meta
-                    }
-
-                    if meta.get("activo"):
-                        self.scheduler.programar_si_corresponde(nombre, ruta_enc, ruta_key)
-
-    def _guardar_meta(self, nombre: str):
-        if nombre in self.rpas:
-            ruta = os.path.join(DIRECTORIO_RPAS, nombre, "meta.json")
+            self.rpas[nombre] = {
+                "enc": os.path.join(ruta_rpa, "rpa_config.enc"),
+                "key": os.path.join(ruta_rpa, "rpa.key"),
+                "programacion": entrada.get("programacion", ""),
+                "proxima_ejecucion": entrada.get("proxima_ejecucion"),
+                "desde_indice": True
+            }
+
+    def _leer_rpa(self, nombre: str) -> Optional[Tuple[str, Dict, Dict, Optional[Dict]]]:
+        ruta_rpa = os.path.join(DIRECTORIO_RPAS, nombre)
+        ruta_enc = os.path.join(ruta_rpa, "rpa_config.enc")
+        ruta_key = os.path.join(ruta_rpa, "rpa.key")
+        ruta_meta = os.path.join(ruta_rpa, "meta.json")
+
+        if not (os.path.isfile(ruta_enc) and os.path.isfile(ruta_key)):
+            return None
+
+        meta = {
+            "activo": True,
+            "descripcion": "",
+            "creacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "ejecuciones": 0
+        }
+        if os.path.isfile(ruta_meta):
             try:
-                with open(ruta, "w", encoding="utf-8") as f:
-                    json.dump(self.rpas[nombre]["meta"], f, indent=2, ensure_ascii=False)
+                with open(ruta_meta, "r", encoding="utf-8") as f:
+                    meta.update(json.load(f))
             except Exception as e:
-                registrar_log(nombre, f"[ERROR] No se pudo guardar meta.json: {e}")
+                registrar_log(nombre, f"[!] Error cargando meta.json: {e}")
+
+        config = None
+        try:
+            config = descifrar_configuracion(ruta_enc, ruta_key)
+        except Exception as e:
+            registrar_log(nombre, f"[!] No se pudo programar: {e}")
+
+        entrada = {
+            "enc": ruta_enc,
+            "key": ruta_key,
+            "programacion": _resumir_programacion(config)
+        }
+        return nombre, entrada, meta, config
+
+    def _cargar_rpas(self):
+        try:
+            nombres = [n for n in os.listdir(DIRECTORIO_RPAS) if os.path.isdir(os.path.join(DIRECTORIO_RPAS, n))]
+            with ThreadPoolExecutor(max_workers=HILOS_CARGA, thread_name_prefix="RPACarga") as executor:
+                resultados = [r for r in executor.map(self._leer_rpa, nombres) if r]
+
+            with self._lock:
+                tocados, self._tocados_en_carga = self._tocados_en_carga, None
+                # Lo leído de un RPA que se tocó durante la carga, o cuya carpeta ya no
+                # existe, está desfasado: manda lo que hizo la interfaz.
+                vigentes = [r for r in resultados
+                            if r[0] not in tocados and os.path.isdir(os.path.join(DIRECTORIO_RPAS, r[0]))]
+                self.metadatos.cargar({nombre: meta for nombre, _, meta, _ in vigentes})
+                encontrados = {r[0] for r in resultados}
+                for nombre, entrada, _, config in vigentes:
+                    self.rpas[nombre] = entrada
+                    if self.metadatos.obtener(nombre).get("activo") and config is not None:
+                        self.scheduler.programar_rpa(nombre, config, self.ejecutar_rpa)
+
+                # Sólo se descartan entradas del índice que ya no existen en disco.
+                for nombre, entrada in list(self.rpas.items()):
+                    if entrada.get("desde_indice") and nombre not in encontrados and nombre not in tocados:
+                        del self.rpas[nombre]
+                        self.metadatos.eliminar(nombre)
+            self._guardar_indice()
+        finally:
+            with self._lock:
+                self._tocados_en_carga = None
+            self.carga_completa.set()
+            for observador in list(self._observadores_carga):
+                observador()
+
+    def _tocar(self, *nombres: str):
+        with self._lock:
+            if self._tocados_en_carga is not None:
+                self._tocados_en_carga.update(nombres)
+
+    def agregar_observador_carga(self, observador: Callable[[], None]):
+        self._observadores_carga.append(observador)
+        if self.carga_completa.is_set():
+            observador()
+
+    def _guardar_indice(self):
+        with self._lock_indice:
+            indice = {}
+            for nombre, datos in list(self.rpas.items()):
+                proxima = self.scheduler.obtener_proxima_ejecucion(nombre)
+                indice[nombre] = {
+                    "meta": dict(self.metadatos.obtener(nombre)),
+                    "programacion": datos.get("programacion", ""),
+                    "proxima_ejecucion": proxima.strftime("%Y-%m-%d %H:%M:%S") if proxima else None
+                }
+            temporal = RUTA_INDICE + ".tmp"
+            try:
+                with open(temporal, "w", encoding="utf-8") as f:
+                    json.dump(indice, f, indent=2, ensure_ascii=False)
+                os.replace(temporal, RUTA_INDICE)
+            except Exception as e:
+                registrar_log(LOG_AGENTE, f"[WARN] No se pudo guardar el índice de RPAs: {e}")
 
     def agregar_rpa(self, nombre: str, ruta_enc: str, ruta_key: str, descripcion: str = "") -> bool:
         nombre = nombre.strip().replace(" ", "_")
@@ -65,42 +167,48 @@ class RPAManager:
         destino = os.path.join(DIRECTORIO_RPAS, nombre)
         os.makedirs(destino, exist_ok=True)
 
-        nueva_enc = os.path.join(destino, "rpa_config.enc")
-        nueva_key = os.path.join(destino, "rpa.key")
-
         try:
-            with open(ruta_enc, "rb") as f_in, open(nueva_enc, "wb") as f_out:
-                f_out.write(f_in.read())
-            with open(ruta_key, "rb") as f_in, open(nueva_key, "wb") as f_out:
-                f_out.write(f_in.read())
-
-            self.rpas[nombre] = {
-                "enc": nueva_enc,
-                "key": nueva_key,
-                "meta": {
-                    "activo": False,
-                    "descripcion": descripcion,
-                    "creacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "ejecuciones": 0
-                }
-            }
-            self._guardar_meta(nombre)
+            shutil.copyfile(ruta_enc, os.path.join(destino, "rpa_config.enc"))
+            shutil.copyfile(ruta_key, os.path.join(destino, "rpa.key"))
+            self.registrar_rpa(nombre, descripcion)
             registrar_log(nombre, f"[OK] RPA agregado correctamente.")
             return True
         except Exception as e:
             registrar_log(nombre, f"[ERROR] Fallo al agregar RPA: {e}")
             return False
 
+    def registrar_rpa(self, nombre: str, descripcion: str = ""):
+        # Da de alta un RPA cuyos archivos ya están en DIRECTORIO_RPAS/<nombre>.
+        self._tocar(nombre)
+        destino = os.path.join(DIRECTORIO_RPAS, nombre)
+        nueva_enc = os.path.join(destino, "rpa_config.enc")
+        invalidar_cache_configuracion(nueva_enc)
+        self.rpas[nombre] = {
+            "enc": nueva_enc,
+            "key": os.path.join(destino, "rpa.key")
+        }
+        self.metadatos.registrar(nombre, {
+            "activo": False,
+            "descripcion": descripcion,
+            "creacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "ejecuciones": 0
+        })
+
     def eliminar_rpa(self, nombre: str) -> bool:
         if nombre not in self.rpas:
             return False
+        self._tocar(nombre)
         try:
             self.scheduler.cancelar(nombre)
+            invalidar_cache_configuracion(self.rpas[nombre]["enc"])
             carpeta = os.path.dirname(self.rpas[nombre]["enc"])
-            for archivo in os.listdir(carpeta):
-                os.remove(os.path.join(carpeta, archivo))
-            os.rmdir(carpeta)
+            with self.metadatos.bloqueo_disco():
+                self.metadatos.eliminar(nombre)
+                for archivo in os.listdir(carpeta):
+                    os.remove(os.path.join(carpeta, archivo))
+                os.rmdir(carpeta)
             del self.rpas[nombre]
+            self._guardar_indice()
             registrar_log(nombre, "[INFO] RPA eliminado.")
             return True
         except Exception as e:
@@ -114,23 +222,26 @@ class RPAManager:
 
         carpeta_actual = os.path.join(DIRECTORIO_RPAS, nombre_actual)
         carpeta_nueva = os.path.join(DIRECTORIO_RPAS, nuevo_nombre)
+        self._tocar(nombre_actual, nuevo_nombre)
 
         try:
-            os.rename(carpeta_actual, carpeta_nueva)
+            with self.metadatos.bloqueo_disco():
+                os.rename(carpeta_actual, carpeta_nueva)
+                self.metadatos.renombrar(nombre_actual, nuevo_nombre)
+            invalidar_cache_configuracion(self.rpas[nombre_actual]["enc"])
             nueva_enc = os.path.join(carpeta_nueva, "rpa_config.enc")
             nueva_key = os.path.join(carpeta_nueva, "rpa.key")
 
             self.scheduler.cancelar(nombre_actual)
-            if self.rpas[nombre_actual]["meta"].get("activo"):
+            if self.metadatos.obtener(nuevo_nombre).get("activo"):
                 self.scheduler.programar_si_corresponde(nuevo_nombre, nueva_enc, nueva_key)
 
             self.rpas[nuevo_nombre] = {
                 "enc": nueva_enc,
                 "key": nueva_key,
-                "meta": self.rpas[nombre_actual]["meta"]
+                "programacion": self.rpas[nombre_actual].get("programacion", "")
             }
             del self.rpas[nombre_actual]
-            self._guardar_meta(nuevo_nombre)
             registrar_log(nuevo_nombre, "[INFO] RPA renombrado correctamente.")
             return True
         except Exception as e:
@@ -140,34 +251,51 @@ class RPAManager:
     def obtener_lista_rpas(self) -> List[str]:
         return list(self.rpas.keys())
 
-    def ejecutar_rpa(self, nombre: str):
+    def ejecutar_rpa(self, nombre: str) -> bool:
         if nombre not in self.rpas:
-            return
+            return False
 
         def _ejecutar():
-            registrar_log(nombre, "RPA - Inicio de ejecución")
+            registrar_log(nombre, MARCA_INICIO_EJECUCION)
+            inicio = time.monotonic()
             resultado = ejecutar_rpa(self.rpas[nombre]["enc"], self.rpas[nombre]["key"])
             registrar_log(nombre, resultado)
-            self.rpas[nombre]["meta"]["ejecuciones"] += 1
-            self._guardar_meta(nombre)
+            self._registrar_ejecucion(nombre, time.monotonic() - inicio)
             registrar_log(nombre, "RPA - Ejecución finalizada")
 
-        hilo = threading.Thread(target=_ejecutar, daemon=True)
-        hilo.start()
+        return self.pool.enviar(nombre, _ejecutar)
+
+    def _registrar_ejecucion(self, nombre: str, duracion: float):
+        # Contador, fecha y duración en un único cambio atómico del registro.
+        fin = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        def cambio(meta: Dict):
+            previa = meta.get("duracion_promedio_s")
+            meta["ejecuciones"] = meta.get("ejecuciones", 0) + 1
+            meta["ultima_ejecucion"] = fin
+            meta["duracion_ultima_s"] = round(duracion, 1)
+            # Media móvil exponencial: sigue cambios de duración sin saltar por un caso aislado.
+            meta["duracion_promedio_s"] = round(duracion if previa is None else 0.7 * previa + 0.3 * duracion, 1)
+
+        self.metadatos.modificar(nombre, cambio)
+
+    def obtener_duracion_estimada(self, nombre: str):
+        return self.metadatos.obtener(nombre).get("duracion_promedio_s")
 
     def activar_rpa(self, nombre: str):
         if nombre in self.rpas:
-            self.rpas[nombre]["meta"]["activo"] = True
-            self._guardar_meta(nombre)
+            self._tocar(nombre)
+            self.metadatos.actualizar(nombre, activo=True)
             self.scheduler.programar_si_corresponde(nombre, self.rpas[nombre]["enc"], self.rpas[nombre]["key"])
             registrar_log(nombre, "[INFO] RPA activado.")
 
     def desactivar_rpa(self, nombre: str):
         if nombre in self.rpas:
-            self.rpas[nombre]["meta"]["activo"] = False
-            self._guardar_meta(nombre)
+            self._tocar(nombre)
+            self.metadatos.actualizar(nombre, activo=False)
             self.scheduler.cancelar(nombre)
             registrar_log(nombre, "[INFO] RPA desactivado.")
 
-    def obtener_rpa_info(self, nombre: str) -> Dict:
-        return self.rpas.get(nombre, {}).get("meta", {})
\ No newline at end of file
+    def obtener_rpa_info(self, nombre: str) -> Mapping:
+        # Instantánea inmutable, sin lock: se puede leer desde la interfaz en cualquier momento.
+        return self.metadatos.obtener(nombre)
\ No newline at end of file
@@ -1,14 +1,29 @@
+import heapq
+import itertools
+import math
 import threading
 import datetime
-from typing import Callable, Dict
+import time
+from typing import Callable, Dict, List, Optional
 from core.crypto_utils import descifrar_configuracion
 from core.log_handler import registrar_log
+from core.planner import PlanificadorCarga
 
+# Un único hilo despacha todas las programaciones desde un heap ordenado por
+# instante de disparo. Cancelar marca la entrada como no vigente (borrado
+# perezoso), así alta, baja y reprogramación cuestan O(log n).
 class RPAScheduler:
 
     def __init__(self, manager_ref):
         self.manager = manager_ref
         self.tareas_programadas: Dict[str, Dict] = {}
+        self._heap: List[list] = []
+        self._secuencia = itertools.count()
+        self._condicion = threading.Condition()
+        self._hilo: Optional[threading.Thread] = None
+        self._detenido = False
+        self._no_vigentes = 0
+        self.planificador = PlanificadorCarga()
 
     def _calcular_tiempo_inicial(self, hora_inicio: str) -> int:
         ahora = datetime.datetime.now()
@@ -28,6 +43,68 @@ class RPAScheduler:
             raise ValueError(f"Frecuencia no válida: {frecuencia}")
         return intervalo * mapping[frecuencia]
 
+    def _asegurar_despachador(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._detenido = False
+            self._hilo = threading.Thread(target=self._despachar, name="RPAScheduler", daemon=True)
+            self._hilo.start()
+
+    def _encolar(self, nombre: str, instante: float) -> list:
+        # Entrada mutable: [instante, secuencia, nombre, vigente]
+        entrada = [instante, next(self._secuencia), nombre, True]
+        heapq.heappush(self._heap, entrada)
+        return entrada
+
+    def _planificar(self, nombre: str, tarea: Dict) -> float:
+        duracion = self.manager.obtener_duracion_estimada(nombre)
+        planificado = self.planificador.planificar(nombre, tarea["nominal"], tarea["ventana_s"], duracion)
+        if tarea["ventana_s"] > 0:
+            nominal_txt = datetime.datetime.fromtimestamp(tarea["nominal"]).strftime("%Y-%m-%d %H:%M:%S")
+            planificado_txt = datetime.datetime.fromtimestamp(planificado).strftime("%Y-%m-%d %H:%M:%S")
+            registrar_log(nombre, f"RPA - Próxima ejecución planificada {planificado_txt} (nominal {nominal_txt})")
+        return planificado
+
+    def _despachar(self):
+        while True:
+            with self._condicion:
+                while not self._detenido:
+                    while self._heap and not self._heap[0][3]:
+                        heapq.heappop(self._heap)
+                        self._no_vigentes -= 1
+                    if not self._heap:
+                        self._condicion.wait()
+                        continue
+                    espera = self._heap[0][0] - time.time()
+                    if espera <= 0:
+                        break
+                    self._condicion.wait(timeout=espera)
+                if self._detenido:
+                    return
+
+                entrada = heapq.heappop(self._heap)
+                nombre = entrada[2]
+                tarea = self.tareas_programadas[nombre]
+                reservada = self.planificador.iniciar(nombre)
+                # Se calcula desde la hora nominal para no acumular deriva.
+                tarea["nominal"] += tarea["intervalo_s"]
+                tarea["entrada"] = self._encolar(nombre, self._planificar(nombre, tarea))
+                funcion_ejecucion = tarea["funcion"]
+
+            registrar_log(nombre, "RPA - Disparo programado")
+            aceptada = False
+            try:
+                aceptada = funcion_ejecucion(nombre)
+            except Exception as e:
+                registrar_log(nombre, f"[ERROR] Fallo al ejecutar RPA: {e}")
+            if reservada and not aceptada:
+                # Descartada (ya en cola o en curso): su reserva no llega a ocuparse.
+                self.ejecucion_terminada(nombre)
+
+    def ejecucion_terminada(self, nombre: str):
+        # El pool de ejecución avisa aquí al terminar cada ejecución.
+        with self._condicion:
+            self.planificador.terminar(nombre)
+
     def programar_rpa(self, nombre: str, config: Dict, funcion_ejecucion: Callable):
         prog = config.get("programacion")
         if not prog:
@@ -42,35 +119,33 @@ class RPAScheduler:
             registrar_log(nombre, "[!] Configuración de programación incompleta.")
             return
 
-        if nombre in self.tareas_programadas:
-            registrar_log(nombre, "[i] Ya existe una programación activa.")
-            return
-
         try:
             delay_inicial = self._calcular_tiempo_inicial(hora_inicio)
             intervalo_s = self._get_intervalo_segundos(frecuencia, int(intervalo))
+            ventana_s = float(prog.get("ventana_tolerancia_min", 0)) * 60
         except Exception as e:
             registrar_log(nombre, f"[!] Error en configuración: {e}")
             return
 
-        stop_event = threading.Event()
-
-        def ejecutar_periodicamente():
-            if stop_event.wait(timeout=delay_inicial):
-                return  # Cancelado antes de comenzar
-            while not stop_event.is_set():
-                registrar_log(nombre, "RPA - Inicio de ejecución")
-                try:
-                    funcion_ejecucion(nombre)
-                    registrar_log(nombre, "RPA - Ejecución finalizada")
-                except Exception as e:
-                    registrar_log(nombre, f"[ERROR] Fallo al ejecutar RPA: {e}")
-                if stop_event.wait(timeout=intervalo_s):
-                    break
-
-        hilo = threading.Thread(target=ejecutar_periodicamente, daemon=True)
-        hilo.start()
-        self.tareas_programadas[nombre] = {"thread": hilo, "stop_event": stop_event}
+        with self._condicion:
+            # Dentro del lock: dos altas simultáneas del mismo RPA no pueden dejar dos entradas en el heap.
+            duplicado = nombre in self.tareas_programadas
+            if not duplicado:
+                tarea = {
+                    "nominal": math.ceil(time.time() + delay_inicial),
+                    "ventana_s": min(ventana_s, intervalo_s),
+                    "intervalo_s": intervalo_s,
+                    "funcion": funcion_ejecucion
+                }
+                entrada = self._encolar(nombre, self._planificar(nombre, tarea))
+                tarea["entrada"] = entrada
+                self.tareas_programadas[nombre] = tarea
+                self._asegurar_despachador()
+                if self._heap[0] is entrada:
+                    self._condicion.notify()
+        if duplicado:
+            registrar_log(nombre, "[i] Ya existe una programación activa.")
+            return
         registrar_log(nombre, f"RPA - Programado cada {intervalo} {frecuencia} desde {hora_inicio}")
 
     def programar_si_corresponde(self, nombre: str, ruta_enc: str, ruta_key: str):
@@ -80,11 +155,52 @@ class RPAScheduler:
         except Exception as e:
             registrar_log(nombre, f"[!] No se pudo programar: {e}")
 
+    def reprogramar(self, nombre: str, ruta_enc: str, ruta_key: str):
+        self.cancelar(nombre)
+        self.programar_si_corresponde(nombre, ruta_enc, ruta_key)
+
     def cancelar(self, nombre: str):
-        tarea = self.tareas_programadas.get(nombre)
+        with self._condicion:
+            tarea = self.tareas_programadas.pop(nombre, None)
+            if tarea:
+                tarea["entrada"][3] = False
+                self.planificador.liberar(nombre)
+                self._no_vigentes += 1
+                if self._no_vigentes > len(self._heap) // 2:
+                    self._heap = [e for e in self._heap if e[3]]
+                    heapq.heapify(self._heap)
+                    self._no_vigentes = 0
+                self._condicion.notify()
         if tarea:
-            tarea["stop_event"].set()
             registrar_log(nombre, "RPA - Programación cancelada.")
-            del self.tareas_programadas[nombre]
         else:
-            registrar_log(nombre, "[!] No se encontró tarea programada para cancelar.")
\ No newline at end of file
+            registrar_log(nombre, "[!] No se encontró tarea programada para cancelar.")
+
+    def obtener_proxima_ejecucion(self, nombre: str) -> Optional[datetime.datetime]:
+        tarea = self.tareas_programadas.get(nombre)
+        if not tarea:
+            return None
+        return datetime.datetime.fromtimestamp(tarea["entrada"][0])
+
+    def obtener_planificacion(self) -> List[Dict]:
+        with self._condicion:
+            return sorted(
+                (
+                    {
+                        "nombre": nombre,
+                        "nominal": datetime.datetime.fromtimestamp(tarea["nominal"]),
+                        "planificado": datetime.datetime.fromtimestamp(tarea["entrada"][0]),
+                    }
+                    for nombre, tarea in self.tareas_programadas.items()
+                ),
+                key=lambda p: p["planificado"]
+            )
+
+    def detener(self, timeout: float = 10.0):
+        # Espera a que el despachador salga: tras detener() ya no se dispara nada.
+        with self._condicion:
+            self._detenido = True
+            self._condicion.notify()
+        hilo = self._hilo
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout)
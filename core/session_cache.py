@@ -0,0 +1,50 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Optional
+from core.crypto_utils import cifrar_datos, descifrar_datos
+from core.log_handler import LOG_AGENTE, registrar_log
+
+PREFIJO_SESION = "sesion_"
+
+# storage_state de Playwright por identidad de autenticación (sitio + usuario),
+# cifrado con la clave del propio RPA y guardado junto a rpa_config.enc.
+class CacheSesiones:
+
+    def __init__(self, carpeta_rpa: str, ruta_key: str, nombre_rpa: str = LOG_AGENTE):
+        self.carpeta_rpa = carpeta_rpa
+        self.ruta_key = ruta_key
+        self.nombre_rpa = nombre_rpa
+        self._lock = threading.Lock()
+
+    def _ruta(self, identidad: str) -> str:
+        resumen = hashlib.sha256(identidad.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.carpeta_rpa, f"{PREFIJO_SESION}{resumen}.enc")
+
+    def cargar(self, identidad: str) -> Optional[Dict]:
+        ruta = self._ruta(identidad)
+        try:
+            with open(ruta, "rb") as f:
+                return json.loads(descifrar_datos(f.read(), self.ruta_key).decode("utf-8"))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            registrar_log(self.nombre_rpa, f"[WARN] Sesión guardada ilegible, se descarta: {e}")
+            self.invalidar(identidad)
+            return None
+
+    def guardar(self, identidad: str, estado: Dict):
+        ruta = self._ruta(identidad)
+        temporal = ruta + ".tmp"
+        datos = cifrar_datos(json.dumps(estado).encode("utf-8"), self.ruta_key)
+        with self._lock:
+            with open(temporal, "wb") as f:
+                f.write(datos)
+            os.replace(temporal, ruta)
+
+    def invalidar(self, identidad: str):
+        try:
+            os.remove(self._ruta(identidad))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,226 @@
+import os
+import time
+import smtplib
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+MAX_CONEXIONES_POR_SERVIDOR = int(os.environ.get("ESENDER_SMTP_MAX_CONEXIONES", "2"))
+INTERVALO_NOOP_S = 15
+MAX_INACTIVIDAD_S = 240
+TIMEOUT_SMTP_S = 60
+BLOQUE_DATA = 64 * 1024
+
+def _sendmail_archivo(smtp: smtplib.SMTP, remitente: str, destinatarios: List[str], archivo: BinaryIO) -> Dict:
+    # Equivale a SMTP.sendmail pero transmite el DATA línea a línea, con el
+    # dot-stuffing y los CRLF que sendmail aplica sobre el mensaje completo.
+    smtp.ehlo_or_helo_if_needed()
+    codigo, respuesta = smtp.mail(remitente)
+    if codigo != 250:
+        smtp._rset()
+        raise smtplib.SMTPSenderRefused(codigo, respuesta, remitente)
+    rechazados = {}
+    for destinatario in destinatarios:
+        codigo, respuesta = smtp.rcpt(destinatario)
+        if codigo not in (250, 251):
+            rechazados[destinatario] = (codigo, respuesta)
+    if len(rechazados) == len(destinatarios):
+        smtp._rset()
+        raise smtplib.SMTPRecipientsRefused(rechazados)
+
+    smtp.putcmd("data")
+    codigo, respuesta = smtp.getreply()
+    if codigo != 354:
+        smtp._rset()
+        raise smtplib.SMTPDataError(codigo, respuesta)
+    bloque = []
+    tamano = 0
+    termina_en_crlf = True
+    for linea in archivo:
+        if linea.startswith(b"."):
+            linea = b"." + linea
+        if linea.endswith(b"\r\n"):
+            pass
+        elif linea.endswith(b"\n"):
+            linea = linea[:-1] + b"\r\n"
+        elif linea.endswith(b"\r"):
+            linea += b"\n"
+        termina_en_crlf = linea.endswith(b"\r\n")
+        bloque.append(linea)
+        tamano += len(linea)
+        if tamano >= BLOQUE_DATA:
+            smtp.send(b"".join(bloque))
+            bloque, tamano = [], 0
+    bloque.append(b".\r\n" if termina_en_crlf else b"\r\n.\r\n")
+    smtp.send(b"".join(bloque))
+    codigo, respuesta = smtp.getreply()
+    if codigo != 250:
+        smtp._rset()
+        raise smtplib.SMTPDataError(codigo, respuesta)
+    return rechazados
+
+class _Conexion:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.ultimo_uso = time.monotonic()
+
+class _Servidor:
+    def __init__(self, max_conexiones: int):
+        self.cupos = threading.BoundedSemaphore(max_conexiones)
+        self.libres: List[_Conexion] = []
+
+# Pool de conexiones SMTP autenticadas, una clave por (servidor, puerto,
+# usuario, tls). Las conexiones ociosas se reutilizan: si llevan más de
+# INTERVALO_NOOP_S sin uso se comprueban con NOOP y pasado MAX_INACTIVIDAD_S se
+# descartan, porque los relays suelen cortarlas. Cada servidor admite como
+# mucho max_por_servidor conexiones a la vez; si una conexión reutilizada falla
+# al enviar se abre otra y se reintenta una vez.
+class PoolSMTP:
+
+    def __init__(self, max_por_servidor: int = MAX_CONEXIONES_POR_SERVIDOR,
+                 fabrica: Callable = smtplib.SMTP, timeout: float = TIMEOUT_SMTP_S):
+        self.max_por_servidor = max_por_servidor
+        self.fabrica = fabrica
+        self.timeout = timeout
+        self._servidores: Dict[Tuple, _Servidor] = {}
+        self._lock = threading.Lock()
+        self.metricas = {
+            "handshakes": 0,
+            "mensajes": 0,
+            "reutilizaciones": 0,
+            "reconexiones": 0,
+            "descartadas": 0,
+        }
+
+    @staticmethod
+    def clave(smtp_config: Dict, tls: bool) -> Tuple:
+        return (smtp_config["servidor"], int(smtp_config["puerto"]), smtp_config.get("usuario") or "", bool(tls))
+
+    def _servidor(self, clave: Tuple) -> _Servidor:
+        with self._lock:
+            servidor = self._servidores.get(clave)
+            if servidor is None:
+                servidor = self._servidores[clave] = _Servidor(self.max_por_servidor)
+            return servidor
+
+    def _conectar(self, smtp_config: Dict, tls: bool) -> _Conexion:
+        smtp = self.fabrica(smtp_config["servidor"], int(smtp_config["puerto"]), timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if tls:
+                smtp.starttls()
+                smtp.ehlo()
+                smtp.login(smtp_config["usuario"], smtp_config["clave_aplicacion"])
+        except Exception:
+            self._cerrar_conexion(smtp)
+            raise
+        with self._lock:
+            self.metricas["handshakes"] += 1
+        return _Conexion(smtp)
+
+    @staticmethod
+    def _cerrar_conexion(smtp):
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _descartar(self, conexion: _Conexion):
+        with self._lock:
+            self.metricas["descartadas"] += 1
+        self._cerrar_conexion(conexion.smtp)
+
+    def _sigue_viva(self, conexion: _Conexion) -> bool:
+        inactiva = time.monotonic() - conexion.ultimo_uso
+        if inactiva > MAX_INACTIVIDAD_S:
+            return False
+        if inactiva <= INTERVALO_NOOP_S:
+            return True
+        try:
+            return conexion.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _tomar_libre(self, servidor: _Servidor) -> Optional[_Conexion]:
+        while True:
+            with self._lock:
+                if not servidor.libres:
+                    return None
+                conexion = servidor.libres.pop()
+            if self._sigue_viva(conexion):
+                with self._lock:
+                    self.metricas["reutilizaciones"] += 1
+                return conexion
+            self._descartar(conexion)
+
+    def _devolver(self, servidor: _Servidor, conexion: _Conexion):
+        conexion.ultimo_uso = time.monotonic()
+        with self._lock:
+            servidor.libres.append(conexion)
+
+    @contextmanager
+    def conexion(self, smtp_config: Dict, tls: bool):
+        # Presta una conexión lista para enviar. Si el bloque termina con un
+        # error de transporte, la conexión se descarta en lugar de devolverse.
+        servidor = self._servidor(self.clave(smtp_config, tls))
+        servidor.cupos.acquire()
+        try:
+            conexion = self._tomar_libre(servidor) or self._conectar(smtp_config, tls)
+            try:
+                yield conexion.smtp
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                # El servidor respondió con un error pero la sesión sigue siendo válida.
+                self._devolver(servidor, conexion)
+                raise
+            except Exception:
+                self._descartar(conexion)
+                raise
+            else:
+                self._devolver(servidor, conexion)
+        finally:
+            servidor.cupos.release()
+
+    def enviar(self, smtp_config: Dict, tls: bool, remitente: str, destinatarios: List[str], mensaje) -> Dict:
+        return self._con_reintento(smtp_config, tls, lambda smtp: smtp.sendmail(remitente, destinatarios, mensaje))
+
+    def enviar_archivo(self, smtp_config: Dict, tls: bool, remitente: str, destinatarios: List[str], archivo: BinaryIO) -> Dict:
+        # Igual que enviar(), pero el mensaje se lee del archivo por bloques en lugar de tenerlo en memoria.
+        def operacion(smtp):
+            archivo.seek(0)
+            return _sendmail_archivo(smtp, remitente, destinatarios, archivo)
+        return self._con_reintento(smtp_config, tls, operacion)
+
+    def _con_reintento(self, smtp_config: Dict, tls: bool, operacion: Callable) -> Dict:
+        for intento in (1, 2):
+            try:
+                with self.conexion(smtp_config, tls) as smtp:
+                    rechazados = operacion(smtp)
+                with self._lock:
+                    self.metricas["mensajes"] += 1
+                return rechazados
+            except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError):
+                # Una conexión ociosa cerrada por el relay se detecta aquí: se reintenta con una nueva.
+                if intento == 2:
+                    raise
+                with self._lock:
+                    self.metricas["reconexiones"] += 1
+
+    def obtener_metricas(self) -> Dict:
+        with self._lock:
+            metricas = dict(self.metricas)
+            metricas["conexiones_libres"] = sum(len(s.libres) for s in self._servidores.values())
+        metricas["mensajes_por_handshake"] = round(metricas["mensajes"] / metricas["handshakes"], 2) if metricas["handshakes"] else 0.0
+        return metricas
+
+    def cerrar(self):
+        with self._lock:
+            conexiones = [c for s in self._servidores.values() for c in s.libres]
+            for servidor in self._servidores.values():
+                servidor.libres.clear()
+        for conexion in conexiones:
+            self._cerrar_conexion(conexion.smtp)
+
+pool_smtp = PoolSMTP()
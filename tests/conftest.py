@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Los módulos de core/ crean sus carpetas (rpas_cargados, logs_rpa, historial_rpa...)
+# en el directorio de trabajo al importarse: las pruebas corren en uno temporal.
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ_REPO)
+os.chdir(tempfile.mkdtemp(prefix="esender_pruebas_"))
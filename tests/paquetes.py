@@ -0,0 +1,17 @@
+import os
+import json
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+
+def crear_paquete_rpa(carpeta: str, config: dict = None) -> str:
+    # rpa_config.enc + rpa.key válidos (AES-256-CBC, IV delante), como los genera eSender.
+    os.makedirs(carpeta, exist_ok=True)
+    key = os.urandom(32)
+    iv = os.urandom(16)
+    datos = json.dumps(config or {}).encode("utf-8")
+    with open(os.path.join(carpeta, "rpa.key"), "wb") as f:
+        f.write(key)
+    with open(os.path.join(carpeta, "rpa_config.enc"), "wb") as f:
+        f.write(iv + AES.new(key, AES.MODE_CBC, iv).encrypt(pad(datos, AES.block_size)))
+    return carpeta
@@ -0,0 +1,35 @@
+import sys
+import subprocess
+
+import psutil
+
+from core.browser_pool import PoolNavegadores, _Navegador
+
+# Hace de Chromium: un proceso con la marca en la línea de comandos y un hijo
+# (como los renderers) que ocupa `mb` MiB.
+NAVEGADOR_FALSO = """
+import sys, time, subprocess
+subprocess.Popen([sys.executable, "-c", "import sys, time; b = b'x' * (int(sys.argv[1]) << 20); print('listo', flush=True); time.sleep(60)", sys.argv[2]])
+time.sleep(60)
+"""
+
+def _lanzar(marca, mb):
+    proceso = subprocess.Popen([sys.executable, "-c", NAVEGADOR_FALSO, marca, str(mb)], stdout=subprocess.PIPE, text=True)
+    assert proceso.stdout.readline().strip() == "listo"
+    return proceso
+
+def test_la_memoria_se_mide_por_navegador():
+    pool = PoolNavegadores()
+    procesos = [_lanzar("--esender-navegador=a", 300), _lanzar("--esender-navegador=b", 10)]
+    try:
+        grande = _Navegador(None, True, 0.0, "--esender-navegador=a")
+        pequeno = _Navegador(None, False, 0.0, "--esender-navegador=b")
+        assert pool._memoria_navegador_mb(grande) > 300
+        assert pool._memoria_navegador_mb(pequeno) < 150
+        assert grande.proceso.pid == procesos[0].pid
+    finally:
+        for proceso in procesos:
+            for hijo in psutil.Process(proceso.pid).children(recursive=True):
+                hijo.kill()
+            proceso.kill()
+            proceso.wait()
@@ -0,0 +1,28 @@
+import os
+import sys
+import json
+import subprocess
+
+from tests.conftest import RAIZ_REPO
+from tests.paquetes import crear_paquete_rpa
+
+def test_cli_guarda_metadatos_antes_de_salir(tmp_path):
+    # Regresión: la importación por línea de comandos salía antes del guardado
+    # diferido y al arrancar los RPAs quedaban activos por defecto.
+    for nombre in ("a", "b"):
+        crear_paquete_rpa(str(tmp_path / "src" / nombre), {"programacion": {"frecuencia": "diaria", "intervalo": 1, "hora_inicio": "08:00"}})
+    entorno = dict(os.environ, PYTHONPATH=RAIZ_REPO)
+    salida = subprocess.run(
+        [sys.executable, "-m", "core.importer", "src"], cwd=str(tmp_path), env=entorno,
+        capture_output=True, text=True, timeout=120
+    )
+    assert salida.returncode == 0, salida.stderr
+    assert "Importados: 2" in salida.stdout
+
+    directorio = tmp_path / "rpas_cargados"
+    with open(directorio / "indice.json", encoding="utf-8") as f:
+        indice = json.load(f)
+    for nombre in ("a", "b"):
+        with open(directorio / nombre / "meta.json", encoding="utf-8") as f:
+            assert json.load(f)["activo"] is False
+        assert indice[nombre]["meta"]["activo"] is False
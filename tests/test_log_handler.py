@@ -0,0 +1,86 @@
+import os
+import time
+
+import pytest
+
+from core import log_handler
+from core.log_handler import EscritorLogs, MARCA_INICIO_EJECUCION, registrar_log
+
+@pytest.fixture
+def escritor(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_handler, "DIRECTORIO_LOGS", str(tmp_path))
+    escritor = EscritorLogs(max_bytes=4096, max_horas=0, rotados=10)
+    monkeypatch.setattr(log_handler, "escritor_logs", escritor)
+    yield escritor
+    escritor.detener()
+
+def _esperar(escritor):
+    escritor.vaciar()
+    for hilo in escritor._compresiones:
+        hilo.join()
+
+def test_una_ejecucion_que_cruza_la_rotacion_sigue_atribuida(escritor):
+    registrar_log("rpa", MARCA_INICIO_EJECUCION)
+    registrar_log("rpa", "[SUCCESS] primera")
+    registrar_log("rpa", "RPA - Ejecución finalizada")
+    registrar_log("rpa", MARCA_INICIO_EJECUCION)
+    while escritor.metricas["rotaciones"] == 0:
+        registrar_log("rpa", "RPA: URL accedida → " + "x" * 200)
+        escritor.vaciar()
+    _esperar(escritor)
+
+    # Justo después de rotar: el log nuevo existe, vacío, y la ejecución sigue en curso.
+    assert os.path.getsize(log_handler._ruta_log("rpa")) == 0
+    estado = log_handler.obtener_estado_ultima_ejecucion("rpa")
+    assert estado["estado"] == "en_curso" and estado["inicio"]
+    assert log_handler.listar_logs_disponibles() == ["rpa"]
+    assert log_handler.obtener_resumen_logs()[0].startswith("rpa: [")
+
+    registrar_log("rpa", "[SUCCESS] segunda")
+    registrar_log("rpa", "RPA - Ejecución finalizada")
+    _esperar(escritor)
+    assert log_handler.obtener_estado_ultima_ejecucion("rpa")["estado"] == "exito"
+    ejecuciones = log_handler.obtener_ultimas_ejecuciones("rpa", 2)
+    assert [e[-1].endswith("RPA - Ejecución finalizada") for e in ejecuciones] == [True, True]
+    assert "[SUCCESS] primera" in ejecuciones[0][1]
+    assert ejecuciones[1][0].endswith(MARCA_INICIO_EJECUCION)
+
+def test_los_rpas_solo_con_rotados_siguen_en_el_resumen(escritor):
+    for _ in range(4):
+        rotaciones = escritor.metricas["rotaciones"]
+        while escritor.metricas["rotaciones"] == rotaciones:
+            registrar_log("rpa", "x" * 200)
+            escritor.vaciar()
+    _esperar(escritor)
+    os.remove(log_handler._ruta_log("rpa"))
+
+    assert log_handler.listar_logs_disponibles() == ["rpa"]
+    resumen = log_handler.obtener_resumen_logs()
+    assert len(resumen) == 1 and resumen[0].startswith("rpa: [") and resumen[0].endswith("x" * 200)
+
+    log_handler.borrar_log_rpa("rpa")
+    assert log_handler.listar_logs_disponibles() == []
+
+def test_la_antiguedad_sale_de_la_primera_linea(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_handler, "DIRECTORIO_LOGS", str(tmp_path))
+    escritor = EscritorLogs(max_bytes=0, max_horas=24)
+    monkeypatch.setattr(log_handler, "escritor_logs", escritor)
+    hace_dos_dias = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - 48 * 3600))
+    with open(log_handler._ruta_log("viejo"), "w", encoding="utf-8") as f:
+        f.write(f"[{hace_dos_dias}] línea de antes del reinicio\n")
+    registrar_log("nuevo", "primera línea")
+    registrar_log("viejo", "tras el reinicio")
+    escritor.detener()
+    assert escritor.metricas["rotaciones"] == 1
+    assert log_handler._segmentos_rotados(log_handler._ruta_log("viejo"))
+    assert not log_handler._segmentos_rotados(log_handler._ruta_log("nuevo"))
+
+def test_lo_escrito_tras_detener_pasa_por_el_indice(escritor):
+    escritor.detener()
+    registrar_log("rpa", MARCA_INICIO_EJECUCION)
+    registrar_log("rpa", "[SUCCESS] tras detener")
+    assert log_handler.obtener_estado_ultima_ejecucion("rpa")["estado"] == "exito"
+    while escritor.metricas["rotaciones"] == 0:
+        registrar_log("rpa", "x" * 200)
+    assert os.path.getsize(log_handler._ruta_log("rpa")) < 4096
+    assert escritor._archivos == {}
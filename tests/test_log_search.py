@@ -0,0 +1,33 @@
+import os
+
+from core import log_handler, log_search
+from core.log_handler import EscritorLogs, LOG_AGENTE
+from core.log_search import IndiceLogs
+
+def _linea(texto):
+    return f"[2026-01-01 10:00:00] {texto}\n".encode("utf-8")
+
+def test_un_rotado_que_desaparece_o_esta_corrupto_no_frena_el_historico(tmp_path, monkeypatch):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    monkeypatch.setattr(log_handler, "DIRECTORIO_LOGS", str(logs))
+    escritor = EscritorLogs(max_horas=0)
+    monkeypatch.setattr(log_handler, "escritor_logs", escritor)
+
+    (logs / "rpa.log").write_bytes(_linea("actual"))
+    (logs / "rpa.log.20260101-000000.gz").write_bytes(b"\x1f\x8b\x08\x00truncado")
+    (logs / "otro.log").write_bytes(_linea("sigue"))
+    # Un rotado que se listó pero desapareció antes de abrirlo (lo reemplazó su .gz).
+    listar = os.listdir
+    monkeypatch.setattr(log_search.os, "listdir", lambda d: listar(d) + ["otro.log.20260101-000000"])
+
+    indice = IndiceLogs(str(tmp_path / "logs.db"), str(logs))
+    conexion = indice._conectar()
+    with conexion:
+        indice._indexar_historico(conexion)
+
+    assert {f["mensaje"] for f in indice.buscar()[0]} == {"actual", "sigue"}
+    assert not indice.metricas["indexando_historico"]
+    assert indice.metricas["ultimo_error"].startswith("[WARN] No se pudo indexar")
+    escritor.detener()
+    assert "No se pudo indexar" in (logs / f"{LOG_AGENTE}.log").read_text(encoding="utf-8")
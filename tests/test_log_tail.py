@@ -0,0 +1,29 @@
+from core import log_handler
+from core.log_handler import EscritorLogs, registrar_log
+from core.log_tail import SeguidorLogs
+
+def test_varias_rotaciones_entre_lecturas(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_handler, "DIRECTORIO_LOGS", str(tmp_path))
+    escritor = EscritorLogs(max_bytes=2048, max_horas=0, rotados=10)
+    monkeypatch.setattr(log_handler, "escritor_logs", escritor)
+    seguidor = SeguidorLogs(str(tmp_path), notificaciones=False)
+    try:
+        registrar_log("rpa", "linea 0")
+        escritor.vaciar()
+        assert seguidor.leer_nuevas(["rpa"]) == ["rpa: " + log_handler.leer_ultimas_lineas(log_handler._ruta_log("rpa"))[0]]
+
+        # Tres rotaciones (alguna ya comprimida) antes de la siguiente lectura.
+        n = 1
+        while escritor.metricas["rotaciones"] < 3:
+            registrar_log("rpa", f"linea {n} " + "x" * 100)
+            escritor.vaciar()
+            n += 1
+        registrar_log("rpa", f"linea {n}")
+        escritor.vaciar()
+        for hilo in escritor._compresiones:
+            hilo.join()
+
+        leidas = [l.split("] ", 1)[1].split(" ")[1] for l in seguidor.leer_nuevas(["rpa"])]
+        assert leidas == [str(i) for i in range(1, n + 1)]
+    finally:
+        escritor.detener()
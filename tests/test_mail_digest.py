@@ -0,0 +1,38 @@
+import os
+
+from core import mail_digest
+from core.mail_digest import AgrupadorResumen
+
+def _correo(clave):
+    return {
+        "remitente": "envios@ejemplo.com",
+        "destinatarios": ["a@ejemplo.com"],
+        "usar_remoto": True,
+        "smtp_remoto": {"servidor": "smtp.ejemplo.com", "puerto": 587, "usuario": "envios", "clave_aplicacion": clave},
+        "cuerpo_html": "<p>{{nombre_rpa}}</p>{{bloque_capturas}}",
+        "modo_resumen": {"activo": True, "ventana_min": 60}
+    }
+
+def test_el_resumen_usa_la_configuracion_guardada_en_los_reportes(tmp_path, monkeypatch):
+    encolados = []
+    def encolar(escribir, destinatarios, servidor, nombre_rpa, smtp, usar_remoto, ejecuciones=None):
+        with open(os.path.join(str(tmp_path), "resumen.eml"), "wb") as f:
+            escribir(f)
+        encolados.append((nombre_rpa, smtp, ejecuciones))
+        return "id"
+    monkeypatch.setattr(mail_digest.cola_correo, "encolar", encolar)
+    monkeypatch.setattr(AgrupadorResumen, "iniciar", lambda self: None)
+
+    agrupador = AgrupadorResumen(str(tmp_path))
+    # Sin .enc/.key: los RPAs del grupo pueden haberse renombrado o eliminado antes del envío.
+    agrupador.agregar(_correo("antigua"), {"nombre": "uno"}, [], "2026-10-18 10:00:00", "e1")
+    agrupador.agregar(_correo("nueva"), {"nombre": "dos"}, [], "2026-10-18 10:05:00", "e2")
+    grupo = next(iter(agrupador._grupos.values()))
+    assert "ruta_enc" not in grupo
+
+    agrupador._enviar(grupo)
+    assert len(encolados) == 1
+    nombre_rpa, smtp, ejecuciones = encolados[0]
+    assert smtp["clave_aplicacion"] == "nueva"
+    assert ejecuciones == ["e1", "e2"]
+    assert not os.path.exists(os.path.join(str(tmp_path), grupo["carpeta"]))
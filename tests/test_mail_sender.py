@@ -0,0 +1,24 @@
+import io
+from email import message_from_bytes, policy
+
+from core.mail_sender import escribir_mime
+
+def test_cabeceras_plegadas_y_legibles():
+    destinatarios = [f"usuario.numero{i}@empresa-con-dominio-largo.example.com" for i in range(60)]
+    cc = [f"copia{i}@example.com" for i in range(30)]
+    correo = {"remitente": "José Pérez <envios@example.com>", "destinatarios": destinatarios, "cc": cc}
+    salida = io.BytesIO()
+    escribir_mime(salida, correo, "Informe diario – ñandú", "<p>hola</p>", [], False)
+
+    datos = salida.getvalue()
+    cabeceras = datos.split(b"\r\n\r\n", 1)[0]
+    assert b"\n" not in cabeceras.replace(b"\r\n", b"")
+    lineas = cabeceras.split(b"\r\n")
+    assert max(len(linea) for linea in lineas) <= 998
+    assert all(len(linea) <= 78 for linea in lineas if linea.startswith((b"To:", b"Cc:", b" ")))
+
+    mensaje = message_from_bytes(datos, policy=policy.default)
+    assert [a.addr_spec for a in mensaje["To"].addresses] == destinatarios
+    assert [a.addr_spec for a in mensaje["Cc"].addresses] == cc
+    assert mensaje["From"].addresses[0].display_name == "José Pérez"
+    assert mensaje["Subject"] == "Informe diario – ñandú"
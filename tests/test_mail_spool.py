@@ -0,0 +1,64 @@
+import os
+import json
+import smtplib
+
+from core import mail_spool
+from core.mail_spool import ColaCorreo
+
+SMTP = {"servidor": "smtp.ejemplo.com", "puerto": 587, "usuario": "envios", "clave_aplicacion": "secreto"}
+
+def _escribir(archivo):
+    archivo.write(b"Subject: prueba\r\n\r\nhola\r\n")
+    return "envios@ejemplo.com"
+
+def _cola(tmp_path):
+    # Sin hilos: las pruebas llaman a _enviar directamente.
+    return ColaCorreo(str(tmp_path / "spool"), hilos=0)
+
+def test_el_mensaje_no_depende_de_los_archivos_del_rpa(tmp_path, monkeypatch):
+    cola = _cola(tmp_path)
+    id_mensaje = cola.encolar(_escribir, ["a@ejemplo.com"], "smtp.ejemplo.com:587", "rpa", SMTP, True)
+
+    with open(os.path.join(cola.directorio, f"{id_mensaje}.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    assert "secreto" not in json.dumps(meta)
+    assert "ruta_enc" not in meta
+
+    enviados = []
+    def enviar_archivo(smtp, usar_remoto, remitente, destinatarios, mensaje):
+        enviados.append((smtp, usar_remoto, remitente, destinatarios, mensaje.read()))
+        return []
+    monkeypatch.setattr(mail_spool.pool_smtp, "enviar_archivo", enviar_archivo)
+
+    # Tras un reinicio, con el RPA ya renombrado o eliminado.
+    cola = _cola(tmp_path)
+    cola._recuperar()
+    cola._enviar(cola._pendientes[id_mensaje])
+    assert enviados == [(SMTP, True, "envios@ejemplo.com", ["a@ejemplo.com"], b"Subject: prueba\r\n\r\nhola\r\n")]
+    assert cola.metricas["enviados"] == 1
+    assert not os.path.exists(os.path.join(cola.directorio, f"{id_mensaje}.eml"))
+
+def test_solo_los_rechazos_5xx_son_definitivos(tmp_path, monkeypatch):
+    cola = _cola(tmp_path)
+    errores = {
+        "red": OSError("conexión rechazada"),
+        "config": RuntimeError("no se pudo descifrar"),
+        "4xx": smtplib.SMTPDataError(451, b"intente luego"),
+        "destinatario_4xx": smtplib.SMTPRecipientsRefused({"a@ejemplo.com": (450, b"buzon ocupado")}),
+        "5xx": smtplib.SMTPDataError(554, b"rechazado"),
+        "destinatario_5xx": smtplib.SMTPRecipientsRefused({"a@ejemplo.com": (550, b"no existe")}),
+    }
+    ids = {}
+    for clave in errores:
+        ids[clave] = cola.encolar(_escribir, ["a@ejemplo.com"], "smtp.ejemplo.com:587", clave, SMTP, False)
+
+    def enviar_archivo(smtp, usar_remoto, remitente, destinatarios, mensaje):
+        raise errores[actual]
+    monkeypatch.setattr(mail_spool.pool_smtp, "enviar_archivo", enviar_archivo)
+
+    for actual, id_mensaje in ids.items():
+        cola._enviar(cola._pendientes[id_mensaje])
+
+    descartados = {c for c, i in ids.items() if os.path.exists(os.path.join(cola.directorio_dead, f"{i}.eml"))}
+    assert descartados == {"5xx", "destinatario_5xx"}
+    assert set(cola._pendientes) == {ids[c] for c in ("red", "config", "4xx", "destinatario_4xx")}
@@ -0,0 +1,114 @@
+import os
+import json
+import random
+import threading
+
+from core.meta_registry import RegistroMetadatos
+
+RPAS = 20
+HILOS = 16
+CAMBIOS_POR_HILO = 300
+
+def _leer_meta(directorio, nombre):
+    with open(os.path.join(directorio, nombre, "meta.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+def test_cambios_concurrentes_exactos_y_persistidos(tmp_path):
+    directorio = str(tmp_path)
+    guardados = []
+    registro = RegistroMetadatos(directorio, al_guardar=lambda: guardados.append(1), retraso_s=0.05)
+    nombres = [f"rpa_{i}" for i in range(RPAS)]
+    for nombre in nombres:
+        os.makedirs(os.path.join(directorio, nombre))
+
+    esperado = {n: 0 for n in nombres}
+    lock_esperado = threading.Lock()
+    errores = []
+    parar = threading.Event()
+
+    def alta(nombre):
+        registro.registrar(nombre, {"activo": False, "ejecuciones": 0, "control": 0})
+
+    def trabajador(semilla):
+        rnd = random.Random(semilla)
+        for _ in range(CAMBIOS_POR_HILO):
+            nombre = rnd.choice(nombres)
+
+            def cambio(meta):
+                meta["ejecuciones"] = meta.get("ejecuciones", 0) + 1
+                meta["control"] = meta["ejecuciones"]
+
+            registro.modificar(nombre, cambio)
+            registro.actualizar(nombre, activo=rnd.random() < 0.5)
+            with lock_esperado:
+                esperado[nombre] += 1
+
+    def lector():
+        # Una instantánea nunca muestra un cambio a medias ni se modifica.
+        while not parar.is_set():
+            for nombre, meta in registro.instantanea().items():
+                if meta.get("ejecuciones") != meta.get("control"):
+                    errores.append(dict(meta))
+                try:
+                    meta["x"] = 1
+                    errores.append("instantánea mutable")
+                except TypeError:
+                    pass
+
+    hilos_alta = [threading.Thread(target=alta, args=(n,)) for n in nombres]
+    for h in hilos_alta:
+        h.start()
+    for h in hilos_alta:
+        h.join()
+
+    lectores = [threading.Thread(target=lector) for _ in range(4)]
+    trabajadores = [threading.Thread(target=trabajador, args=(i,)) for i in range(HILOS)]
+    for h in lectores + trabajadores:
+        h.start()
+
+    # Renombres concurrentes con los cambios, como los hace RPAManager.
+    renombrados = {}
+    for nombre in nombres[:5]:
+        nuevo = nombre + "_renombrado"
+        with registro.bloqueo_disco():
+            os.rename(os.path.join(directorio, nombre), os.path.join(directorio, nuevo))
+            registro.renombrar(nombre, nuevo)
+        renombrados[nombre] = nuevo
+
+    for h in trabajadores:
+        h.join()
+    parar.set()
+    for h in lectores:
+        h.join()
+    registro.detener()
+
+    assert errores == []
+    assert guardados, "al_guardar nunca se llamó"
+    for nombre, total in esperado.items():
+        actual = renombrados.get(nombre, nombre)
+        assert registro.obtener(actual)["ejecuciones"] == total
+        assert _leer_meta(directorio, actual)["ejecuciones"] == total
+        assert _leer_meta(directorio, actual)["control"] == total
+    for nombre in renombrados:
+        assert registro.obtener(nombre) == {}
+    temporales = [a for _, _, archivos in os.walk(directorio) for a in archivos if a.endswith(".tmp")]
+    assert temporales == []
+    # Los cambios se agrupan: muchas menos escrituras que cambios.
+    assert registro.metricas["escrituras"] < registro.metricas["cambios"] / 10
+
+def test_cargar_no_pisa_cambios_de_la_sesion(tmp_path):
+    registro = RegistroMetadatos(str(tmp_path), retraso_s=0.05)
+    os.makedirs(tmp_path / "a")
+    registro.cargar({"a": {"ejecuciones": 3}})
+    registro.actualizar("a", ejecuciones=4)
+    registro.cargar({"a": {"ejecuciones": 3}})
+    registro.detener()
+    assert registro.obtener("a")["ejecuciones"] == 4
+    assert _leer_meta(str(tmp_path), "a")["ejecuciones"] == 4
+
+def test_tras_detener_se_guarda_en_el_acto(tmp_path):
+    registro = RegistroMetadatos(str(tmp_path))
+    os.makedirs(tmp_path / "a")
+    registro.detener()
+    registro.registrar("a", {"activo": False})
+    assert _leer_meta(str(tmp_path), "a") == {"activo": False}
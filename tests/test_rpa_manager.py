@@ -0,0 +1,100 @@
+import os
+import json
+import threading
+
+import pytest
+
+import core.rpa_manager as rpa_manager
+from tests.paquetes import crear_paquete_rpa
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    directorio = str(tmp_path / "rpas_cargados")
+    os.makedirs(directorio)
+    monkeypatch.setattr(rpa_manager, "DIRECTORIO_RPAS", directorio)
+    monkeypatch.setattr(rpa_manager, "RUTA_INDICE", os.path.join(directorio, "indice.json"))
+    for nombre in ("uno", "dos", "tres"):
+        crear_paquete_rpa(os.path.join(directorio, nombre))
+        with open(os.path.join(directorio, nombre, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"activo": False, "ejecuciones": 0}, f)
+    m = rpa_manager.RPAManager()
+    assert m.carga_completa.wait(10)
+    yield m
+    m.scheduler.detener()
+    m.pool.detener()
+    m.metadatos.detener()
+
+def _indice():
+    with open(rpa_manager.RUTA_INDICE, encoding="utf-8") as f:
+        return json.load(f)
+
+def test_ejecuciones_concurrentes_y_renombre_quedan_en_disco(manager):
+    def ejecuciones(nombre):
+        for _ in range(200):
+            manager._registrar_ejecucion(nombre, 1.5)
+
+    hilos = [threading.Thread(target=ejecuciones, args=(n,)) for n in ("uno", "dos") for _ in range(8)]
+    for h in hilos:
+        h.start()
+    assert manager.renombrar_rpa("tres", "cuatro")
+    for h in hilos:
+        h.join()
+    manager.metadatos.detener()
+
+    indice = _indice()
+    assert set(indice) == {"uno", "dos", "cuatro"}
+    for nombre in ("uno", "dos"):
+        assert indice[nombre]["meta"]["ejecuciones"] == 1600
+        with open(os.path.join(rpa_manager.DIRECTORIO_RPAS, nombre, "meta.json"), encoding="utf-8") as f:
+            assert json.load(f)["ejecuciones"] == 1600
+    assert indice["cuatro"]["meta"]["ejecuciones"] == 0
+
+def test_eliminar_no_deja_meta_huerfano(manager):
+    manager.metadatos.actualizar("uno", descripcion="x")
+    assert manager.eliminar_rpa("uno")
+    manager.metadatos.detener()
+    assert not os.path.exists(os.path.join(rpa_manager.DIRECTORIO_RPAS, "uno"))
+    assert "uno" not in _indice()
+
+def test_la_carga_en_segundo_plano_no_pisa_cambios_de_la_interfaz(tmp_path, monkeypatch):
+    directorio = str(tmp_path / "rpas_cargados")
+    monkeypatch.setattr(rpa_manager, "DIRECTORIO_RPAS", directorio)
+    monkeypatch.setattr(rpa_manager, "RUTA_INDICE", os.path.join(directorio, "indice.json"))
+    config = {"programacion": {"frecuencia": "daily", "intervalo": 1, "hora_inicio": "03:00"}}
+    for nombre, activo in (("uno", True), ("dos", True), ("tres", False)):
+        crear_paquete_rpa(os.path.join(directorio, nombre), config)
+        with open(os.path.join(directorio, nombre, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"activo": activo, "ejecuciones": 0}, f)
+    previo = rpa_manager.RPAManager()
+    assert previo.carga_completa.wait(10)
+    previo.scheduler.detener()
+    previo.metadatos.detener()
+
+    # La carga lee todo y se queda esperando antes de aplicarlo.
+    seguir = threading.Event()
+    leer = rpa_manager.RPAManager._leer_rpa
+    def leer_y_esperar(self, nombre):
+        resultado = leer(self, nombre)
+        seguir.wait(10)
+        return resultado
+    monkeypatch.setattr(rpa_manager.RPAManager, "_leer_rpa", leer_y_esperar)
+
+    m = rpa_manager.RPAManager()
+    try:
+        assert set(m.rpas) == {"uno", "dos", "tres"}
+        assert m.eliminar_rpa("uno")
+        assert m.renombrar_rpa("dos", "cuatro")
+        m.activar_rpa("tres")
+        seguir.set()
+        assert m.carga_completa.wait(10)
+
+        assert set(m.rpas) == {"cuatro", "tres"}
+        assert m.scheduler.obtener_proxima_ejecucion("uno") is None
+        assert m.scheduler.obtener_proxima_ejecucion("dos") is None
+        assert m.scheduler.obtener_proxima_ejecucion("cuatro") is not None
+        assert m.obtener_rpa_info("tres")["activo"] is True
+        assert "uno" not in m.metadatos.instantanea() and "dos" not in m.metadatos.instantanea()
+    finally:
+        m.scheduler.detener()
+        m.pool.detener()
+        m.metadatos.detener()
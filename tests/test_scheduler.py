@@ -0,0 +1,84 @@
+import threading
+import time
+
+from core.execution_pool import RPAExecutionPool
+from core.scheduler import RPAScheduler
+
+CONFIG = {"programacion": {"frecuencia": "hourly", "intervalo": 1, "hora_inicio": "00:00"}}
+
+class _Manager:
+    def obtener_duracion_estimada(self, nombre):
+        return 60.0
+
+def test_altas_simultaneas_del_mismo_rpa_dejan_una_entrada():
+    scheduler = RPAScheduler(_Manager())
+    barrera = threading.Barrier(16)
+
+    def alta():
+        barrera.wait()
+        scheduler.programar_rpa("rpa", CONFIG, lambda nombre: None)
+
+    hilos = [threading.Thread(target=alta) for _ in range(16)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    try:
+        assert [e[2] for e in scheduler._heap if e[3]] == ["rpa"]
+    finally:
+        scheduler.detener()
+    assert not scheduler._hilo.is_alive()
+
+def test_detener_el_pool_espera_a_las_ejecuciones_en_curso():
+    pool = RPAExecutionPool(max_concurrentes=2)
+    empezada = threading.Event()
+    terminadas = []
+
+    def ejecucion():
+        empezada.set()
+        time.sleep(0.3)
+        terminadas.append(1)
+
+    assert pool.enviar("uno", ejecucion)
+    empezada.wait()
+    pool.detener()
+    assert 1 in terminadas
+    assert not pool.enviar("tres", lambda: None)
+
+def test_la_reserva_se_mantiene_hasta_que_termina_la_ejecucion():
+    pool = RPAExecutionPool(max_concurrentes=2)
+    liberar = threading.Event()
+
+    class Manager(_Manager):
+        def ejecutar_rpa(self, nombre):
+            return pool.enviar(nombre, liberar.wait)
+
+    manager = Manager()
+    scheduler = RPAScheduler(manager)
+    pool.agregar_observador_fin(scheduler.ejecucion_terminada)
+    try:
+        scheduler.programar_rpa("rpa", CONFIG, manager.ejecutar_rpa)
+        with scheduler._condicion:
+            # Se adelanta el disparo a ahora.
+            scheduler._heap[0][0] = time.time()
+            scheduler._condicion.notify()
+        limite = time.time() + 5
+        while not pool.en_ejecucion("rpa") and time.time() < limite:
+            time.sleep(0.01)
+
+        planificador = scheduler.planificador
+        assert "rpa" in planificador._en_curso
+        assert "rpa" in planificador._reservas
+        # Otro RPA con ventana evita el hueco de la ejecución en curso.
+        inicio = planificador._en_curso["rpa"][0]
+        assert planificador.planificar("otro", inicio, 600, 60) > inicio
+
+        liberar.set()
+        limite = time.time() + 5
+        while "rpa" in planificador._en_curso and time.time() < limite:
+            time.sleep(0.01)
+        assert "rpa" not in planificador._en_curso
+    finally:
+        liberar.set()
+        scheduler.detener()
+        pool.detener()
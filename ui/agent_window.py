@@ -1,16 +1,31 @@
 import sys
+import time
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget,
     QVBoxLayout, QPushButton, QLabel, QFileDialog, QHBoxLayout,
-    QListWidget, QMessageBox, QInputDialog, QTextEdit, QCheckBox
+    QMessageBox, QInputDialog, QTextEdit, QCheckBox,
+    QComboBox, QLineEdit, QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QAbstractItemView
 )
 from PyQt5.QtGui import QCloseEvent, QColor
-from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtCore import QTimer, Qt, pyqtSignal
 from core.rpa_manager import RPAManager
-from core.log_handler import obtener_log_completo
+from core.log_handler import obtener_estado_ultima_ejecucion
+from core.log_tail import SeguidorLogs, MAX_LINEAS_VISIBLES
 from core.crypto_utils import descifrar_configuracion
+from core.importer import importar_lote, formatear_resumen
+from core.mail_spool import cola_correo
+from core.mail_digest import agrupador_resumen
+from core.execution_store import historial_ejecuciones
+from core.log_search import indice_logs
+from ui.rpa_table_model import ModeloRPAs, ProxyRPAs, COL_NOMBRE
+from ui.workers import TrabajadoresUI, MonitorLatencia
+
+SEVERIDADES_BUSQUEDA = {"Todas": None, "[ERROR]": "ERROR", "[WARN]": "WARN", "[!]": "AVISO", "Sin etiqueta": "INFO"}
+COLUMNAS_HISTORIAL = ["Inicio", "RPA", "Estado", "Duración (s)", "Navegación (s)", "Capturas", "Correo", "Error"]
 
 class VentanaAgente(QMainWindow):
+    carga_finalizada = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("eSender Agent")
@@ -21,46 +36,96 @@ class VentanaAgente(QMainWindow):
 
         self.tab_rpa = QWidget()
         self.tab_logs = QWidget()
+        self.tab_historial = QWidget()
 
         self.tab_widget.addTab(self.tab_rpa, "Carga de RPAs")
         self.tab_widget.addTab(self.tab_logs, "Resumen de Logs")
+        self.tab_widget.addTab(self.tab_historial, "Historial")
 
         self.rpa_manager = RPAManager()
-        self.lineas_mostradas = set()
+        self.seguidor_logs = SeguidorLogs()
+        self.trabajadores = TrabajadoresUI()
+        self._leyendo_logs = False
         self.inicializar_tab_rpa()
         self.inicializar_tab_logs()
+        self.inicializar_tab_historial()
+
+        self.carga_finalizada.connect(self.actualizar_lista_rpas)
+        self.rpa_manager.agregar_observador_carga(self.carga_finalizada.emit)
 
         self.timer_logs = QTimer(self)
         self.timer_logs.timeout.connect(self.actualizar_logs)
+        self.timer_logs.timeout.connect(self.actualizar_estado_pool)
         self.timer_logs.start(5000)
 
+        # Columnas en vivo (en ejecución, próxima, última): sólo se repintan las filas que cambian.
+        self.timer_rpas = QTimer(self)
+        self.timer_rpas.timeout.connect(self.actualizar_lista_rpas)
+        self.timer_rpas.timeout.connect(self.actualizar_latencia)
+        self.timer_rpas.start(1000)
+
+        self.lbl_latencia = QLabel()
+        self.statusBar().addPermanentWidget(self.lbl_latencia)
+        self.monitor_latencia = MonitorLatencia(self)
+        self.monitor_latencia.iniciar()
+
     def inicializar_tab_rpa(self):
         layout = QVBoxLayout()
 
-        self.lista_rpas = QListWidget()
-        layout.addWidget(QLabel("RPAs cargados:"))
-        layout.addWidget(self.lista_rpas)
+        cabecera = QHBoxLayout()
+        cabecera.addWidget(QLabel("RPAs cargados:"))
+        self.txt_filtro_rpas = QLineEdit()
+        self.txt_filtro_rpas.setPlaceholderText("Filtrar por nombre")
+        cabecera.addWidget(self.txt_filtro_rpas)
+        layout.addLayout(cabecera)
+
+        self.modelo_rpas = ModeloRPAs(self.rpa_manager, self)
+        self.proxy_rpas = ProxyRPAs(self)
+        self.proxy_rpas.setSourceModel(self.modelo_rpas)
+        self.txt_filtro_rpas.textChanged.connect(self.proxy_rpas.setFilterFixedString)
+
+        self.tabla_rpas = QTableView()
+        self.tabla_rpas.setModel(self.proxy_rpas)
+        self.tabla_rpas.setSortingEnabled(True)
+        self.tabla_rpas.sortByColumn(COL_NOMBRE, Qt.AscendingOrder)
+        self.tabla_rpas.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla_rpas.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tabla_rpas.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.tabla_rpas.verticalHeader().hide()
+        # Alto de fila fijo: con miles de filas la vista no mide cada una.
+        self.tabla_rpas.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.tabla_rpas.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.tabla_rpas.horizontalHeader().setStretchLastSection(True)
+        self.tabla_rpas.setColumnWidth(COL_NOMBRE, 200)
+        layout.addWidget(self.tabla_rpas)
 
         self.lbl_rpa_estado = QLabel("Total RPAs activos: 0")
         layout.addWidget(self.lbl_rpa_estado)
 
+        self.lbl_pool = QLabel()
+        layout.addWidget(self.lbl_pool)
+        self.actualizar_estado_pool()
+
         self.actualizar_lista_rpas()
-        self.lista_rpas.currentItemChanged.connect(self.on_rpa_seleccionado)
+        self.tabla_rpas.selectionModel().currentRowChanged.connect(self.on_rpa_seleccionado)
 
         botones = QHBoxLayout()
         btn_cargar = QPushButton("Cargar nuevo RPA")
+        btn_importar = QPushButton("Importar lote")
         btn_eliminar = QPushButton("Eliminar seleccionado")
         btn_renombrar = QPushButton("Renombrar seleccionado")
         btn_ejecutar = QPushButton("▶ Ejecutar ahora")
         btn_toggle = QPushButton("Activar/Inactivar")
 
         btn_cargar.clicked.connect(self.cargar_rpa)
+        btn_importar.clicked.connect(self.importar_lote)
         btn_eliminar.clicked.connect(self.eliminar_rpa)
         btn_renombrar.clicked.connect(self.renombrar_rpa)
         btn_ejecutar.clicked.connect(self.forzar_ejecucion)
         btn_toggle.clicked.connect(self.activar_inactivar)
 
         botones.addWidget(btn_cargar)
+        botones.addWidget(btn_importar)
         botones.addWidget(btn_eliminar)
         botones.addWidget(btn_renombrar)
         botones.addWidget(btn_ejecutar)
@@ -80,24 +145,236 @@ class VentanaAgente(QMainWindow):
 
         self.text_logs = QTextEdit()
         self.text_logs.setReadOnly(True)
+        self.text_logs.document().setMaximumBlockCount(MAX_LINEAS_VISIBLES)
         layout.addWidget(self.text_logs)
 
         btn_limpiar_vista = QPushButton("🧹 Limpiar pantalla")
         btn_limpiar_vista.clicked.connect(self.limpiar_logs_visuales)
         layout.addWidget(btn_limpiar_vista)
 
+        layout.addWidget(QLabel("Buscar en los logs:"))
+        filtros = QHBoxLayout()
+        self.txt_buscar_logs = QLineEdit()
+        self.txt_buscar_logs.setPlaceholderText("Palabras (con * al final para buscar por prefijo)")
+        self.txt_buscar_logs.returnPressed.connect(self.buscar_logs)
+        self.combo_buscar_rpa = QComboBox()
+        self.combo_buscar_severidad = QComboBox()
+        self.combo_buscar_severidad.addItems(list(SEVERIDADES_BUSQUEDA))
+        self.txt_buscar_desde = QLineEdit()
+        self.txt_buscar_desde.setPlaceholderText("Desde AAAA-MM-DD")
+        self.txt_buscar_hasta = QLineEdit()
+        self.txt_buscar_hasta.setPlaceholderText("Hasta (excl.)")
+        btn_buscar = QPushButton("🔍 Buscar")
+        btn_buscar.clicked.connect(self.buscar_logs)
+        filtros.addWidget(self.txt_buscar_logs, 3)
+        filtros.addWidget(self.combo_buscar_rpa, 1)
+        filtros.addWidget(self.combo_buscar_severidad)
+        filtros.addWidget(self.txt_buscar_desde)
+        filtros.addWidget(self.txt_buscar_hasta)
+        filtros.addWidget(btn_buscar)
+        layout.addLayout(filtros)
+
+        self.lbl_busqueda = QLabel()
+        layout.addWidget(self.lbl_busqueda)
+        self.text_busqueda = QTextEdit()
+        self.text_busqueda.setReadOnly(True)
+        layout.addWidget(self.text_busqueda)
+        self.btn_buscar_mas = QPushButton("Más resultados")
+        self.btn_buscar_mas.clicked.connect(self.buscar_mas_logs)
+        self.btn_buscar_mas.setEnabled(False)
+        layout.addWidget(self.btn_buscar_mas)
+        self.cursor_busqueda = None
+        self.resultados_busqueda = 0
+        self.consulta_busqueda = 0
+
         self.tab_logs.setLayout(layout)
 
+    def inicializar_tab_historial(self):
+        layout = QVBoxLayout()
+
+        filtros = QHBoxLayout()
+        self.combo_historial_rpa = QComboBox()
+        self.combo_historial_estado = QComboBox()
+        self.combo_historial_estado.addItems(["Todos", "exito", "error", "en_curso", "interrumpida"])
+        self.txt_historial_desde = QLineEdit()
+        self.txt_historial_desde.setPlaceholderText("Desde AAAA-MM-DD")
+        btn_buscar = QPushButton("Buscar")
+        btn_buscar.clicked.connect(self.buscar_historial)
+        filtros.addWidget(QLabel("RPA:"))
+        filtros.addWidget(self.combo_historial_rpa)
+        filtros.addWidget(QLabel("Estado:"))
+        filtros.addWidget(self.combo_historial_estado)
+        filtros.addWidget(self.txt_historial_desde)
+        filtros.addWidget(btn_buscar)
+        layout.addLayout(filtros)
+
+        self.tabla_historial = QTableWidget(0, len(COLUMNAS_HISTORIAL))
+        self.tabla_historial.setHorizontalHeaderLabels(COLUMNAS_HISTORIAL)
+        self.tabla_historial.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.tabla_historial.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.tabla_historial.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.tabla_historial.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.tabla_historial.horizontalHeader().setStretchLastSection(True)
+        self.tabla_historial.itemSelectionChanged.connect(self.on_ejecucion_seleccionada)
+        layout.addWidget(self.tabla_historial)
+
+        self.btn_historial_mas = QPushButton("Cargar más antiguas")
+        self.btn_historial_mas.clicked.connect(self.cargar_mas_historial)
+        layout.addWidget(self.btn_historial_mas)
+
+        self.text_rutas = QTextEdit()
+        self.text_rutas.setReadOnly(True)
+        self.text_rutas.setMaximumHeight(120)
+        layout.addWidget(self.text_rutas)
+
+        self.tab_historial.setLayout(layout)
+        self.cursor_historial = None
+        self.consulta_historial = 0
+        self.tab_widget.currentChanged.connect(self.on_tab_cambiada)
+
+    def on_tab_cambiada(self, indice):
+        if self.tab_widget.widget(indice) is self.tab_logs:
+            seleccionado = self.combo_buscar_rpa.currentText()
+            self.combo_buscar_rpa.clear()
+            self.combo_buscar_rpa.addItems(["Todos"] + sorted(self.rpa_manager.rpas))
+            self.combo_buscar_rpa.setCurrentText(seleccionado or "Todos")
+        if self.tab_widget.widget(indice) is self.tab_historial:
+            def rpas_leidos(rpas):
+                seleccionado = self.combo_historial_rpa.currentText()
+                self.combo_historial_rpa.clear()
+                self.combo_historial_rpa.addItems(["Todos"] + rpas)
+                self.combo_historial_rpa.setCurrentText(seleccionado or "Todos")
+                self.buscar_historial()
+
+            self.trabajadores.leer(historial_ejecuciones.listar_rpas, al_terminar=rpas_leidos,
+                                   al_fallar=self._historial_fallido)
+
+    def buscar_historial(self):
+        self.tabla_historial.setRowCount(0)
+        self.text_rutas.clear()
+        self.cursor_historial = None
+        self.cargar_mas_historial()
+
+    def cargar_mas_historial(self):
+        # Las consultas van al pool de lecturas. Una búsqueda nueva invalida las
+        # páginas que sigan en vuelo de la anterior.
+        self.consulta_historial += 1
+        consulta = self.consulta_historial
+        rpa = self.combo_historial_rpa.currentText()
+        estado = self.combo_historial_estado.currentText()
+        filtros = {
+            "rpa": None if rpa in ("", "Todos") else rpa,
+            "estado": None if estado == "Todos" else estado,
+            "desde": self.txt_historial_desde.text().strip() or None,
+            "cursor": self.cursor_historial
+        }
+        self.btn_historial_mas.setEnabled(False)
+
+        def leidas(resultado):
+            if consulta == self.consulta_historial:
+                self._mostrar_historial(*resultado)
+
+        self.trabajadores.leer(lambda: historial_ejecuciones.consultar_ejecuciones(**filtros),
+                               al_terminar=leidas, al_fallar=self._historial_fallido)
+
+    def _historial_fallido(self, error: str):
+        self.btn_historial_mas.setEnabled(self.cursor_historial is not None)
+        QMessageBox.critical(self, "Error", f"No se pudo leer el historial: {error}")
+
+    def _mostrar_historial(self, filas, cursor):
+        self.cursor_historial = cursor
+        for fila in filas:
+            n = self.tabla_historial.rowCount()
+            self.tabla_historial.insertRow(n)
+            valores = [
+                fila["inicio"], fila["rpa"], fila["estado"],
+                "" if fila["duracion_s"] is None else f"{fila['duracion_s']:.1f}",
+                "" if fila["navegacion_s"] is None else f"{fila['navegacion_s']:.1f}",
+                "" if fila["capturas"] is None else str(fila["capturas"]),
+                fila["correo"] or "",
+                (fila["error"] or "").split("\n")[0]
+            ]
+            for columna, valor in enumerate(valores):
+                item = QTableWidgetItem(valor)
+                if columna == 0:
+                    item.setData(Qt.UserRole, fila["id"])
+                if fila["estado"] == "error":
+                    item.setForeground(QColor("red"))
+                self.tabla_historial.setItem(n, columna, item)
+        self.btn_historial_mas.setEnabled(self.cursor_historial is not None)
+
+    def _id_ejecucion_seleccionada(self):
+        fila = self.tabla_historial.currentRow()
+        item = self.tabla_historial.item(fila, 0) if fila >= 0 else None
+        return item.data(Qt.UserRole) if item else None
+
+    def on_ejecucion_seleccionada(self):
+        id_ejecucion = self._id_ejecucion_seleccionada()
+        if not id_ejecucion:
+            self.text_rutas.clear()
+            return
+
+        def mostrar(rutas):
+            if self._id_ejecucion_seleccionada() != id_ejecucion:
+                return
+            lineas = []
+            for ruta in rutas:
+                texto = f"{ruta['orden'] + 1}. {ruta['url']} → carga {ruta['tiempo_carga']}s"
+                if ruta["ttfb_ms"] is not None:
+                    texto += f", TTFB {ruta['ttfb_ms']:.0f} ms, load {ruta['load_ms'] or 0:.0f} ms, LCP {ruta['lcp_ms'] or 0:.0f} ms"
+                lineas.append(texto)
+            self.text_rutas.setPlainText("\n".join(lineas) or "Sin detalle de rutas.")
+
+        self.trabajadores.leer(historial_ejecuciones.obtener_rutas, id_ejecucion, al_terminar=mostrar,
+                               al_fallar=lambda error: self.text_rutas.setPlainText(f"No se pudo leer el detalle: {error}"))
+
+    def rpa_seleccionado(self):
+        indice = self.tabla_rpas.selectionModel().currentIndex()
+        if not indice.isValid():
+            return None
+        return self.modelo_rpas.nombre_en(self.proxy_rpas.mapToSource(indice).row())
+
     def actualizar_lista_rpas(self):
-        self.lista_rpas.clear()
-        activos = 0
-        for nombre in self.rpa_manager.obtener_lista_rpas():
-            info = self.rpa_manager.obtener_rpa_info(nombre)
-            item_str = f"🟢 {nombre}" if info.get("activo") else f"🔴 {nombre}"
-            self.lista_rpas.addItem(item_str)
-            if info.get("activo"):
-                activos += 1
-        self.lbl_rpa_estado.setText(f"Total RPAs activos: {activos}")
+        self.modelo_rpas.refrescar()
+        estado = f"Total RPAs activos: {self.modelo_rpas.contar_activos()} de {self.modelo_rpas.rowCount()}"
+        if not self.rpa_manager.carga_completa.is_set():
+            estado += " (cargando RPAs...)"
+        self.lbl_rpa_estado.setText(estado)
+
+    def actualizar_latencia(self):
+        self.lbl_latencia.setText(self.monitor_latencia.resumen())
+
+    def _en_segundo_plano(self, texto: str, funcion, *args, al_terminar=None, titulo_error: str = "Error"):
+        # Operación que cambia RPAs: se ejecuta en el pool de cambios y al
+        # terminar se refrescan la tabla y la información del seleccionado.
+        self.statusBar().showMessage(texto)
+
+        def terminado(resultado):
+            self.statusBar().clearMessage()
+            self.actualizar_lista_rpas()
+            self.on_rpa_seleccionado()
+            if al_terminar:
+                al_terminar(resultado)
+
+        def fallido(error: str):
+            self.statusBar().clearMessage()
+            self.actualizar_lista_rpas()
+            QMessageBox.critical(self, titulo_error, error)
+
+        self.trabajadores.cambiar(funcion, *args, al_terminar=terminado, al_fallar=fallido)
+
+    def actualizar_estado_pool(self):
+        m = self.rpa_manager.pool.obtener_metricas()
+        spool = cola_correo.obtener_estado()
+        resumen = agrupador_resumen.obtener_metricas()
+        self.lbl_pool.setText(
+            f"En ejecución: {m['en_curso']}/{m['max_concurrentes']} | En cola: {m['en_cola']} "
+            f"| Espera promedio: {m['espera_promedio_s']:.1f}s | Espera máxima: {m['espera_max_s']:.1f}s"
+            f"\nCorreos pendientes: {spool['pendientes']} | Más antiguo: {spool['antiguedad_max_s']:.0f}s "
+            f"| Enviados: {spool['enviados']} | Descartados: {spool['dead']}"
+            f"\nResúmenes: {resumen['reportes_pendientes']} reportes en espera | "
+            f"{resumen['mensajes_ahorrados']} correos y {resumen['bytes_ahorrados'] / 1024:.0f} KB ahorrados"
+        )
 
     def cargar_rpa(self):
         nombre, ok = QInputDialog.getText(self, "Nombre del RPA", "Asigna un nombre para este RPA:")
@@ -114,84 +391,177 @@ class VentanaAgente(QMainWindow):
         if not key_path:
             return
 
-        exito = self.rpa_manager.agregar_rpa(nombre.strip(), enc_path, key_path, descripcion.strip())
-        if exito:
-            QMessageBox.information(self, "Éxito", f"RPA '{nombre}' cargado exitosamente.")
-            self.actualizar_lista_rpas()
+        def cargado(exito):
+            if exito:
+                QMessageBox.information(self, "Éxito", f"RPA '{nombre}' cargado exitosamente.")
+            else:
+                QMessageBox.critical(self, "Error", f"No se pudo cargar el RPA '{nombre}'.")
+
+        self._en_segundo_plano(
+            f"Cargando RPA '{nombre}'...", self.rpa_manager.agregar_rpa,
+            nombre.strip(), enc_path, key_path, descripcion.strip(), al_terminar=cargado
+        )
+
+    def importar_lote(self):
+        tipo, ok = QInputDialog.getItem(
+            self, "Importar lote", "Origen de los RPAs:", ["Carpeta", "Archivo .zip"], 0, False
+        )
+        if not ok:
+            return
+
+        if tipo == "Carpeta":
+            origen = QFileDialog.getExistingDirectory(self, "Selecciona la carpeta con los RPAs")
         else:
-            QMessageBox.critical(self, "Error", f"No se pudo cargar el RPA '{nombre}'.")
+            origen, _ = QFileDialog.getOpenFileName(self, "Selecciona el archivo .zip", filter="*.zip")
+        if not origen:
+            return
+
+        def importado(resumen):
+            if resumen["fallidos"]:
+                QMessageBox.warning(self, "Importación con errores", formatear_resumen(resumen))
+            else:
+                QMessageBox.information(self, "Importación completada", formatear_resumen(resumen))
+
+        self._en_segundo_plano(
+            f"Importando RPAs desde {origen}...", importar_lote, self.rpa_manager, origen,
+            al_terminar=importado, titulo_error="No se pudo importar el lote"
+        )
 
     def eliminar_rpa(self):
-        seleccionado = self.lista_rpas.currentItem()
-        if seleccionado:
-            nombre = seleccionado.text()[2:].strip()
+        nombre = self.rpa_seleccionado()
+        if nombre:
             confirmar = QMessageBox.question(
                 self, "Confirmar", f"¿Eliminar RPA '{nombre}'?", QMessageBox.Yes | QMessageBox.No
             )
             if confirmar == QMessageBox.Yes:
-                self.rpa_manager.eliminar_rpa(nombre)
-                self.actualizar_lista_rpas()
+                self._en_segundo_plano(f"Eliminando RPA '{nombre}'...", self.rpa_manager.eliminar_rpa, nombre)
 
     def renombrar_rpa(self):
-        seleccionado = self.lista_rpas.currentItem()
-        if seleccionado:
-            nombre_antiguo = seleccionado.text()[2:].strip()
+        nombre_antiguo = self.rpa_seleccionado()
+        if nombre_antiguo:
             nombre_nuevo, ok = QInputDialog.getText(self, "Renombrar", f"Nuevo nombre para '{nombre_antiguo}':")
             if ok and nombre_nuevo.strip():
-                try:
-                    self.rpa_manager.renombrar_rpa(nombre_antiguo, nombre_nuevo.strip())
-                    self.actualizar_lista_rpas()
-                except Exception as e:
-                    QMessageBox.critical(self, "Error", str(e))
+                def renombrado(exito):
+                    if not exito:
+                        QMessageBox.warning(self, "Renombrar", f"No se pudo renombrar '{nombre_antiguo}'.")
+
+                self._en_segundo_plano(
+                    f"Renombrando RPA '{nombre_antiguo}'...", self.rpa_manager.renombrar_rpa,
+                    nombre_antiguo, nombre_nuevo.strip(), al_terminar=renombrado
+                )
 
     def activar_inactivar(self):
-        item = self.lista_rpas.currentItem()
-        if item:
-            nombre = item.text()[2:].strip()
-            info = self.rpa_manager.obtener_rpa_info(nombre)
-            if info.get("activo"):
-                self.rpa_manager.desactivar_rpa(nombre)
+        nombre = self.rpa_seleccionado()
+        if nombre:
+            # Activar descifra la configuración para programarlo.
+            if self.rpa_manager.obtener_rpa_info(nombre).get("activo"):
+                self._en_segundo_plano(f"Inactivando RPA '{nombre}'...", self.rpa_manager.desactivar_rpa, nombre)
             else:
-                self.rpa_manager.activar_rpa(nombre)
-            self.actualizar_lista_rpas()
+                self._en_segundo_plano(f"Activando RPA '{nombre}'...", self.rpa_manager.activar_rpa, nombre)
 
     def actualizar_logs(self):
-        entradas_nuevas = []
-        nombres_logs = list(self.rpa_manager.rpas.keys())
-        for nombre_rpa in nombres_logs:
-            lineas = obtener_log_completo(nombre_rpa)
-            for linea in lineas:
-                entry = f"{nombre_rpa}: {linea.strip()}"
-                if entry not in self.lineas_mostradas:
-                    self.lineas_mostradas.add(entry)
-                    entradas_nuevas.append(entry)
-
+        # Una sola lectura en curso: si el disco va lento, el siguiente tic no se apila.
+        if self._leyendo_logs:
+            return
+        self._leyendo_logs = True
+        self.trabajadores.leer(
+            self.seguidor_logs.leer_nuevas, list(self.rpa_manager.rpas.keys()),
+            al_terminar=self._mostrar_logs_nuevos, al_fallar=self._lectura_logs_fallida
+        )
+
+    def _mostrar_logs_nuevos(self, entradas_nuevas):
+        self._leyendo_logs = False
         if entradas_nuevas:
             self.text_logs.append("\n".join(entradas_nuevas))
             self.text_logs.append("-" * 80)
 
+    def _lectura_logs_fallida(self, error: str):
+        self._leyendo_logs = False
+        self.statusBar().showMessage(f"No se pudieron leer los logs: {error}", 5000)
+
     def limpiar_logs_visuales(self):
         self.text_logs.clear()
-        self.lineas_mostradas.clear()
+
+    def buscar_logs(self):
+        self.text_busqueda.clear()
+        self.cursor_busqueda = None
+        self.resultados_busqueda = 0
+        self.buscar_mas_logs()
+
+    def buscar_mas_logs(self):
+        self.consulta_busqueda += 1
+        consulta = self.consulta_busqueda
+        rpa = self.combo_buscar_rpa.currentText()
+        texto = self.txt_buscar_logs.text()
+        filtros = {
+            "rpa": None if rpa in ("", "Todos") else rpa,
+            "severidad": SEVERIDADES_BUSQUEDA[self.combo_buscar_severidad.currentText()],
+            "desde": self.txt_buscar_desde.text().strip() or None,
+            "hasta": self.txt_buscar_hasta.text().strip() or None,
+            "antes_de": self.cursor_busqueda
+        }
+        self.btn_buscar_mas.setEnabled(False)
+        self.lbl_busqueda.setText("Buscando...")
+
+        def buscar():
+            # En el pool de lecturas; el tiempo medido es el de la consulta.
+            inicio = time.perf_counter()
+            resultados, cursor = indice_logs.buscar(texto, **filtros)
+            return resultados, cursor, (time.perf_counter() - inicio) * 1000
+
+        def encontrados(resultado):
+            if consulta == self.consulta_busqueda:
+                self._mostrar_busqueda(*resultado)
+
+        def fallida(error: str):
+            if consulta == self.consulta_busqueda:
+                self.lbl_busqueda.setText(f"Búsqueda no válida: {error}")
+                self.btn_buscar_mas.setEnabled(self.cursor_busqueda is not None)
+
+        self.trabajadores.leer(buscar, al_terminar=encontrados, al_fallar=fallida)
+
+    def _mostrar_busqueda(self, resultados, cursor, ms: float):
+        self.cursor_busqueda = cursor
+        for r in resultados:
+            self.text_busqueda.append(f"[{r['fecha']}] {r['rpa']}: {r['mensaje']}")
+        self.resultados_busqueda += len(resultados)
+        texto = f"{self.resultados_busqueda} resultados ({ms:.0f} ms)"
+        if indice_logs.metricas["indexando_historico"]:
+            texto += " — indexando logs anteriores, puede haber más"
+        self.lbl_busqueda.setText(texto)
+        self.btn_buscar_mas.setEnabled(self.cursor_busqueda is not None)
 
     def forzar_ejecucion(self):
-        item = self.lista_rpas.currentItem()
-        if item:
-            nombre = item.text()[2:].strip()
-            self.rpa_manager.ejecutar_rpa(nombre)
-            QMessageBox.information(self, "Ejecución", f"RPA '{nombre}' ejecutado manualmente.")
+        nombre = self.rpa_seleccionado()
+        if nombre:
+            if self.rpa_manager.ejecutar_rpa(nombre):
+                self.actualizar_lista_rpas()
+                QMessageBox.information(self, "Ejecución", f"RPA '{nombre}' enviado a ejecución.")
+            else:
+                QMessageBox.warning(self, "Ejecución", f"RPA '{nombre}' ya está en cola o en ejecución.")
 
     def on_rpa_seleccionado(self):
-        item = self.lista_rpas.currentItem()
-        if not item:
+        nombre = self.rpa_seleccionado()
+        if not nombre:
             self.lbl_info.setText("Sin selección.")
             return
 
-        nombre = item.text()[2:].strip()
         if nombre not in self.rpa_manager.rpas:
             self.lbl_info.setText("Sin información.")
             return
 
+        # Descifrar y leer el log puede tardar: se hace en el pool de lecturas y
+        # el resultado sólo se muestra si el RPA sigue seleccionado.
+        self.lbl_info.setText(f"Cargando información de '{nombre}'...")
+
+        def mostrar(texto):
+            if self.rpa_seleccionado() == nombre:
+                self.lbl_info.setText(texto)
+
+        self.trabajadores.leer(self._leer_info_rpa, nombre, al_terminar=mostrar)
+
+    def _leer_info_rpa(self, nombre: str) -> str:
+        # Se ejecuta fuera del hilo de la interfaz.
         try:
             info = self.rpa_manager.obtener_rpa_info(nombre)
             ruta_enc = self.rpa_manager.rpas[nombre]["enc"]
@@ -204,13 +574,20 @@ class VentanaAgente(QMainWindow):
             estado = "Activo" if info.get("activo") else "Inactivo"
 
             texto = f"Descripción: {desc}\nCreado: {fecha}\nEjecuciones: {ejecs}\nEstado: {estado}"
+            ultima = obtener_estado_ultima_ejecucion(nombre)
+            if ultima["inicio"]:
+                resultados = {"exito": "correcta", "error": "con error", "en_curso": "en curso"}
+                texto += f"\nÚltima ejecución: {ultima['inicio']} ({resultados[ultima['estado']]})"
             if prog:
                 texto += f"\nFrecuencia: {prog.get('frecuencia')} | Intervalo: {prog.get('intervalo')} | Inicio: {prog.get('hora_inicio')}"
+                plan = next((p for p in self.rpa_manager.scheduler.obtener_planificacion() if p["nombre"] == nombre), None)
+                if plan:
+                    texto += f"\nPróxima ejecución: {plan['planificado']:%Y-%m-%d %H:%M} (nominal {plan['nominal']:%H:%M})"
             else:
                 texto += "\nEste RPA no tiene configuración de programación."
-            self.lbl_info.setText(texto)
+            return texto
         except Exception as e:
-            self.lbl_info.setText(f"Error al leer configuración: {e}")
+            return f"Error al leer configuración: {e}"
 
     def closeEvent(self, event: QCloseEvent):
         event.ignore()
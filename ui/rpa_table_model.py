@@ -0,0 +1,172 @@
+from typing import Dict, List, Optional, Tuple
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PyQt5.QtGui import QColor
+
+COLUMNAS_RPAS = ["Nombre", "Estado", "Última ejecución", "Última duración (s)", "Próxima ejecución", "En ejecución"]
+COL_NOMBRE, COL_ESTADO, COL_ULTIMA, COL_DURACION, COL_PROXIMA, COL_EJECUCION = range(len(COLUMNAS_RPAS))
+TEXTO_EJECUCION = {"en_curso": "▶ En curso", "en_cola": "⏳ En cola"}
+
+Fila = Tuple[str, bool, str, Optional[float], str, str]
+
+def _fila_rpa(manager, nombre: str, datos: Dict) -> Fila:
+    meta = manager.metadatos.obtener(nombre)
+    proxima = manager.scheduler.obtener_proxima_ejecucion(nombre)
+    if proxima:
+        proxima = proxima.strftime("%Y-%m-%d %H:%M:%S")
+    elif datos.get("desde_indice"):
+        # Mientras termina la carga se muestra la del índice persistido.
+        proxima = datos.get("proxima_ejecucion") or ""
+    if manager.pool.en_ejecucion(nombre):
+        ejecucion = "en_curso"
+    elif manager.pool.en_cola(nombre):
+        ejecucion = "en_cola"
+    else:
+        ejecucion = ""
+    return (
+        nombre,
+        bool(meta.get("activo")),
+        meta.get("ultima_ejecucion") or "",
+        meta.get("duracion_ultima_s"),
+        proxima or "",
+        ejecucion
+    )
+
+def _tramos(indices: List[int]) -> List[Tuple[int, int]]:
+    # [1, 2, 3, 7, 8] -> [(1, 3), (7, 8)]
+    tramos = []
+    for i in indices:
+        if tramos and tramos[-1][1] == i - 1:
+            tramos[-1] = (tramos[-1][0], i)
+        else:
+            tramos.append((i, i))
+    return tramos
+
+def _clave_orden(fila: Fila, columna: int):
+    valor = fila[columna]
+    if columna == COL_DURACION:
+        return -1.0 if valor is None else valor
+    return valor
+
+# Tabla de RPAs sobre el registro del RPAManager. Cada fila es una tupla con
+# los valores crudos; refrescar() vuelve a leer el registro (instantáneas sin
+# lock, sin descifrar nada) y sólo notifica a la vista las filas que cambian:
+# altas al final en un bloque, bajas por tramos contiguos y dataChanged por
+# tramo de filas modificadas. Con miles de RPAs la vista no se reconstruye ni
+# pierde la selección. El orden se aplica aquí, con una clave por fila (ordenar
+# desde un proxy llamaría a data() en cada comparación); ProxyRPAs sólo filtra.
+class ModeloRPAs(QAbstractTableModel):
+
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self._filas: List[Fila] = []
+        self._posicion: Dict[str, int] = {}
+        self._orden: Optional[Tuple[int, int]] = None
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._filas)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNAS_RPAS)
+
+    def headerData(self, seccion, orientacion, rol=Qt.DisplayRole):
+        if orientacion == Qt.Horizontal and rol == Qt.DisplayRole:
+            return COLUMNAS_RPAS[seccion]
+        return None
+
+    def data(self, indice: QModelIndex, rol=Qt.DisplayRole):
+        if not indice.isValid():
+            return None
+        fila = self._filas[indice.row()]
+        columna = indice.column()
+        if rol == Qt.DisplayRole:
+            if columna == COL_ESTADO:
+                return "🟢 Activo" if fila[COL_ESTADO] else "🔴 Inactivo"
+            if columna == COL_DURACION:
+                return "" if fila[COL_DURACION] is None else f"{fila[COL_DURACION]:.1f}"
+            if columna == COL_EJECUCION:
+                return TEXTO_EJECUCION.get(fila[COL_EJECUCION], "")
+            return fila[columna]
+        if rol == Qt.ForegroundRole and columna == COL_EJECUCION and fila[COL_EJECUCION] == "en_curso":
+            return QColor("darkGreen")
+        if rol == Qt.TextAlignmentRole and columna == COL_DURACION:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def nombre_en(self, fila: int) -> Optional[str]:
+        return self._filas[fila][COL_NOMBRE] if 0 <= fila < len(self._filas) else None
+
+    def fila_de(self, nombre: str) -> int:
+        return self._posicion.get(nombre, -1)
+
+    def sort(self, columna: int, orden=Qt.AscendingOrder):
+        self._orden = (columna, orden)
+        self._ordenar()
+
+    def _ordenar(self):
+        columna, orden = self._orden
+        self.layoutAboutToBeChanged.emit()
+        persistentes = self.persistentIndexList()
+        nombres = [self._filas[i.row()][COL_NOMBRE] for i in persistentes]
+        self._filas.sort(key=lambda f: (_clave_orden(f, columna), f[COL_NOMBRE]), reverse=orden == Qt.DescendingOrder)
+        self._posicion = {f[COL_NOMBRE]: i for i, f in enumerate(self._filas)}
+        self.changePersistentIndexList(
+            persistentes, [self.index(self._posicion[n], i.column()) for n, i in zip(nombres, persistentes)]
+        )
+        self.layoutChanged.emit()
+
+    def refrescar(self):
+        rpas = self.manager.rpas
+        nombres = list(rpas)
+        vigentes = set(nombres)
+
+        # Bajas: de abajo arriba, un aviso por tramo contiguo.
+        quitar = [i for i, f in enumerate(self._filas) if f[COL_NOMBRE] not in vigentes]
+        for inicio, fin in reversed(_tramos(quitar)):
+            self.beginRemoveRows(QModelIndex(), inicio, fin)
+            del self._filas[inicio:fin + 1]
+            self.endRemoveRows()
+        if quitar:
+            self._posicion = {f[COL_NOMBRE]: i for i, f in enumerate(self._filas)}
+
+        # Cambios: se comparan las tuplas y se avisa por tramo de filas tocadas.
+        cambiadas = []
+        reordenar = False
+        for i, fila in enumerate(self._filas):
+            nombre = fila[COL_NOMBRE]
+            nueva = _fila_rpa(self.manager, nombre, rpas.get(nombre, {}))
+            if nueva != fila:
+                self._filas[i] = nueva
+                cambiadas.append(i)
+                if self._orden and nueva[self._orden[0]] != fila[self._orden[0]]:
+                    reordenar = True
+        for inicio, fin in _tramos(cambiadas):
+            self.dataChanged.emit(self.index(inicio, 0), self.index(fin, len(COLUMNAS_RPAS) - 1))
+
+        # Altas: en un solo bloque al final.
+        nuevas = [_fila_rpa(self.manager, n, rpas.get(n, {})) for n in nombres if n not in self._posicion]
+        if nuevas:
+            inicio = len(self._filas)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(nuevas) - 1)
+            for desplazamiento, fila in enumerate(nuevas):
+                self._posicion[fila[COL_NOMBRE]] = inicio + desplazamiento
+            self._filas.extend(nuevas)
+            self.endInsertRows()
+            reordenar = reordenar or self._orden is not None
+
+        if reordenar:
+            self._ordenar()
+
+    def contar_activos(self) -> int:
+        return sum(1 for f in self._filas if f[COL_ESTADO])
+
+# Filtro por texto sobre el nombre. El orden lo delega en el modelo.
+class ProxyRPAs(QSortFilterProxyModel):
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterKeyColumn(COL_NOMBRE)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+    def sort(self, columna: int, orden=Qt.AscendingOrder):
+        self.sourceModel().sort(columna, orden)
@@ -0,0 +1,120 @@
+import time
+import traceback
+from typing import Callable, Optional
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, Qt, pyqtSignal
+from core.log_handler import LOG_AGENTE, registrar_log
+
+MAX_HILOS_LECTURA = 4
+INTERVALO_FOTOGRAMA_MS = 16
+UMBRAL_BLOQUEO_MS = 100
+
+class SenalesTarea(QObject):
+    terminado = pyqtSignal(object)
+    fallido = pyqtSignal(str)
+
+# Una función cualquiera ejecutada en un hilo del pool. El resultado (o el
+# error) vuelve por señal al hilo de la interfaz, donde se conectaron los slots.
+class Tarea(QRunnable):
+
+    def __init__(self, funcion: Callable, *args, **kwargs):
+        super().__init__()
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.senales = SenalesTarea()
+
+    def run(self):
+        try:
+            resultado = self.funcion(*self.args, **self.kwargs)
+        except Exception as e:
+            registrar_log(LOG_AGENTE, f"[ERROR] Tarea en segundo plano de la interfaz: {e}\n{traceback.format_exc()}")
+            self.senales.fallido.emit(str(e) or type(e).__name__)
+        else:
+            self.senales.terminado.emit(resultado)
+
+# Trabajo bloqueante fuera del hilo de la interfaz. Dos pools: `lecturas`
+# (descifrar la configuración seleccionada, leer logs, consultar el historial
+# y buscar en los logs) en paralelo y
+# `cambios` (cargar, importar, eliminar, renombrar, activar) de uno en uno y
+# en el orden en que se pidieron, para que dos operaciones sobre el mismo RPA
+# nunca se crucen. Los callbacks se ejecutan en el hilo de la interfaz.
+class TrabajadoresUI:
+
+    def __init__(self, max_lecturas: int = MAX_HILOS_LECTURA):
+        self.lecturas = QThreadPool()
+        self.lecturas.setMaxThreadCount(max_lecturas)
+        self.cambios = QThreadPool()
+        self.cambios.setMaxThreadCount(1)
+
+    def _lanzar(self, pool: QThreadPool, funcion: Callable, args, al_terminar: Optional[Callable],
+                al_fallar: Optional[Callable]) -> Tarea:
+        tarea = Tarea(funcion, *args)
+        if al_terminar:
+            tarea.senales.terminado.connect(al_terminar)
+        if al_fallar:
+            tarea.senales.fallido.connect(al_fallar)
+        pool.start(tarea)
+        return tarea
+
+    def leer(self, funcion: Callable, *args, al_terminar: Optional[Callable] = None,
+             al_fallar: Optional[Callable] = None) -> Tarea:
+        return self._lanzar(self.lecturas, funcion, args, al_terminar, al_fallar)
+
+    def cambiar(self, funcion: Callable, *args, al_terminar: Optional[Callable] = None,
+                al_fallar: Optional[Callable] = None) -> Tarea:
+        return self._lanzar(self.cambios, funcion, args, al_terminar, al_fallar)
+
+    def ocupado(self) -> bool:
+        return self.cambios.activeThreadCount() > 0
+
+    def esperar(self, timeout_ms: int = 10000) -> bool:
+        return self.cambios.waitForDone(timeout_ms) and self.lecturas.waitForDone(timeout_ms)
+
+# Mide la latencia del bucle de eventos: un QTimer de 16 ms (un fotograma a
+# 60 Hz) anota cuánto llega tarde cada disparo. Si el hilo de la interfaz se
+# bloquea, el retraso crece y se ve en la barra de estado (`resumen()`, máximo
+# y media del último intervalo). Los retrasos de más de UMBRAL_BLOQUEO_MS
+# cuentan como bloqueos.
+class MonitorLatencia(QObject):
+
+    def __init__(self, parent=None, intervalo_ms: int = INTERVALO_FOTOGRAMA_MS):
+        super().__init__(parent)
+        self.intervalo_ms = intervalo_ms
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._tic)
+        self._anterior: Optional[float] = None
+        self.metricas = {"fotogramas": 0, "bloqueos": 0, "retraso_max_ms": 0.0}
+        self._reiniciar_ventana()
+
+    def _reiniciar_ventana(self):
+        self._ventana_max = 0.0
+        self._ventana_total = 0.0
+        self._ventana_n = 0
+
+    def iniciar(self):
+        self._anterior = time.perf_counter()
+        self._timer.start(self.intervalo_ms)
+
+    def detener(self):
+        self._timer.stop()
+
+    def _tic(self):
+        ahora = time.perf_counter()
+        retraso = max(0.0, (ahora - self._anterior) * 1000 - self.intervalo_ms)
+        self._anterior = ahora
+        self._ventana_max = max(self._ventana_max, retraso)
+        self._ventana_total += retraso
+        self._ventana_n += 1
+        self.metricas["fotogramas"] += 1
+        self.metricas["retraso_max_ms"] = max(self.metricas["retraso_max_ms"], retraso)
+        if retraso >= UMBRAL_BLOQUEO_MS:
+            self.metricas["bloqueos"] += 1
+
+    def resumen(self) -> str:
+        # Texto para la barra de estado; abre una ventana de medida nueva.
+        media = self._ventana_total / self._ventana_n if self._ventana_n else 0.0
+        texto = (f"Interfaz: retraso medio {media:.0f} ms, máximo {self._ventana_max:.0f} ms "
+                 f"| bloqueos (>{UMBRAL_BLOQUEO_MS} ms): {self.metricas['bloqueos']}")
+        self._reiniciar_ventana()
+        return texto